@@ -0,0 +1,320 @@
+# Load test for the SAFE AI Flask API.
+#
+#   python benchmark_api.py --target client --concurrency 8 --iterations 50
+#   python benchmark_api.py --target server --concurrency 16 --output api.json
+#   python benchmark_api.py --url http://127.0.0.1:8000 --baseline api.json --max-regression 15
+#
+# Each virtual user keeps its own session and loops over a mix of
+# /api/chat (messages from the sentiment benchmark corpus), /api/risk-assessment,
+# /api/conversation-stats and /api/generate-report, polling /api/report-status
+# until its report is rendered so the report queue stays bounded.
+#
+# Targets:
+#   client  Flask test client in this process: request handling without sockets
+#   server  werkzeug's threaded WSGI server on a local port, driven over HTTP
+#   --url   an already running server (e.g. Gunicorn), driven over HTTP
+# With client/server the load generator shares this process (and its GIL)
+# with the app, so --url against a separate server is the closest to production.
+#
+# Throughput and p50/p95/p99 latency per endpoint are written to --output as
+# JSON. With --baseline, the run fails (exit code 1) when throughput drops or
+# a latency percentile rises by more than --max-regression percent; latency
+# changes smaller than --latency-floor-ms are treated as noise.
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from benchmark_sentiment import CORPUS, synthetic_corpus
+from bulk_reports import percentile
+from report_jobs import DONE, FAILED
+from session_store import SESSION_HEADER
+
+ENDPOINTS = ['/api/chat', '/api/risk-assessment', '/api/conversation-stats', '/api/generate-report',
+             '/api/report-status']
+# Requests per iteration of a virtual user; a report is requested every
+# report_every iterations
+MIX = {'/api/chat': 4, '/api/risk-assessment': 2, '/api/conversation-stats': 1}
+LATENCY_METRICS = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+class ClientTransport:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.client.open(path, method=method, json=body, headers=headers or {})
+        return response.status_code, response.get_json(silent=True), response.headers.get(SESSION_HEADER)
+
+    def close(self):
+        pass
+
+
+class HTTPTransport:
+    # One keep-alive connection per virtual user
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        data = None
+        if body is not None:
+            data = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, path, body=data, headers=headers)
+            response = self.connection.getresponse()
+        except (http.client.HTTPException, OSError):
+            # The server closed the connection; retry once on a new one
+            self.connection.close()
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            self.connection.request(method, path, body=data, headers=headers)
+            response = self.connection.getresponse()
+        payload = response.read()
+        try:
+            payload = json.loads(payload)
+        except ValueError:
+            payload = None
+        return response.status, payload, response.getheader(SESSION_HEADER)
+
+    def close(self):
+        self.connection.close()
+
+
+class LocalServer:
+    # werkzeug's threaded development server on an ephemeral port
+    def __init__(self, app):
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class KeepAliveHandler(WSGIRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self.server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=KeepAliveHandler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.thread.join()
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {endpoint: [] for endpoint in ENDPOINTS}
+        self.errors = {endpoint: 0 for endpoint in ENDPOINTS}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, ok):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+class VirtualUser:
+    def __init__(self, transport, recorder, messages, seed):
+        self.transport = transport
+        self.recorder = recorder
+        self.messages = messages
+        self.rng = random.Random(seed)
+        self.session_id = None
+
+    def call(self, endpoint, method='GET', body=None, path=None):
+        headers = {SESSION_HEADER: self.session_id} if self.session_id else {}
+        start = time.perf_counter()
+        try:
+            status, payload, session_id = self.transport.request(method, path or endpoint, body, headers)
+        except Exception:
+            status, payload, session_id = 0, None, None
+        self.recorder.record(endpoint, time.perf_counter() - start, 200 <= status < 300)
+        self.session_id = session_id or self.session_id
+        return status, payload
+
+    def iteration(self, report):
+        steps = [endpoint for endpoint, weight in MIX.items() for _ in range(weight)]
+        self.rng.shuffle(steps)
+        # A conversation has to exist before stats or reports mean anything
+        steps.remove('/api/chat')
+        steps.insert(0, '/api/chat')
+        for endpoint in steps:
+            if endpoint == '/api/chat':
+                self.call(endpoint, 'POST', {'message': self.rng.choice(self.messages)})
+            elif endpoint == '/api/risk-assessment':
+                body = {'age': round(self.rng.uniform(18, 80), 1), 'bmi': round(self.rng.uniform(15, 45), 1)}
+                self.call(endpoint, 'POST', body)
+            else:
+                self.call(endpoint)
+        if report:
+            self.request_report()
+
+    def request_report(self, timeout=60.0):
+        status, payload = self.call('/api/generate-report', 'POST')
+        if status != 202 or not payload:
+            return
+        status_url = payload['status_url']
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            status, payload = self.call('/api/report-status', path=status_url)
+            if status != 200 or payload.get('status') in (DONE, FAILED):
+                return
+            time.sleep(0.01)
+
+
+def summarize(recorder, elapsed):
+    endpoints = {}
+    for endpoint in ENDPOINTS:
+        latencies = recorder.latencies[endpoint]
+        if not latencies:
+            continue
+        endpoints[endpoint] = {
+            'requests': len(latencies),
+            'errors': recorder.errors[endpoint],
+            'throughput_rps': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+        }
+    total = sum(len(latencies) for latencies in recorder.latencies.values())
+    return endpoints, {
+        'requests': total,
+        'errors': sum(recorder.errors.values()),
+        'throughput_rps': total / elapsed,
+    }
+
+
+def run(target='client', url=None, concurrency=4, iterations=20, report_every=10, synthetic=500, seed=42):
+    """
+    Drive the API with concurrency virtual users for iterations loops each;
+    returns the results dict written to JSON
+    """
+    messages = CORPUS + synthetic_corpus(synthetic, seed)
+    recorder = Recorder()
+
+    def user(index, make_transport):
+        transport = make_transport()
+        try:
+            virtual_user = VirtualUser(transport, recorder, messages, seed + index)
+            for i in range(iterations):
+                virtual_user.iteration(report=report_every and (i + 1) % report_every == 0)
+        finally:
+            transport.close()
+
+    def drive(make_transport):
+        # One untimed loop loads the models and sentiment backend first
+        transport = make_transport()
+        VirtualUser(transport, Recorder(), messages, seed - 1).iteration(report=bool(report_every))
+        transport.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(user, i, make_transport) for i in range(concurrency)]:
+                future.result()
+        return time.perf_counter() - start
+
+    if url:
+        target = 'url'
+        elapsed = drive(lambda: HTTPTransport(url))
+    else:
+        from safe_ai_server import app
+
+        if target == 'server':
+            with LocalServer(app) as server:
+                elapsed = drive(lambda: HTTPTransport(server.url))
+        else:
+            elapsed = drive(lambda: ClientTransport(app))
+
+    endpoints, total = summarize(recorder, elapsed)
+    return {
+        'target': url or target,
+        'concurrency': concurrency,
+        'iterations': iterations,
+        'elapsed_seconds': elapsed,
+        'endpoints': endpoints,
+        'total': total,
+    }
+
+
+def compare(result, baseline, max_regression=10.0, latency_floor_ms=1.0):
+    """
+    Regressions beyond max_regression percent against a baseline result, as
+    human-readable lines; empty when the run is within bounds
+    """
+    failures = []
+    for endpoint, before in baseline['endpoints'].items():
+        after = result['endpoints'].get(endpoint)
+        if after is None:
+            failures.append(f"{endpoint}: missing from this run")
+            continue
+        if before['throughput_rps'] > 0:
+            change = (after['throughput_rps'] - before['throughput_rps']) / before['throughput_rps'] * 100
+            if change < -max_regression:
+                failures.append(f"{endpoint} throughput_rps: {before['throughput_rps']:.1f} -> "
+                                f"{after['throughput_rps']:.1f} ({change:+.1f}%)")
+        for metric in LATENCY_METRICS:
+            increase = after[metric] - before[metric]
+            if before[metric] > 0 and increase > latency_floor_ms:
+                change = increase / before[metric] * 100
+                if change > max_regression:
+                    failures.append(f"{endpoint} {metric}: {before[metric]:.2f} -> {after[metric]:.2f} "
+                                    f"({change:+.1f}%)")
+        if after['errors'] > before['errors']:
+            failures.append(f"{endpoint} errors: {before['errors']} -> {after['errors']}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load test the SAFE AI API')
+    parser.add_argument('--target', choices=('client', 'server'), default='client',
+                        help='Flask test client or a local werkzeug server (ignored with --url)')
+    parser.add_argument('--url', default=None, help='Base URL of a running server')
+    parser.add_argument('--concurrency', type=int, default=4, help='Virtual users')
+    parser.add_argument('--iterations', type=int, default=20, help='Loops per virtual user')
+    parser.add_argument('--report-every', type=int, default=10, help='Request a report every N loops (0 = never)')
+    parser.add_argument('--synthetic', type=int, default=500, help='Synthetic messages added to the corpus')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='Write the results as JSON')
+    parser.add_argument('--baseline', default=None, help='Results JSON to compare against')
+    parser.add_argument('--max-regression', type=float, default=10.0, help='Allowed change in percent')
+    parser.add_argument('--latency-floor-ms', type=float, default=1.0, help='Ignore smaller latency increases')
+    args = parser.parse_args()
+
+    result = run(args.target, args.url, args.concurrency, args.iterations, args.report_every,
+                 args.synthetic, args.seed)
+
+    print(f"Target: {result['target']}, {result['concurrency']} users x {result['iterations']} iterations, "
+          f"{result['elapsed_seconds']:.1f}s")
+    print(f"{'endpoint':26s} {'requests':>8s} {'errors':>6s} {'req/s':>8s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}")
+    for endpoint, m in result['endpoints'].items():
+        print(f"{endpoint:26s} {m['requests']:8d} {m['errors']:6d} {m['throughput_rps']:8.1f} "
+              f"{m['p50_ms']:8.2f} {m['p95_ms']:8.2f} {m['p99_ms']:8.2f}")
+    print(f"{'total':26s} {result['total']['requests']:8d} {result['total']['errors']:6d} "
+          f"{result['total']['throughput_rps']:8.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        failures = compare(result, baseline, args.max_regression, args.latency_floor_ms)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+        print(f"No regressions beyond {args.max_regression:g}% against {args.baseline}")
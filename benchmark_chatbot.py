@@ -0,0 +1,240 @@
+# Microbenchmarks for the chatbot message pipeline.
+#
+#   python benchmark_chatbot.py --output chatbot_bench.json
+#   python benchmark_chatbot.py --baseline chatbot_bench.json --max-regression 15
+#
+# Each stage of get_response is timed in isolation, then both chatbots end to
+# end:
+#
+#   sentiment         polarity with the sentiment cache disabled
+#   sentiment_cached  polarity for a message already in the cache
+#   keywords          matcher.categories(), at lexicon scales x1/x10/x100
+#   screening         check_trauma_factors / check_health_factors
+#   history           ConversationHistory.append + ConversationStats.record
+#   end_to_end        TraumaInformedChatbot / SentimentChatbot.get_response,
+#                     sentiment uncached, at lexicon scales x1/x10/x100
+#
+# over three inputs: short (the sentiment benchmark corpus), long (2,000
+# character messages) and adversarial (2,000 characters of keyword near
+# misses, dense keyword hits, negations, one unbroken word, emoji and mixed
+# case). Scaled lexicons pad every category with synthetic phrases, some
+# sharing prefixes with the real ones.
+#
+# Timings use timeit (best of --repeat, microseconds per call). A fixed
+# pure-Python loop is timed too, and --baseline compares calibrated ratios,
+# so results from the same commit on a faster or slower machine stay
+# comparable; the run exits non-zero when any case slows down by more than
+# --max-regression percent.
+import argparse
+import itertools
+import json
+import platform
+import random
+import string
+import sys
+import timeit
+
+from benchmark_sentiment import CORPUS, synthetic_corpus
+from chatbot import SentimentChatbot
+from conversation_history import ConversationHistory
+from conversation_stats import TRAUMA_SEVERITY, ConversationStats
+from keyword_matcher import get_matcher
+from sentiment_service import SentimentService, sentiment_service
+from trauma_chatbot import TraumaInformedChatbot
+import chatbot
+import trauma_chatbot
+
+LONG_LENGTH = 2000
+SCALES = (1, 10, 100)
+
+
+def short_messages(n=200, seed=42):
+    return CORPUS + synthetic_corpus(n, seed)
+
+
+def long_messages(n=20, seed=42):
+    rng = random.Random(seed)
+    sentences = short_messages()
+    messages = []
+    for _ in range(n):
+        parts = []
+        while sum(len(p) + 2 for p in parts) < LONG_LENGTH:
+            parts.append(rng.choice(sentences))
+        messages.append('. '.join(parts)[:LONG_LENGTH])
+    return messages
+
+
+def adversarial_messages():
+    def fill(unit):
+        return (unit * (LONG_LENGTH // len(unit) + 1))[:LONG_LENGTH]
+
+    return [
+        fill('kil kill my hurt mys want to d end my li unwanted touc flashbac '),  # near misses
+        fill('abuse flashbacks alone suicide nightmares therapy scared '),         # a hit every word
+        fill('not never no '),                                                     # negations
+        fill('a'),                                                                 # one 2k-char word
+        fill('\U0001F622!?... '),                                                  # emoji and punctuation
+        fill('SuIcIdE AsSaUlT LoNeLy '),                                           # mixed case
+    ]
+
+
+INPUTS = {
+    'short': short_messages,
+    'long': long_messages,
+    'adversarial': adversarial_messages,
+}
+
+
+def scaled_lexicons(lexicons, scale, seed=42):
+    """
+    Every category padded to scale x its size with synthetic phrases
+    """
+    if scale == 1:
+        return lexicons
+    rng = random.Random(seed)
+    scaled = {}
+    for category, phrases in lexicons.items():
+        extra = []
+        for i in range(len(phrases) * (scale - 1)):
+            word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+            # Every third phrase extends a real one, so the trie branches deep
+            extra.append(rng.choice(phrases) + word if i % 3 == 0 else word)
+        scaled[category] = list(phrases) + extra
+    return scaled
+
+
+def time_per_call(fn, messages, repeat=5, quick=False):
+    messages = itertools.cycle(messages)
+    timer = timeit.Timer(lambda: fn(next(messages)))
+    number = 20 if quick else timer.autorange()[0]
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+
+def calibration_us(repeat=5):
+    timer = timeit.Timer(lambda: sum(i * i for i in range(1000)))
+    return min(timer.repeat(repeat, 200)) / 200 * 1e6
+
+
+class uncached_sentiment:
+    # The chatbots call the shared module-level service; swap in one with
+    # caching disabled while end-to-end cases run
+    def __init__(self, backend):
+        self.service = SentimentService(backend, cache_size=0)
+
+    def __enter__(self):
+        trauma_chatbot.sentiment_service = chatbot.sentiment_service = self.service
+
+    def __exit__(self, *exc):
+        trauma_chatbot.sentiment_service = chatbot.sentiment_service = sentiment_service
+
+
+def history_append(history, stats):
+    def append(message):
+        history.append({'message': message, 'sentiment': 'negative', 'trauma_indicator': 'ptsd_symptoms'})
+        stats.record('negative', 'ptsd_symptoms')
+    return append
+
+
+def run(backend=None, repeat=5, quick=False, inputs=None, scales=SCALES):
+    """
+    Microseconds per call for every stage/input/scale case
+    """
+    backend = backend or sentiment_service.backend
+    uncached = SentimentService(backend, cache_size=0)
+    cached = SentimentService(backend)
+    trauma_bot = TraumaInformedChatbot()
+    general_bot = SentimentChatbot()
+
+    results = {}
+
+    def measure(name, fn, messages):
+        results[name] = time_per_call(fn, messages, repeat, quick)
+
+    for kind in inputs or INPUTS:
+        messages = INPUTS[kind]()
+        if quick:
+            messages = messages[:5]
+
+        measure(f'sentiment/{kind}', uncached.polarity, messages)
+        cached.analyze_many(messages)
+        measure(f'sentiment_cached/{kind}', cached.polarity, messages)
+
+        for scale in scales:
+            matcher = get_matcher(scaled_lexicons(trauma_bot.matcher.lexicons, scale))
+            measure(f'keywords/{kind}/x{scale}', matcher.categories, messages)
+
+        measure(f'screening_trauma/{kind}',
+                lambda m: trauma_bot.check_trauma_factors(m, trauma_bot.matcher.categories(m)), messages)
+        measure(f'screening_health/{kind}',
+                lambda m: general_bot.check_health_factors(m, general_bot.matcher.categories(m)), messages)
+
+        history = ConversationHistory(fields=('message', 'sentiment', 'trauma_indicator'))
+        measure(f'history/{kind}', history_append(history, ConversationStats(TRAUMA_SEVERITY)), messages)
+
+        with uncached_sentiment(backend):
+            for scale in scales:
+                trauma = TraumaInformedChatbot()
+                trauma.matcher = get_matcher(scaled_lexicons(trauma.matcher.lexicons, scale))
+                measure(f'end_to_end_trauma/{kind}/x{scale}', trauma.get_response, messages)
+                general = SentimentChatbot()
+                general.matcher = get_matcher(scaled_lexicons(general.matcher.lexicons, scale))
+                measure(f'end_to_end_sentiment/{kind}/x{scale}', general.get_response, messages)
+
+    return {
+        'python': platform.python_version(),
+        'sentiment_backend': backend,
+        'calibration_us': calibration_us(repeat),
+        'results': results,
+    }
+
+
+def compare(result, baseline, max_regression=10.0):
+    """
+    Cases slower than the baseline by more than max_regression percent once
+    both runs are scaled by their calibration loop
+    """
+    failures = []
+    speed = baseline['calibration_us'] / result['calibration_us']
+    for name, before in baseline['results'].items():
+        after = result['results'].get(name)
+        if after is None:
+            failures.append(f"{name}: missing from this run")
+            continue
+        change = (after * speed - before) / before * 100
+        if change > max_regression:
+            failures.append(f"{name}: {before:.2f} -> {after * speed:.2f} us calibrated ({change:+.1f}%)")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Microbenchmarks for the chatbot message pipeline')
+    parser.add_argument('--sentiment-backend', default=None, help='textblob or lexicon (default: SENTIMENT_BACKEND)')
+    parser.add_argument('--inputs', nargs='+', choices=list(INPUTS), default=None)
+    parser.add_argument('--scales', type=int, nargs='+', default=list(SCALES), help='Lexicon scale factors')
+    parser.add_argument('--repeat', type=int, default=5, help='timeit repeats (best is kept)')
+    parser.add_argument('--quick', action='store_true', help='Few messages and loops, for smoke tests')
+    parser.add_argument('--output', default=None, help='Write the results as JSON')
+    parser.add_argument('--baseline', default=None, help='Results JSON to compare against')
+    parser.add_argument('--max-regression', type=float, default=10.0, help='Allowed slowdown in percent')
+    args = parser.parse_args()
+
+    result = run(args.sentiment_backend, args.repeat, args.quick, args.inputs, args.scales)
+    print(f"Python {result['python']}, sentiment backend {result['sentiment_backend']}, "
+          f"calibration {result['calibration_us']:.1f} us")
+    for name, us in result['results'].items():
+        print(f"  {name:40s} {us:12.2f} us")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        failures = compare(result, baseline, args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+        print(f"No regressions beyond {args.max_regression:g}% against {args.baseline}")
@@ -0,0 +1,88 @@
+# Load time and memory: processed CSV vs the typed Feather/Parquet dataset.
+#
+#   python benchmark_dataset.py --rows 5000000
+#
+# The processed data is tiled up to --rows, written in each format, and every
+# format is then loaded in a fresh process so peak RSS is measured in
+# isolation (Linux only: it reads /proc/self/status).
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from training_data import DEFAULT_CSV_PATH, write_dataset
+
+LOAD_SNIPPET = """
+import json, sys, time
+import pandas, pyarrow
+from training_data import load_training_data
+
+def status(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) / 1024
+
+# Reset the peak RSS so imports do not count towards it
+with open('/proc/self/clear_refs', 'w') as f:
+    f.write('5')
+baseline = status('VmRSS')
+start = time.perf_counter()
+X, y = load_training_data(sys.argv[1])
+total = float(X['Age'].sum() + X['IMC'].sum() + y.sum())
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds, 'rows': len(X),
+                  'peak_mb': status('VmHWM') - baseline, 'resident_mb': status('VmRSS') - baseline}))
+"""
+
+
+def make_files(directory, rows, source=DEFAULT_CSV_PATH):
+    data = pd.read_csv(source)
+    data = pd.concat([data] * (rows // len(data) + 1), ignore_index=True).iloc[:rows]
+    # Jitter so the tiled copies do not compress or parse unrealistically well
+    rng = np.random.RandomState(0)
+    data['Age'] += rng.normal(0, 0.01, len(data))
+    data['IMC'] += rng.normal(0, 0.01, len(data))
+
+    paths = {
+        'csv': os.path.join(directory, 'data.csv'),
+        'feather': os.path.join(directory, 'data.feather'),
+        'parquet': os.path.join(directory, 'data.parquet'),
+    }
+    data.to_csv(paths['csv'], index=False)
+    write_dataset(data, paths['feather'])
+    write_dataset(data, paths['parquet'])
+    return paths
+
+
+def measure(path):
+    here = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run([sys.executable, '-c', LOAD_SNIPPET, path], cwd=here,
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['file_mb'] = os.path.getsize(path) / 1024 / 1024
+    return result
+
+
+def run(rows):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_files(directory, rows)
+        return {name: measure(path) for name, path in paths.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare training data formats')
+    parser.add_argument('--rows', type=int, default=5000000, help='Rows in the benchmark dataset')
+    args = parser.parse_args()
+
+    results = run(args.rows)
+    csv = results['csv']
+    for name, result in results.items():
+        print(f"{name:8s} file {result['file_mb']:7.1f} MB  load {result['seconds']:6.3f}s "
+              f"({csv['seconds'] / result['seconds']:5.1f}x)  peak +{result['peak_mb']:6.1f} MB  "
+              f"resident +{result['resident_mb']:6.1f} MB")
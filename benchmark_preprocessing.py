@@ -0,0 +1,109 @@
+# Preprocessing benchmark on a large synthetic raw export.
+#
+#   python benchmark_preprocessing.py --rows 10000000
+#
+# Times the chunked load and the vectorized risk labelling on the full file,
+# and the old row-by-row df.apply labelling on a sample (extrapolated, since
+# running it on millions of rows takes minutes). SMOTE is left out: its cost
+# depends on the sampling targets, not on how the file is read.
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from load_real_data import RAW_COLUMNS, assign_risk_levels, load_raw
+
+ETHNICITIES = ['Caucasian', 'African-Brazilian', 'Asian', 'Indigenous']
+MARITAL = ['Single', 'Married', 'Divorced', 'Widowed']
+RELIGIONS = ['Christian', 'None', 'Other']
+EDUCATION = ['High school', 'College', 'Postgraduate']
+
+
+def write_synthetic_raw(path, rows, seed=42, chunk_rows=1000000):
+    # Same layout as real_data.csv: three preamble lines, a header row and a
+    # leading empty column
+    rng = np.random.RandomState(seed)
+    with open(path, 'w', newline='') as f:
+        f.write('PTSD characteristics,,,,,,,\n,,,,,,,\n,,,,,,,\n')
+        f.write(',' + ','.join(RAW_COLUMNS) + '\n')
+        for start in range(0, rows, chunk_rows):
+            n = min(chunk_rows, rows - start)
+            chunk = pd.DataFrame({
+                '': '',
+                'PTSD': rng.randint(0, 2, n),
+                'Age': rng.randint(18, 80, n),
+                'Ethnicity': rng.choice(ETHNICITIES, n),
+                'Marital status': rng.choice(MARITAL, n),
+                'Religion': rng.choice(RELIGIONS, n),
+                'Education': rng.choice(EDUCATION, n),
+                'IMC': np.round(rng.normal(25, 5, n), 1),
+            })
+            chunk.to_csv(f, header=False, index=False)
+
+
+def assign_risk(row):
+    # The original row-by-row labelling
+    score = row['Age'] + row['IMC']
+    if score < 40:
+        return 0
+    elif score < 50:
+        return 1
+    else:
+        return 2
+
+
+def run(path, apply_sample=100000, chunksize=1000000):
+    start = time.perf_counter()
+    df = load_raw(path, chunksize=chunksize)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    labels = assign_risk_levels(df['Age'].to_numpy(), df['IMC'].to_numpy())
+    vectorized_seconds = time.perf_counter() - start
+
+    sample = df.iloc[:apply_sample]
+    start = time.perf_counter()
+    reference = sample.apply(assign_risk, axis=1).to_numpy()
+    apply_seconds = (time.perf_counter() - start) * len(df) / len(sample)
+
+    return {
+        'rows': len(df),
+        'load_seconds': load_seconds,
+        'load_rows_per_second': len(df) / load_seconds,
+        'vectorized_label_seconds': vectorized_seconds,
+        'apply_label_seconds_estimated': apply_seconds,
+        'label_speedup': apply_seconds / vectorized_seconds,
+        'labels_match': bool((reference == labels[:len(sample)]).all()),
+        'frame_mb': df.memory_usage(deep=True).sum() / 1024 / 1024,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark load_real_data preprocessing')
+    parser.add_argument('--rows', type=int, default=10000000, help='Synthetic raw rows')
+    parser.add_argument('--raw', default=None, help='Existing raw CSV to use instead of generating one')
+    parser.add_argument('--chunksize', type=int, default=1000000, help='Rows read at a time')
+    args = parser.parse_args()
+
+    path = args.raw
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), 'synthetic_raw.csv')
+        start = time.perf_counter()
+        write_synthetic_raw(path, args.rows)
+        print(f"Generated {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+    try:
+        result = run(path, chunksize=args.chunksize)
+    finally:
+        if args.raw is None:
+            os.remove(path)
+
+    print(f"Rows: {result['rows']}")
+    print(f"Chunked load: {result['load_seconds']:.1f}s ({result['load_rows_per_second']:.0f} rows/s)")
+    print(f"Labelling, np.select: {result['vectorized_label_seconds']:.3f}s")
+    print(f"Labelling, df.apply (estimated): {result['apply_label_seconds_estimated']:.1f}s")
+    print(f"Labelling speedup: {result['label_speedup']:.0f}x (labels match: {result['labels_match']})")
+    print(f"Cleaned frame: {result['frame_mb']:.0f} MB")
@@ -0,0 +1,69 @@
+# Report rendering benchmark: the original per-call reportlab setup vs
+# report_renderer with and without the finished-PDF cache.
+#
+#   python benchmark_reports.py --reports 200
+import argparse
+import io
+import time
+
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate
+
+from report import build_report_story
+from report_renderer import ReportRenderer
+from trauma_chatbot import build_trauma_report_story
+
+TRAUMA_REPORT = {'risk': 'High', 'trauma_indicators': 3}
+MENTAL_HEALTH_REPORT = {
+    'risk_level': 'High',
+    'indicators': {'Negative sentiment frequency': 3, 'Crisis indicators': 0, 'Total interactions': 5},
+    'medical_factors': {'Sleep Hours': 5, 'Mental Health History': 'yes', 'Blood Sugar Issues': 'no',
+                        'Recent Life Events': 'work stress'},
+    'recommendations': ['Schedule appointment with mental health professional within 1-2 weeks',
+                        'Contact primary care physician', 'Activate support network'],
+}
+
+
+def render_uncached(story):
+    # What every report did before: fresh stylesheet and paragraphs
+    styles = getSampleStyleSheet()
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer).build([Paragraph(text, styles[style]) for text, style in story])
+    return buffer.getvalue()
+
+
+def time_per_report(render, story, n):
+    render(story)
+    start = time.perf_counter()
+    for _ in range(n):
+        render(story)
+    return (time.perf_counter() - start) / n * 1000
+
+
+def run(n=200):
+    results = {}
+    for name, story in (('trauma', build_trauma_report_story(TRAUMA_REPORT)),
+                        ('mental_health', build_report_story(MENTAL_HEALTH_REPORT))):
+        uncached = time_per_report(render_uncached, story, n)
+        layout = time_per_report(ReportRenderer(cache_size=0).render, story, n)
+        cached = time_per_report(ReportRenderer().render, story, n)
+        results[name] = {
+            'uncached_ms': uncached,
+            'layout_cached_ms': layout,
+            'pdf_cached_ms': cached,
+            'layout_speedup': uncached / layout,
+            'pdf_cache_speedup': uncached / cached,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark PDF report rendering')
+    parser.add_argument('--reports', type=int, default=200, help='Reports rendered per configuration')
+    args = parser.parse_args()
+
+    for name, result in run(args.reports).items():
+        print(f"{name}:")
+        print(f"  uncached:        {result['uncached_ms']:.2f} ms/report")
+        print(f"  layout cached:   {result['layout_cached_ms']:.2f} ms/report ({result['layout_speedup']:.1f}x)")
+        print(f"  repeated report: {result['pdf_cached_ms']:.3f} ms/report ({result['pdf_cache_speedup']:.0f}x)")
@@ -0,0 +1,52 @@
+# Throughput benchmark for batch risk scoring.
+#
+#   python benchmark_risk_batch.py --rows 200000
+import argparse
+import json
+import time
+
+import numpy as np
+
+from risk_model import score_records
+
+
+def make_records(n, seed=42):
+    rng = np.random.default_rng(seed)
+    ages = rng.uniform(18, 80, n).round(1)
+    bmis = rng.uniform(15, 45, n).round(1)
+    return [{'age': float(a), 'bmi': float(b)} for a, b in zip(ages, bmis)]
+
+
+def bench_score_records(records, backend=None):
+    start = time.perf_counter()
+    n = 0
+    for result in score_records(records, backend=backend):
+        json.dumps(result)
+        n += 1
+    return n / (time.perf_counter() - start)
+
+
+def bench_endpoint(records):
+    from safe_ai_server import app
+
+    body = '\n'.join(json.dumps(r) for r in records)
+    client = app.test_client()
+    start = time.perf_counter()
+    response = client.post('/api/risk-assessment-batch', data=body,
+                           content_type='application/x-ndjson')
+    n = sum(1 for _ in response.get_data(as_text=True).splitlines())
+    return n / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark batch risk scoring')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--backend', default=None, help='numpy or keras (default: RISK_MODEL_BACKEND)')
+    args = parser.parse_args()
+
+    records = make_records(args.rows)
+    score_records(records[:10], backend=args.backend)  # warm the model cache
+
+    print(f"Rows: {args.rows}")
+    print(f"score_records + json: {bench_score_records(records, args.backend):,.0f} rows/sec")
+    print(f"/api/risk-assessment-batch (NDJSON): {bench_endpoint(records):,.0f} rows/sec")
@@ -0,0 +1,122 @@
+# Agreement and speed benchmark: one risk scorer backend against another.
+#
+#   python benchmark_risk_scorers.py --candidate rule --reference numpy
+#
+# Rows come from the training data plus a regular Age/IMC grid covering the
+# range the screening form accepts, so disagreements away from the training
+# distribution show up too. Agreement is reported on the predicted risk level
+# (what the API returns) and on the probabilities; each backend's accuracy
+# against the training labels and its single-row/batch speed are printed
+# alongside, so operators can judge whether the fast path is good enough.
+import argparse
+import time
+
+import numpy as np
+
+from risk_model import RISK_LABELS, get_scorer, predict_risk
+
+
+def grid_rows(age_range=(10, 90), imc_range=(12, 50), step=0.25):
+    ages = np.arange(age_range[0], age_range[1] + step, step)
+    imcs = np.arange(imc_range[0], imc_range[1] + step, step)
+    age, imc = np.meshgrid(ages, imcs)
+    return np.column_stack([age.ravel(), imc.ravel()])
+
+
+def time_batch(scorer, X, repeats=5):
+    scorer.predict_proba(X[:10])
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        scorer.predict_proba(X)
+        best = min(best, time.perf_counter() - start)
+    return len(X) / best
+
+
+def time_single(backend, rows=2000):
+    predict_risk(25, 22.5, backend=backend)
+    start = time.perf_counter()
+    for age, imc in zip(np.linspace(15, 80, rows).tolist(), np.linspace(15, 45, rows).tolist()):
+        predict_risk(age, imc, backend=backend)
+    return (time.perf_counter() - start) / rows * 1e6
+
+
+def compare(X, reference, candidate):
+    expected = reference.predict_proba(X)
+    actual = candidate.predict_proba(X)
+    expected_levels = expected.argmax(axis=1)
+    actual_levels = actual.argmax(axis=1)
+    diff = np.abs(expected - actual)
+    return {
+        'rows': len(X),
+        'level_agreement': float((expected_levels == actual_levels).mean()),
+        'max_probability_diff': float(diff.max()),
+        'mean_probability_diff': float(diff.mean()),
+        'expected_levels': expected_levels,
+        'actual_levels': actual_levels,
+    }
+
+
+def run(reference_backend='numpy', candidate_backend='rule', data_path=None, grid_step=0.25):
+    from training_data import load_training_data
+
+    reference = get_scorer(reference_backend)
+    candidate = get_scorer(candidate_backend)
+
+    X_data, y = load_training_data(data_path)
+    X_data = X_data.to_numpy(dtype=np.float64)
+    y = y.to_numpy()
+    X_grid = grid_rows(step=grid_step)
+
+    data = compare(X_data, reference, candidate)
+    grid = compare(X_grid, reference, candidate)
+    disagreements = [
+        (float(age), float(imc), RISK_LABELS[expected], RISK_LABELS[actual])
+        for (age, imc), expected, actual in zip(X_grid, grid['expected_levels'], grid['actual_levels'])
+        if expected != actual
+    ]
+
+    return {
+        'reference': reference_backend,
+        'candidate': candidate_backend,
+        'data_rows': data['rows'],
+        'data_level_agreement': data['level_agreement'],
+        'data_max_probability_diff': data['max_probability_diff'],
+        'reference_accuracy': float((data['expected_levels'] == y).mean()),
+        'candidate_accuracy': float((data['actual_levels'] == y).mean()),
+        'grid_rows': grid['rows'],
+        'grid_level_agreement': grid['level_agreement'],
+        'grid_mean_probability_diff': grid['mean_probability_diff'],
+        'reference_rows_per_second': time_batch(reference, X_grid),
+        'candidate_rows_per_second': time_batch(candidate, X_grid),
+        'reference_us_per_call': time_single(reference_backend),
+        'candidate_us_per_call': time_single(candidate_backend),
+        'disagreements': disagreements,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare two risk scorer backends')
+    parser.add_argument('--reference', default='numpy', help='Reference backend (default: numpy MLP)')
+    parser.add_argument('--candidate', default='rule', help='Backend to validate (default: rule)')
+    parser.add_argument('--data', default=None, help='Labelled data (default: SAFE_AI_TRAINING_DATA)')
+    parser.add_argument('--grid-step', type=float, default=0.25, help='Age/IMC grid spacing')
+    parser.add_argument('--show', type=int, default=10, help='Grid disagreements to print')
+    args = parser.parse_args()
+
+    result = run(args.reference, args.candidate, args.data, args.grid_step)
+    reference, candidate = result['reference'], result['candidate']
+    print(f"Training rows: {result['data_rows']}")
+    print(f"  Risk level agreement: {result['data_level_agreement']:.2%}")
+    print(f"  Max probability difference: {result['data_max_probability_diff']:.4f}")
+    print(f"  Accuracy vs labels: {reference} {result['reference_accuracy']:.2%}, "
+          f"{candidate} {result['candidate_accuracy']:.2%}")
+    print(f"Grid rows: {result['grid_rows']}")
+    print(f"  Risk level agreement: {result['grid_level_agreement']:.2%}")
+    print(f"  Mean probability difference: {result['grid_mean_probability_diff']:.4f}")
+    print(f"Batch: {reference} {result['reference_rows_per_second']:,.0f} rows/sec, "
+          f"{candidate} {result['candidate_rows_per_second']:,.0f} rows/sec")
+    print(f"predict_risk: {reference} {result['reference_us_per_call']:.1f} us/call, "
+          f"{candidate} {result['candidate_us_per_call']:.1f} us/call")
+    for age, imc, expected, actual in result['disagreements'][:args.show]:
+        print(f"  age={age:g} imc={imc:g} (sum {age + imc:g}): {reference}={expected} {candidate}={actual}")
@@ -0,0 +1,149 @@
+# Agreement and speed benchmark: lexicon sentiment backend vs TextBlob.
+#
+#   python benchmark_sentiment.py --synthetic 5000
+#
+# Agreement is reported on the raw polarity and on the sentiment buckets both
+# chatbots derive from it, since the buckets are what drive the replies.
+import argparse
+import random
+import time
+
+from textblob import TextBlob
+
+import lexicon_sentiment
+
+CORPUS = [
+    "I'm feeling really sad today",
+    "studies are going well",
+    "I don't know how I feel",
+    "I want to hurt myself",
+    "Things are going great!",
+    "I'm feeling tired all the time",
+    "I have anxiety and take medication",
+    "I feel dizzy and shaky sometimes",
+    "I can't sleep well at night",
+    "I'm feeling really stressed lately",
+    "I'm overwhelmed with everything going on",
+    "Having a hard time dealing with things",
+    "I'm struggling with some difficult situations",
+    "I was assaulted last month",
+    "I keep having nightmares",
+    "I don't feel safe anymore",
+    "I'm having flashbacks",
+    "I feel so alone and nobody understands",
+    "Today was actually a good day :)",
+    "I'm not okay",
+    "This is not bad at all",
+    "I feel terrible and worthless",
+    "I am very very tired of everything",
+    "My therapist is really helpful",
+    "Nothing is working and I hate it!!",
+    "I'm a little better, thanks",
+    "It was horrible. I can't stop thinking about it",
+    "I feel numb most of the time",
+    "I'm proud of myself for getting out of bed",
+    "I never feel happy anymore",
+    "Everything is awful :(",
+    "I'm scared to go outside",
+    "I guess things are fine",
+    "That's wonderful news!",
+    "I feel really, really lost",
+]
+
+TEMPLATES = [
+    "I feel {adv} {adj}",
+    "I'm {neg} {adj} today",
+    "Things have been {adj} and {adj}",
+    "Honestly it's {adv} {adj}!",
+    "{adv} {adj} week, {neg} {adj} at all",
+    "I {neg2} feel {adj} about {noun}",
+]
+ADJECTIVES = ['sad', 'happy', 'good', 'bad', 'terrible', 'great', 'awful', 'fine', 'okay', 'tired',
+              'lonely', 'hopeless', 'better', 'worse', 'scared', 'calm', 'anxious', 'angry', 'safe', 'lost']
+ADVERBS = ['very', 'really', 'so', 'extremely', 'quite', 'a bit', 'pretty', 'totally', 'slightly', 'just']
+NEGATIONS = ['not', 'never', 'no longer', "don't feel", '']
+NOUNS = ['work', 'my family', 'school', 'the future', 'myself', 'my friends']
+
+
+def sentiment_buckets(polarity):
+    # (TraumaInformedChatbot bucket, SentimentChatbot bucket)
+    if polarity < -0.6:
+        trauma = 'severe_distress'
+    elif polarity < -0.3:
+        trauma = 'distressed'
+    elif polarity < -0.1:
+        trauma = 'negative'
+    elif polarity > 0.1:
+        trauma = 'positive'
+    else:
+        trauma = 'neutral'
+
+    if polarity < -0.5:
+        general = 'very_negative'
+    elif polarity < -0.1:
+        general = 'negative'
+    elif polarity > 0.1:
+        general = 'positive'
+    else:
+        general = 'neutral'
+    return trauma, general
+
+
+def synthetic_corpus(n, seed=42):
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(n):
+        messages.append(rng.choice(TEMPLATES).format(
+            adj=rng.choice(ADJECTIVES), adv=rng.choice(ADVERBS),
+            neg=rng.choice(NEGATIONS), neg2=rng.choice(['', 'never', "don't"]),
+            noun=rng.choice(NOUNS)
+        ))
+    return messages
+
+
+def run(messages):
+    lexicon_sentiment.polarity('warm up')
+    TextBlob('warm up').sentiment
+
+    start = time.perf_counter()
+    reference = [TextBlob(m).sentiment.polarity for m in messages]
+    textblob_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = [lexicon_sentiment.polarity(m) for m in messages]
+    lexicon_seconds = time.perf_counter() - start
+
+    n = len(messages)
+    exact = sum(1 for a, b in zip(reference, fast) if abs(a - b) < 1e-9)
+    trauma = sum(1 for a, b in zip(reference, fast) if sentiment_buckets(a)[0] == sentiment_buckets(b)[0])
+    general = sum(1 for a, b in zip(reference, fast) if sentiment_buckets(a)[1] == sentiment_buckets(b)[1])
+    disagreements = [(m, a, b) for m, a, b in zip(messages, reference, fast) if abs(a - b) >= 1e-9]
+
+    return {
+        'messages': n,
+        'polarity_agreement': exact / n,
+        'trauma_bucket_agreement': trauma / n,
+        'sentiment_bucket_agreement': general / n,
+        'textblob_us_per_message': textblob_seconds / n * 1e6,
+        'lexicon_us_per_message': lexicon_seconds / n * 1e6,
+        'speedup': textblob_seconds / lexicon_seconds,
+        'disagreements': disagreements,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare the lexicon sentiment backend with TextBlob')
+    parser.add_argument('--synthetic', type=int, default=5000, help='Synthetic messages added to the corpus')
+    parser.add_argument('--show', type=int, default=10, help='Disagreements to print')
+    args = parser.parse_args()
+
+    result = run(CORPUS + synthetic_corpus(args.synthetic))
+    print(f"Messages: {result['messages']}")
+    print(f"Polarity agreement: {result['polarity_agreement']:.2%}")
+    print(f"Trauma chatbot bucket agreement: {result['trauma_bucket_agreement']:.2%}")
+    print(f"Sentiment chatbot bucket agreement: {result['sentiment_bucket_agreement']:.2%}")
+    print(f"TextBlob: {result['textblob_us_per_message']:.1f} us/message")
+    print(f"Lexicon: {result['lexicon_us_per_message']:.1f} us/message")
+    print(f"Speedup: {result['speedup']:.1f}x")
+    for message, expected, actual in result['disagreements'][:args.show]:
+        print(f"  {message!r}: textblob={expected:.3f} lexicon={actual:.3f}")
@@ -0,0 +1,121 @@
+# Per-worker memory of the risk model weights: private .npz copies vs one
+# memory-mapped flat file shared through the page cache.
+#
+#   python benchmark_shared_weights.py --workers 1 4 16
+#   python benchmark_shared_weights.py --weights mental_health_risk_model_weights.bin
+#
+# The deployed model is only a few KB, far below the interpreter's own
+# footprint, so by default a synthetic model with 2048-wide hidden layers
+# (~33 MB of float32) stands in to make the difference measurable. Every
+# worker is a fresh spawned interpreter (like a non-preloaded Gunicorn
+# worker) that loads the weights, runs a batch through them and then waits
+# until all workers are up before reading /proc/self/smaps_rollup. RSS counts
+# shared pages in full; PSS splits them between the processes mapping them,
+# so summed PSS is the real memory bill.
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from numpy_risk_model import DEFAULT_WEIGHTS_PATH, NumpyRiskModel
+
+
+def memory_kb():
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields
+
+
+def synthetic_model(hidden_units, seed=0):
+    rng = np.random.RandomState(seed)
+    widths = [2] + list(hidden_units) + [3]
+    kernels = [rng.normal(0, 0.05, (a, b)).astype(np.float32) for a, b in zip(widths, widths[1:])]
+    biases = [np.zeros(b, dtype=np.float32) for b in widths[1:]]
+    activations = ['relu'] * len(hidden_units) + ['softmax']
+    return NumpyRiskModel([35.0, 25.0], [10.0, 5.0], kernels, biases, activations)
+
+
+def worker(path, barrier, results):
+    before = memory_kb()
+    start = time.perf_counter()
+    model = NumpyRiskModel.load(path)
+    load_seconds = time.perf_counter() - start
+    # Touch every weight page, as serving does
+    model.predict_proba(np.random.RandomState(0).uniform(15, 60, (256, 2)))
+    barrier.wait()
+    after = memory_kb()
+    results.put({
+        'load_ms': load_seconds * 1000,
+        'rss_kb': after['Rss'],
+        'pss_kb': after['Pss'],
+        'weights_rss_kb': after['Rss'] - before['Rss'],
+        'weights_pss_kb': after['Pss'] - before['Pss'],
+    })
+    barrier.wait()
+
+
+def measure(path, workers):
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(path, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return {
+        'workers': workers,
+        'load_ms': float(np.mean([r['load_ms'] for r in rows])),
+        'rss_mb': float(np.mean([r['rss_kb'] for r in rows])) / 1024,
+        'pss_mb': float(np.mean([r['pss_kb'] for r in rows])) / 1024,
+        'weights_rss_mb': float(np.mean([r['weights_rss_kb'] for r in rows])) / 1024,
+        'weights_pss_mb': float(np.mean([r['weights_pss_kb'] for r in rows])) / 1024,
+        'total_pss_mb': sum(r['pss_kb'] for r in rows) / 1024,
+    }
+
+
+def run(model, worker_counts, directory):
+    npz_path = os.path.join(directory, 'weights.npz')
+    flat_path = os.path.join(directory, 'weights.bin')
+    model.save(npz_path)
+    model.save_flat(flat_path)
+
+    results = []
+    for label, path in (('npz (private)', npz_path), ('flat mmap', flat_path)):
+        for workers in worker_counts:
+            result = measure(path, workers)
+            result['format'] = label
+            results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Per-worker memory of npz vs memory-mapped risk model weights')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--hidden-units', default='2048,2048,2048', help='Synthetic model layer widths')
+    parser.add_argument('--weights', default=None, help=f'Use a real weights file instead, e.g. {DEFAULT_WEIGHTS_PATH}')
+    args = parser.parse_args()
+
+    if args.weights:
+        model = NumpyRiskModel.load(args.weights)
+    else:
+        model = synthetic_model([int(units) for units in args.hidden_units.split(',')])
+    weight_mb = sum(array.nbytes for array in model.arrays().values()) / 1024 / 1024
+    print(f"Weights: {weight_mb:.1f} MB")
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = run(model, args.workers, directory)
+
+    print(f"{'format':14s} {'workers':>7s} {'load ms':>8s} {'RSS MB':>7s} {'PSS MB':>7s} "
+          f"{'weights RSS':>11s} {'weights PSS':>11s} {'total PSS':>9s}")
+    for r in results:
+        print(f"{r['format']:14s} {r['workers']:7d} {r['load_ms']:8.2f} {r['rss_mb']:7.1f} {r['pss_mb']:7.1f} "
+              f"{r['weights_rss_mb']:11.1f} {r['weights_pss_mb']:11.1f} {r['total_pss_mb']:9.1f}")
@@ -0,0 +1,132 @@
+# Size, load time, latency and accuracy of the risk model exports.
+#
+#   python tflite_risk_model.py            # writes the float16 and int8 files
+#   python benchmark_tflite.py
+#
+# Compares the Keras model with the NumPy weights and the float16 / int8
+# TFLite artifacts on the held-out split train_risk_model.py uses. Load time
+# and peak RSS are measured in a fresh interpreter per variant (import +
+# first prediction), which is what a new worker container pays. The TFLite
+# runtime reported is the interpreter that was found; with only full
+# TensorFlow installed it falls back to tf.lite and the RSS reflects that.
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from numpy_risk_model import DEFAULT_WEIGHTS_PATH
+from risk_model import DEFAULT_MODEL_PATH, DEFAULT_SCALER_PATH, get_scorer
+from tflite_risk_model import default_tflite_path
+
+# ru_maxrss would carry over the parent's peak across fork/exec; VmHWM starts
+# fresh with the new process image
+COLD_START = '''
+import sys, time
+start = time.perf_counter()
+import risk_model
+scorer = risk_model.get_scorer(sys.argv[1], tflite_path=sys.argv[2])
+scorer.predict_proba([[25, 22.5]])
+elapsed = time.perf_counter() - start
+with open('/proc/self/status') as f:
+    rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmHWM'))
+print(elapsed, rss_kb, getattr(scorer, 'runtime', ''))
+'''
+
+
+def variants():
+    return [
+        ('keras', 'keras', None, [DEFAULT_MODEL_PATH, DEFAULT_SCALER_PATH]),
+        ('numpy', 'numpy', None, [DEFAULT_WEIGHTS_PATH]),
+        ('tflite float16', 'tflite', default_tflite_path('float16'), [default_tflite_path('float16')]),
+        ('tflite int8', 'tflite', default_tflite_path('int8'), [default_tflite_path('int8')]),
+    ]
+
+
+def held_out_split(data_path=None, seed=42):
+    from sklearn.model_selection import train_test_split
+
+    from training_data import load_training_data
+
+    X, y = load_training_data(data_path)
+    # Same call as train_risk_model.split_dataset, on the unscaled rows
+    _, X_test, _, y_test = train_test_split(X.to_numpy(dtype=np.float64), y.to_numpy(),
+                                            test_size=0.2, random_state=seed, stratify=y)
+    return X_test, y_test
+
+
+def cold_start(backend, tflite_path):
+    output = subprocess.check_output(
+        [sys.executable, '-c', COLD_START, backend, tflite_path or default_tflite_path('int8')],
+        text=True, stderr=subprocess.DEVNULL, env=dict(os.environ, TF_CPP_MIN_LOG_LEVEL='3')
+    )
+    seconds, rss_kb, runtime = (output.strip().splitlines()[-1].split(' ') + [''])[:3]
+    return float(seconds), int(rss_kb) / 1024, runtime
+
+
+def time_rows(scorer, X, repeats=3):
+    rows = X[:200]
+    scorer.predict_proba(rows[:1])
+    start = time.perf_counter()
+    for row in rows:
+        scorer.predict_proba(row.reshape(1, -1))
+    single_us = (time.perf_counter() - start) / len(rows) * 1e6
+
+    scorer.predict_proba(X)
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        scorer.predict_proba(X)
+        best = min(best, time.perf_counter() - start)
+    return single_us, len(X) / best
+
+
+def run(data_path=None, cold=True):
+    X_test, y_test = held_out_split(data_path)
+    reference_levels = None
+    reference_accuracy = None
+    results = []
+    for name, backend, tflite_path, files in variants():
+        if not all(os.path.exists(path) for path in files):
+            results.append({'name': name, 'error': 'artifact missing'})
+            continue
+        scorer = get_scorer(backend, tflite_path=tflite_path or default_tflite_path('int8'))
+        levels = scorer.predict_proba(X_test).argmax(axis=1)
+        accuracy = float((levels == y_test).mean())
+        if reference_levels is None:
+            reference_levels, reference_accuracy = levels, accuracy
+        single_us, rows_per_second = time_rows(scorer, X_test)
+        result = {
+            'name': name,
+            'artifact_bytes': sum(os.path.getsize(path) for path in files),
+            'accuracy': accuracy,
+            'accuracy_delta': accuracy - reference_accuracy,
+            'agreement': float((levels == reference_levels).mean()),
+            'single_row_us': single_us,
+            'rows_per_second': rows_per_second,
+        }
+        if cold:
+            result['load_seconds'], result['peak_rss_mb'], result['runtime'] = cold_start(backend, tflite_path)
+        results.append(result)
+    return len(X_test), results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare the Keras, NumPy and TFLite risk model artifacts')
+    parser.add_argument('--data', default=None, help='Labelled data (default: SAFE_AI_TRAINING_DATA)')
+    parser.add_argument('--no-cold-start', action='store_true', help='Skip the fresh-process load measurement')
+    args = parser.parse_args()
+
+    rows, results = run(args.data, cold=not args.no_cold_start)
+    print(f"Held-out rows: {rows} (deltas against keras)")
+    print(f"{'variant':16s} {'bytes':>9s} {'load s':>7s} {'rss MB':>7s} {'us/row':>7s} {'rows/s':>11s} "
+          f"{'acc':>7s} {'delta':>7s} {'agree':>7s}  runtime")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['name']:16s} {r['error']}")
+            continue
+        print(f"{r['name']:16s} {r['artifact_bytes']:9,d} {r.get('load_seconds', 0):7.2f} {r.get('peak_rss_mb', 0):7.0f} "
+              f"{r['single_row_us']:7.1f} {r['rows_per_second']:11,.0f} {r['accuracy']:7.2%} "
+              f"{r['accuracy_delta']:+7.2%} {r['agreement']:7.2%}  {r.get('runtime', '')}")
@@ -0,0 +1,115 @@
+# Overhead of the opt-in request tracing.
+#
+#   python benchmark_tracing.py --rounds 10 --requests 200
+#
+# Replays the same chat / risk-assessment / conversation-stats mix through
+# the Flask test client, sending every request twice, once with tracing off
+# and once on, alternating which goes first. Pairing each request with
+# itself keeps drift on the machine (easily +-10% between whole runs on a
+# shared VM) out of the comparison. Reports the median microseconds per
+# request each way and the median paired difference as the overhead of
+# tracing in percent. The cost of a single span() with tracing off and on is
+# timed as well.
+import argparse
+import statistics
+import sys
+import time
+import timeit
+
+from benchmark_sentiment import synthetic_corpus
+from request_tracing import Tracer, tracer
+from safe_ai_server import app
+
+
+def request_mix(messages):
+    requests = []
+    for i, message in enumerate(messages):
+        requests.append(('POST', '/api/chat', {'message': message}))
+        if i % 2 == 0:
+            requests.append(('POST', '/api/risk-assessment', {'age': 20 + i % 50, 'bmi': 18 + i % 20}))
+        if i % 4 == 0:
+            requests.append(('GET', '/api/conversation-stats', None))
+    return requests
+
+
+def send(client, method, path, body):
+    start = time.perf_counter()
+    response = client.open(path, method=method, json=body)
+    elapsed = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f"{method} {path} returned {response.status_code}")
+    return elapsed * 1e6
+
+
+def replay(client, requests, timings):
+    """
+    Send each request with tracing off and on; appends microseconds to
+    timings[False] and timings[True]
+    """
+    for i, (method, path, body) in enumerate(requests):
+        for enabled in ((False, True) if i % 2 == 0 else (True, False)):
+            tracer.enabled = enabled
+            timings[enabled].append(send(client, method, path, body))
+
+
+def span_cost_ns(enabled, number=200000):
+    local = Tracer(enabled=enabled)
+
+    def one():
+        with local.span('bench'):
+            pass
+    return min(timeit.repeat(one, number=number, repeat=3)) / number * 1e9
+
+
+def run(rounds=10, n_requests=200, seed=42):
+    """
+    Median microseconds per request with tracing off and on
+    """
+    requests = request_mix(synthetic_corpus(n_requests, seed))
+    client = app.test_client()
+    was_enabled = tracer.enabled
+    timings = {False: [], True: []}
+    try:
+        # Warm-up: model load, sentiment backend, lexicons
+        replay(client, requests[:20], {False: [], True: []})
+        for _ in range(rounds):
+            client.post('/api/clear-conversation')
+            replay(client, requests, timings)
+    finally:
+        tracer.enabled = was_enabled
+        tracer.reset()
+
+    off = statistics.median(timings[False])
+    on = statistics.median(timings[True])
+    paired = statistics.median(t_on - t_off for t_off, t_on in zip(timings[False], timings[True]))
+    return {
+        'requests_per_round': len(requests),
+        'rounds': rounds,
+        'off_us': off,
+        'on_us': on,
+        'overhead_us': paired,
+        'overhead_pct': paired / off * 100,
+        'span_off_ns': span_cost_ns(False),
+        'span_on_ns': span_cost_ns(True),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Overhead of request tracing')
+    parser.add_argument('--rounds', type=int, default=10, help='Passes over the request mix')
+    parser.add_argument('--requests', type=int, default=200, help='Chat messages per round')
+    parser.add_argument('--max-overhead', type=float, default=None,
+                        help='Exit non-zero when tracing costs more than this many percent')
+    args = parser.parse_args()
+
+    result = run(args.rounds, args.requests)
+    print(f"{result['requests_per_round']} requests x {result['rounds']} rounds")
+    print(f"  tracing off   {result['off_us']:10.1f} us/request")
+    print(f"  tracing on    {result['on_us']:10.1f} us/request")
+    print(f"  overhead      {result['overhead_us']:10.1f} us/request ({result['overhead_pct']:+.2f}%)")
+    print(f"  span() off    {result['span_off_ns']:10.0f} ns")
+    print(f"  span() on     {result['span_on_ns']:10.0f} ns")
+
+    if args.max_overhead is not None and result['overhead_pct'] > args.max_overhead:
+        print(f"Tracing overhead above {args.max_overhead:g}%")
+        sys.exit(1)
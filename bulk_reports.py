@@ -0,0 +1,337 @@
+# Bulk mental health reports for archived conversations.
+#
+#   python bulk_reports.py conversations.jsonl --output reports/
+#   python bulk_reports.py archive.db --output reports.zip --workers 8
+#
+# Each archived conversation is one JSON record:
+#
+#   {"id": "abc123",
+#    "messages": ["I can't sleep", "I feel really stressed lately"],
+#    "health_factors": {"sleep_hours": 4}}
+#
+# "messages" are replayed through the chatbot to recover sentiments; a stored
+# "history" ([{"message": ..., "sentiment": ...}]) is used as-is instead.
+# SQLite archives are read with --sql, which must return (id, JSON record)
+# rows. PDFs are rendered across a process pool and written to a directory or
+# a zip file. Finished ids go to a checkpoint file, so an interrupted run
+# picks up where it stopped when started again with the same arguments.
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from app import MentalHealthApp, conversation_report_data
+from conversation_stats import SENTIMENT_SEVERITY, ConversationStats
+from report import render_report
+
+DEFAULT_SQL = 'SELECT id, data FROM conversations'
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            yield str(record.get('id', line_number)), record
+
+
+def read_sqlite(path, sql=DEFAULT_SQL):
+    conn = sqlite3.connect(path)
+    try:
+        for conversation_id, data in conn.execute(sql):
+            yield str(conversation_id), json.loads(data)
+    finally:
+        conn.close()
+
+
+def read_archive(path, sql=DEFAULT_SQL):
+    if path.endswith(('.db', '.sqlite', '.sqlite3')):
+        return read_sqlite(path, sql)
+    return read_jsonl(path)
+
+
+def user_messages(messages):
+    for message in messages:
+        if isinstance(message, str):
+            yield message
+        elif message.get('role', 'user') == 'user':
+            yield message.get('message', message.get('content', ''))
+
+
+def record_report_data(record):
+    app = MentalHealthApp()
+    health_factors = app.chatbot.health_factors
+    if 'history' in record:
+        stats = ConversationStats.from_history(record['history'], SENTIMENT_SEVERITY)
+    else:
+        for message in user_messages(record.get('messages', [])):
+            app.chat(message)
+        stats = app.chatbot.stats
+    health_factors.update(record.get('health_factors') or {})
+
+    if not stats.total_messages:
+        raise ValueError('Conversation has no messages')
+    return conversation_report_data(stats, health_factors)
+
+
+def render_conversations(items):
+    """
+    Render a chunk of (id, record) pairs in a worker; returns
+    (id, pdf bytes or None, render seconds, error or None) for each
+    """
+    results = []
+    for conversation_id, record in items:
+        start = time.perf_counter()
+        try:
+            pdf = render_report(record_report_data(record))
+            results.append((conversation_id, pdf, time.perf_counter() - start, None))
+        except Exception as e:
+            results.append((conversation_id, None, time.perf_counter() - start, str(e)))
+    return results
+
+
+def report_filename(conversation_id):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', conversation_id) + '.pdf'
+
+
+class DirectoryOutput:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, conversation_id, pdf):
+        path = os.path.join(self.path, report_filename(conversation_id))
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(pdf)
+        os.replace(tmp_path, path)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class ZipOutput:
+    # Reports are held until commit(), which appends them to the zip in
+    # place. Appending writes over the old central directory, so before it
+    # starts, that directory and its offset are saved to a journal file. If
+    # the run is killed mid-commit, the next ZipOutput truncates the zip back
+    # to the offset and restores the directory, leaving the archive as of
+    # the last finished commit. Each commit therefore writes only the new
+    # PDFs and the directory, not a copy of the whole archive.
+    def __init__(self, path):
+        self.path = path
+        self._journal_path = path + '.journal'
+        self._pending = []
+        self._recover()
+
+    def _recover(self):
+        if not os.path.exists(self._journal_path):
+            return
+        with open(self._journal_path, 'rb') as f:
+            offset = int.from_bytes(f.read(8), 'little')
+            directory = f.read()
+        with open(self.path, 'r+b') as f:
+            f.truncate(offset)
+            f.seek(offset)
+            f.write(directory)
+            f.flush()
+            os.fsync(f.fileno())
+        os.remove(self._journal_path)
+
+    def write(self, conversation_id, pdf):
+        self._pending.append((report_filename(conversation_id), pdf))
+
+    def commit(self):
+        if not self._pending:
+            return
+        if not os.path.exists(self.path):
+            zipfile.ZipFile(self.path, 'w').close()
+        # start_dir is where the central directory begins and where 'a'
+        # mode starts writing new entries
+        with zipfile.ZipFile(self.path) as archive:
+            offset = archive.start_dir
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            directory = f.read()
+        tmp_path = self._journal_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(offset.to_bytes(8, 'little') + directory)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._journal_path)
+
+        with zipfile.ZipFile(self.path, 'a') as archive:
+            for name, pdf in self._pending:
+                # PDF streams are already compressed
+                archive.writestr(name, pdf, compress_type=zipfile.ZIP_STORED)
+        with open(self.path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.remove(self._journal_path)
+        self._pending = []
+
+    def close(self):
+        pass
+
+
+class Checkpoint:
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.done = {line.rstrip('\n') for line in f if line.strip()}
+        self._pending = []
+
+    def add(self, conversation_id):
+        self._pending.append(conversation_id)
+
+    def commit(self):
+        if not self._pending:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(conversation_id + '\n' for conversation_id in self._pending))
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update(self._pending)
+        self._pending = []
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def run_bulk(archive, output, workers=None, checkpoint_path=None, chunk_size=16, sql=DEFAULT_SQL,
+             commit_every=256, progress_interval=5.0, log=None):
+    """
+    Render a report for every conversation in the archive; returns a
+    throughput summary. workers=0 renders in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if checkpoint_path is None:
+        checkpoint_path = output.rstrip('/\\') + '.checkpoint'
+
+    writer = ZipOutput(output) if output.endswith('.zip') else DirectoryOutput(output)
+    checkpoint = Checkpoint(checkpoint_path)
+
+    written = failed = skipped = uncommitted = 0
+    render_seconds = []
+    errors = []
+    start = last_progress = time.perf_counter()
+
+    def pending_conversations():
+        nonlocal skipped
+        for conversation_id, record in read_archive(archive, sql):
+            if conversation_id in checkpoint.done:
+                skipped += 1
+                continue
+            yield conversation_id, record
+
+    def handle(results):
+        nonlocal written, failed, uncommitted, last_progress
+        for conversation_id, pdf, seconds, error in results:
+            render_seconds.append(seconds)
+            if error is None:
+                writer.write(conversation_id, pdf)
+                checkpoint.add(conversation_id)
+                written += 1
+                uncommitted += 1
+            else:
+                errors.append((conversation_id, error))
+                failed += 1
+
+        if uncommitted >= commit_every:
+            writer.commit()
+            checkpoint.commit()
+            uncommitted = 0
+
+        now = time.perf_counter()
+        if log and now - last_progress >= progress_interval:
+            last_progress = now
+            log(f"{written} written, {failed} failed, {skipped} skipped, "
+                f"{written / (now - start):.1f} reports/sec")
+
+    try:
+        chunks = chunked(pending_conversations(), chunk_size)
+        if workers == 0:
+            for chunk in chunks:
+                handle(render_conversations(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Keep a few chunks per worker in flight so the archive is
+                # streamed instead of loaded up front
+                in_flight = set()
+                for chunk in chunks:
+                    in_flight.add(pool.submit(render_conversations, chunk))
+                    if len(in_flight) >= workers * 2:
+                        finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            handle(future.result())
+                for future in in_flight:
+                    handle(future.result())
+    finally:
+        writer.commit()
+        checkpoint.commit()
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'written': written,
+        'failed': failed,
+        'skipped': skipped,
+        'elapsed_seconds': elapsed,
+        'reports_per_second': written / elapsed if elapsed else 0.0,
+        'p50_render_ms': percentile(render_seconds, 50) * 1000,
+        'p95_render_ms': percentile(render_seconds, 95) * 1000,
+        'errors': errors,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate reports for archived conversations')
+    parser.add_argument('archive', help='JSONL file or SQLite database of conversations')
+    parser.add_argument('--output', required=True, help='Output directory, or a .zip file')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count, 0 = inline)')
+    parser.add_argument('--checkpoint', default=None, help='Checkpoint file (default: <output>.checkpoint)')
+    parser.add_argument('--chunk-size', type=int, default=16, help='Conversations sent to a worker at a time')
+    parser.add_argument('--sql', default=DEFAULT_SQL, help='Query returning (id, JSON record) rows for SQLite archives')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help='Seconds between progress lines')
+    args = parser.parse_args()
+
+    summary = run_bulk(
+        args.archive, args.output, workers=args.workers, checkpoint_path=args.checkpoint,
+        chunk_size=args.chunk_size, sql=args.sql, progress_interval=args.progress_interval,
+        log=lambda line: print(line, file=sys.stderr)
+    )
+    print(f"Reports written: {summary['written']}")
+    print(f"Failed: {summary['failed']}")
+    print(f"Skipped (already done): {summary['skipped']}")
+    print(f"Elapsed: {summary['elapsed_seconds']:.1f}s")
+    print(f"Throughput: {summary['reports_per_second']:.1f} reports/sec")
+    print(f"Render time: p50 {summary['p50_render_ms']:.1f} ms, p95 {summary['p95_render_ms']:.1f} ms")
+    for conversation_id, error in summary['errors'][:10]:
+        print(f"  {conversation_id}: {error}")
@@ -0,0 +1,127 @@
+# Compact, bounded conversation history.
+#
+# Turns are stored as parallel arrays: the message text plus one byte each for
+# the sentiment and trauma indicator labels, instead of a dict per message.
+# Only the most recent max_in_memory turns stay in memory. By default older
+# turns are dropped, with a warning logged per conversation; the report
+# totals live in ConversationStats and are unaffected. Spilling is opt-in:
+# with a spill_dir, older turns are appended to a JSON lines log there
+# instead. The logs hold users' messages in plain text, so only owners that
+# call discard() when the conversation ends should set one; the server does,
+# when a session is cleared, evicted or expires.
+#
+# The tail length comes from SAFE_AI_HISTORY_TAIL (default 100 turns).
+import json
+import logging
+import os
+import secrets
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# Every label the chatbots record; the index is the stored code
+LABELS = (
+    None, 'positive', 'neutral', 'negative', 'very_negative', 'distressed', 'severe_distress',
+    'crisis', 'trauma_disclosure', 'ptsd_symptoms',
+)
+CODES = {label: code for code, label in enumerate(LABELS)}
+
+DEFAULT_TAIL = int(os.environ.get('SAFE_AI_HISTORY_TAIL', 100))
+
+
+class ConversationHistory:
+    def __init__(self, fields=('message', 'sentiment'), max_in_memory=None, spill_dir=None):
+        """
+        fields are the keys of each entry: 'message', 'sentiment' and
+        optionally 'trauma_indicator'
+        """
+        self.fields = tuple(fields)
+        self.max_in_memory = DEFAULT_TAIL if max_in_memory is None else max_in_memory
+        self.spill_dir = spill_dir or ''
+        self.spill_path = None
+        self.spilled = 0
+        self._messages = []
+        self._sentiments = array('B')
+        self._indicators = array('B')
+
+    def append(self, entry):
+        try:
+            sentiment = CODES[entry['sentiment']]
+            indicator = CODES[entry.get('trauma_indicator')]
+        except KeyError as e:
+            raise ValueError(f"Unknown label {e.args[0]!r}")
+        self._messages.append(entry['message'])
+        self._sentiments.append(sentiment)
+        self._indicators.append(indicator)
+        if self.max_in_memory and len(self._messages) > self.max_in_memory:
+            self._spill()
+
+    def _entry(self, i):
+        entry = {'message': self._messages[i], 'sentiment': LABELS[self._sentiments[i]]}
+        if 'trauma_indicator' in self.fields:
+            entry['trauma_indicator'] = LABELS[self._indicators[i]]
+        return entry
+
+    def _spill(self):
+        # Move the oldest half of the tail out at once so appends stay cheap
+        count = len(self._messages) - self.max_in_memory // 2
+        if self.spill_dir:
+            if self.spill_path is None:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                self.spill_path = os.path.join(self.spill_dir, secrets.token_hex(16) + '.jsonl')
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(self._entry(i)) + '\n' for i in range(count)))
+        elif not self.spilled:
+            logger.warning('No spill_dir set; dropping conversation turns beyond the last %d', self.max_in_memory)
+        del self._messages[:count]
+        del self._sentiments[:count]
+        del self._indicators[:count]
+        self.spilled += count
+
+    def tail(self):
+        """
+        The turns still held in memory, oldest first
+        """
+        return [self._entry(i) for i in range(len(self._messages))]
+
+    def __iter__(self):
+        # Spilled turns are read back from the log; dropped turns are gone
+        if self.spill_path and os.path.exists(self.spill_path):
+            with open(self.spill_path, encoding='utf-8') as f:
+                for line in f:
+                    yield json.loads(line)
+        for i in range(len(self._messages)):
+            yield self._entry(i)
+
+    def __len__(self):
+        return self.spilled + len(self._messages)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, index):
+        # Indexes count from the start of the conversation; only turns in
+        # memory can be looked up
+        if index < 0:
+            index += len(self)
+        offset = index - self.spilled
+        if not 0 <= offset < len(self._messages):
+            raise IndexError('conversation history index out of range')
+        return self._entry(offset)
+
+    def memory_size(self):
+        """
+        Approximate bytes held for the in-memory turns
+        """
+        return sum(len(message) for message in self._messages) + 10 * len(self._messages)
+
+    def discard(self):
+        """
+        Delete the spill log, e.g. when the session is cleared or evicted
+        """
+        if self.spill_path:
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+            self.spill_path = None
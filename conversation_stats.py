@@ -0,0 +1,72 @@
+# Running totals for a conversation.
+#
+# The chatbots update these as each message is added to the history, so
+# statistics and risk levels are read off the counters instead of walking the
+# whole history on every report, stats request or Streamlit rerun.
+
+# Sentiment -> severity rank, one scale per chatbot
+TRAUMA_SEVERITY = {
+    'positive': 0,
+    'neutral': 0,
+    'negative': 1,
+    'distressed': 2,
+    'severe_distress': 3,
+    'crisis': 4,
+}
+
+SENTIMENT_SEVERITY = {
+    'positive': 0,
+    'neutral': 0,
+    'negative': 1,
+    'very_negative': 2,
+    'crisis': 3,
+}
+
+
+class ConversationStats:
+    def __init__(self, severity):
+        self.severity = severity
+        self.total_messages = 0
+        self.sentiment_counts = {}
+        self.trauma_indicators = 0
+        self.crisis_count = 0
+        self.max_severity = None
+
+    @classmethod
+    def from_history(cls, history, severity):
+        """
+        Counters for a stored history of {'sentiment', 'trauma_indicator'} entries
+        """
+        stats = cls(severity)
+        for entry in history:
+            stats.record(entry['sentiment'], entry.get('trauma_indicator'))
+        return stats
+
+    def record(self, sentiment, trauma_indicator=None):
+        self.total_messages += 1
+        self.sentiment_counts[sentiment] = self.sentiment_counts.get(sentiment, 0) + 1
+        if trauma_indicator is not None:
+            self.trauma_indicators += 1
+        if sentiment == 'crisis':
+            self.crisis_count += 1
+        if self.max_severity is None or self.severity.get(sentiment, 0) > self.severity.get(self.max_severity, 0):
+            self.max_severity = sentiment
+
+    def count(self, *sentiments):
+        return sum(self.sentiment_counts.get(sentiment, 0) for sentiment in sentiments)
+
+    def at_least(self, sentiment):
+        """
+        True once any message was as severe as sentiment
+        """
+        if self.max_severity is None:
+            return False
+        return self.severity.get(self.max_severity, 0) >= self.severity[sentiment]
+
+    def to_dict(self):
+        return {
+            'total_messages': self.total_messages,
+            'trauma_indicators': self.trauma_indicators,
+            'crisis_indicators': self.crisis_count,
+            'sentiment_breakdown': dict(self.sentiment_counts),
+        }
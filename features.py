@@ -0,0 +1,6 @@
+# Model input and label columns.
+#
+# Shared by data preparation, training and inference; kept in its own module
+# so the data tools do not import the scoring backends to get them.
+FEATURE_COLUMNS = ['Age', 'IMC']
+TARGET_COLUMN = 'risk_level'
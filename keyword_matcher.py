@@ -0,0 +1,102 @@
+# Single-pass keyword matching for the chatbot lexicons.
+#
+# All categories (crisis, trauma, PTSD, screening topics, ...) are compiled
+# into one regular expression built from a character trie of the phrases, so
+# a message is scanned once and the cost per character does not grow with the
+# number of phrases. Phrases match case-insensitively at the start of a word:
+# 'abuse' still matches 'abused' and 'flashback' matches 'flashbacks', but
+# 'rape' no longer fires inside 'therapist'.
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from request_tracing import span
+
+KeywordHit = namedtuple('KeywordHit', ['category', 'phrase', 'start', 'end'])
+
+
+def _trie_regex(phrases):
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[''] = None
+
+    def build(node):
+        terminal = '' in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != '']
+        if not branches:
+            return ''
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        # Greedy '?' keeps the longest phrase when a shorter one ends here too
+        return group + '?' if terminal else group
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    def __init__(self, lexicons):
+        """
+        lexicons maps a category name to the phrases that signal it
+        """
+        self.lexicons = {category: tuple(phrases) for category, phrases in lexicons.items()}
+
+        self._categories = {}
+        for category, phrases in self.lexicons.items():
+            for phrase in phrases:
+                phrase = phrase.lower()
+                if category not in self._categories.setdefault(phrase, ()):
+                    self._categories[phrase] += (category,)
+
+        # The regex reports the longest phrase at each position; shorter
+        # phrases that are prefixes of it matched there as well
+        phrases = sorted(self._categories)
+        self._implied = {
+            phrase: tuple(phrase[:i] for i in range(1, len(phrase)) if phrase[:i] in self._categories)
+            for phrase in phrases
+        }
+
+        if phrases:
+            self._pattern = re.compile(r'\b(?=(' + _trie_regex(phrases) + '))', re.IGNORECASE)
+        else:
+            self._pattern = None
+
+    def scan(self, message):
+        """
+        Return every (category, phrase, start, end) hit in the message
+        """
+        hits = []
+        if self._pattern is None or not message:
+            return hits
+        with span('keywords'):
+            for match in self._pattern.finditer(message):
+                start = match.start(1)
+                longest = match.group(1).lower()
+                for phrase in (longest,) + self._implied[longest]:
+                    for category in self._categories[phrase]:
+                        hits.append(KeywordHit(category, phrase, start, start + len(phrase)))
+        return hits
+
+    def categories(self, message):
+        return {hit.category for hit in self.scan(message)}
+
+    def __reduce__(self):
+        # Pickled sessions carry the word lists only; unpickling reuses the
+        # compiled matcher for them
+        return (get_matcher, (self.lexicons,))
+
+
+@lru_cache(maxsize=32)
+def _compile(frozen_lexicons):
+    return KeywordMatcher(dict(frozen_lexicons))
+
+
+def get_matcher(lexicons):
+    """
+    Shared compiled matcher for a set of lexicons; chatbots created with the
+    same word lists reuse one compiled pattern
+    """
+    return _compile(tuple((category, tuple(phrases)) for category, phrases in lexicons.items()))
@@ -0,0 +1,148 @@
+# Fast polarity scoring from TextBlob's sentiment lexicon.
+#
+# TextBlob's default analyzer tokenizes with a general-purpose tokenizer and
+# walks the lexicon through several layers of dict lookups per word. Here the
+# en-sentiment.xml lexicon is compiled once into a flat dict of
+# word -> (polarity, subjectivity, intensity, is_modifier) and messages are
+# split with a single regex. The scoring rules (modifiers, negation,
+# exclamation marks, emoticons) follow TextBlob's pattern analyzer, so scores
+# agree on almost all chatbot messages; see benchmark_sentiment.py.
+#
+# Select it with SENTIMENT_BACKEND=lexicon.
+import os
+import re
+import threading
+from xml.etree import ElementTree
+
+NEGATIONS = ('no', 'not', "n't", 'never')
+
+_lexicon = None
+_emoticons = None
+_lock = threading.Lock()
+
+_TOKEN_RE = None
+
+
+def _lexicon_path():
+    import textblob
+    return os.path.join(os.path.dirname(textblob.__file__), 'en', 'en-sentiment.xml')
+
+
+def compile_lexicon(path=None):
+    """
+    Parse en-sentiment.xml into {word: (polarity, subjectivity, intensity, is_modifier)},
+    averaging word senses and deriving '-ly' adverbs the same way TextBlob does
+    """
+    senses = {}
+    for node in ElementTree.parse(path or _lexicon_path()).getroot().findall('word'):
+        word = node.attrib.get('form')
+        if not word:
+            continue
+        psi = (float(node.attrib.get('polarity', 0.0)),
+               float(node.attrib.get('subjectivity', 0.0)),
+               float(node.attrib.get('intensity', 1.0)))
+        senses.setdefault(word, {}).setdefault(node.attrib.get('pos'), []).append(psi)
+
+    lexicon = {}
+    adjectives = []
+    for word, by_pos in senses.items():
+        # Average senses per part of speech, then across parts of speech
+        per_pos = {pos: tuple(sum(v) / len(v) for v in zip(*psi)) for pos, psi in by_pos.items()}
+        p, s, i = [sum(v) / len(v) for v in zip(*per_pos.values())]
+        lexicon[word] = (p, s, i, 'RB' in per_pos)
+        if 'JJ' in per_pos:
+            adjectives.append((word, per_pos['JJ']))
+
+    # TextBlob maps each adjective onto its adverb ("terrible" -> "terribly"),
+    # overriding any scores the adverb had of its own
+    for word, (p, s, i) in adjectives:
+        if word.endswith('y'):
+            word = word[:-1] + 'i'
+        if word.endswith('le'):
+            word = word[:-2]
+        lexicon[word + 'ly'] = (p, s, i, True)
+    return lexicon
+
+
+def _compile_emoticons():
+    from textblob._text import EMOTICONS
+    emoticons = {}
+    for (_, polarity), faces in EMOTICONS.items():
+        for face in faces:
+            emoticons.setdefault(face.lower(), polarity)
+    return emoticons
+
+
+def _load():
+    global _lexicon, _emoticons, _TOKEN_RE
+    with _lock:
+        if _lexicon is None:
+            _emoticons = _compile_emoticons()
+            faces = sorted(_emoticons, key=len, reverse=True)
+            # Like TextBlob: punctuation and apostrophes split off as tokens of
+            # their own ("don't" -> do n ' t), hyphenated words kept whole
+            _TOKEN_RE = re.compile(
+                r"\( ?! ?\)|(?:" + '|'.join(re.escape(face) for face in faces) +
+                r")(?=\s|$)|\w+(?:[-.]\w+)*|[^\w\s]"
+            )
+            _lexicon = compile_lexicon()
+    return _lexicon
+
+
+def tokenize(text):
+    if _lexicon is None:
+        _load()
+    return _TOKEN_RE.findall(text.lower())
+
+
+def polarity(text):
+    lexicon = _lexicon if _lexicon is not None else _load()
+    emoticons = _emoticons
+
+    # Each assessment is [polarity, subjectivity, intensity, negated]
+    assessments = []
+    modifier = None
+    negation = None
+    for w in tokenize(text):
+        entry = lexicon.get(w)
+        if entry is not None:
+            p, s, i, is_modifier = entry
+            if modifier is None:
+                assessments.append([p, s, i, False])
+            else:
+                # "really good": scale by the modifier's intensity
+                last = assessments[-1]
+                last[0] = max(-1.0, min(p * last[2], 1.0))
+                last[1] = max(-1.0, min(s * last[2], 1.0))
+                last[2] = i
+            if negation is not None:
+                last = assessments[-1]
+                last[2] = 1.0 / last[2]
+                last[3] = True
+            modifier = w if is_modifier else None
+            negation = w if w in NEGATIONS else None
+            continue
+
+        if w in NEGATIONS:
+            negation = w
+        elif negation and len(w.strip("'")) > 1:
+            # Negation carries across small words only ("not a good")
+            negation = None
+        if negation is not None and modifier is not None and modifier.endswith('ly'):
+            # "really not good"
+            assessments[-1][3] = True
+            negation = None
+        elif modifier and len(w) > 2:
+            modifier = None
+        if w == '!' and assessments:
+            assessments[-1][0] = max(-1.0, min(assessments[-1][0] * 1.25, 1.0))
+        elif w.startswith('(') and w.endswith(')') and '!' in w:
+            # "(!)" marks sarcasm
+            assessments.append([0.0, 1.0, 1.0, False])
+        elif w in emoticons:
+            assessments.append([emoticons[w], 1.0, 1.0, False])
+
+    if not assessments:
+        return 0.0
+    # "not good" = slightly bad, "not bad" = slightly good
+    return sum(a[0] * -0.5 if a[3] else a[0] for a in assessments) / len(assessments)
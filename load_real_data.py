@@ -1,63 +1,141 @@
+# Build processed_real_data.csv from the raw PTSD export.
+#
+#   python load_real_data.py --raw real_data.csv --output processed_real_data.csv
+#
+# Rows are labelled by Age + IMC, the classes are oversampled with SMOTE and
+# a few noisy copies of real rows are mixed in. The raw file is read in
+# chunks so large exports do not need to fit in memory as text, and every
+# random step uses the one seed, so the same inputs give the same file.
+#
+# Alongside the CSV a typed Feather copy of the training columns is written
+# (see training_data.py); that is what train_risk_model.py reads by default.
+import argparse
+import os
+
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 
-df = pd.read_csv("real_data.csv", skiprows=3, header=None, names=['PTSD', 'Age', 'Ethnicity', 'Marital status', 'Religion', 'Education', 'IMC'])
+from training_data import DEFAULT_DATASET_PATH, write_dataset
 
-# Convert numeric columns
-df['Age'] = pd.to_numeric(df['Age'], errors='coerce')
-df['IMC'] = pd.to_numeric(df['IMC'], errors='coerce')
-df['PTSD'] = pd.to_numeric(df['PTSD'], errors='coerce')
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RAW_PATH = os.path.join(BASE_DIR, "real_data.csv")
+DEFAULT_OUTPUT_PATH = os.path.join(BASE_DIR, "processed_real_data.csv")
 
-# Drop IDs if present
-df = df.drop(columns=["participant_id"], errors="ignore")
+RAW_COLUMNS = ['PTSD', 'Age', 'Ethnicity', 'Marital status', 'Religion', 'Education', 'IMC']
+NUMERIC_COLUMNS = ['Age', 'IMC', 'PTSD']
+TEXT_COLUMNS = ['Ethnicity', 'Marital status', 'Religion', 'Education']
+CLINICAL_COLUMNS = ['Age', 'IMC']
 
-# Drop rows with NaN in key columns
-df = df.dropna(subset=['Age', 'IMC', 'PTSD'])
+# Age + IMC below 40 is Low, below 50 Medium, otherwise High
+RISK_THRESHOLDS = (40, 50)
+DEFAULT_SAMPLING = {0: 1500, 1: 1700, 2: 1800}
 
-def assign_risk(row):
-    score = row['Age'] + row['IMC']
-    
-    if score < 40:
-        return 0  # Low
-    elif score < 50:
-        return 1  # Medium
-    else:
-        return 2  # High
 
-df['risk_level'] = df.apply(assign_risk, axis=1)
+def clean_chunk(df):
+    # Convert numeric columns
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
 
-from imblearn.over_sampling import SMOTE
+    # Drop IDs if present
+    df = df.drop(columns=["participant_id"], errors="ignore")
 
-X = df[['Age', 'IMC']]
-y = df["risk_level"]
+    # Drop rows with NaN in key columns
+    df = df.dropna(subset=NUMERIC_COLUMNS)
 
-smote = SMOTE(
-    sampling_strategy={0:1500, 1:1700, 2:1800},
-    random_state=42
-)
+    # A few distinct answers repeated on every row
+    for col in TEXT_COLUMNS:
+        df[col] = df[col].astype('string').astype('category')
+    return df
 
-X_smote, y_smote = smote.fit_resample(X, y)
 
-df_smote = pd.DataFrame(X_smote, columns=X.columns)
-df_smote["risk_level"] = y_smote
+def load_raw(path=DEFAULT_RAW_PATH, chunksize=100000):
+    """
+    Read and clean the raw export chunk by chunk
+    """
+    # The export's header row lands in the first chunk as data and is dropped
+    # with the other non-numeric rows
+    reader = pd.read_csv(path, skiprows=3, header=None, names=RAW_COLUMNS, chunksize=chunksize,
+                         low_memory=False)
+    chunks = [clean_chunk(chunk) for chunk in reader]
 
-import numpy as np
+    df = pd.concat([chunk.drop(columns=TEXT_COLUMNS) for chunk in chunks])
+    for col in TEXT_COLUMNS:
+        # Merge the per-chunk categories so the text columns stay categorical
+        df[col] = union_categoricals([chunk[col] for chunk in chunks])
+    return df[RAW_COLUMNS]
+
+
+def assign_risk_levels(age, imc):
+    score = np.asarray(age) + np.asarray(imc)
+    low, medium = RISK_THRESHOLDS
+    return np.select([score < low, score < medium], [0, 1], default=2)
+
+
+def oversample(df, sampling_strategy, seed):
+    from imblearn.over_sampling import SMOTE
+
+    X = df[CLINICAL_COLUMNS]
+    y = df["risk_level"]
+
+    smote = SMOTE(sampling_strategy=sampling_strategy, random_state=seed)
+    X_smote, y_smote = smote.fit_resample(X, y)
+
+    df_smote = pd.DataFrame(X_smote, columns=X.columns)
+    df_smote["risk_level"] = y_smote
+    return df_smote
+
+
+def add_noise(df, rows, scale, rng):
+    # Resampled real rows with small Gaussian noise on the clinical columns
+    noise_df = df.sample(rows, replace=True, random_state=rng).copy()
+    values = noise_df[CLINICAL_COLUMNS].to_numpy(dtype=float)
+    stds = values.std(axis=0, ddof=1)
+    noise_df[CLINICAL_COLUMNS] = values + rng.normal(0, stds * scale, size=values.shape)
+    return noise_df
+
+
+def preprocess(raw_path=DEFAULT_RAW_PATH, output_path=DEFAULT_OUTPUT_PATH, sampling_strategy=None,
+               noise_rows=500, noise_scale=0.05, seed=42, chunksize=100000, dataset_path=DEFAULT_DATASET_PATH):
+    """
+    Run the whole pipeline and write output_path and dataset_path (each
+    skipped when None); returns the final frame
+    """
+    rng = np.random.RandomState(seed)
+
+    df = load_raw(raw_path, chunksize)
+    df['risk_level'] = assign_risk_levels(df['Age'].to_numpy(), df['IMC'].to_numpy())
+
+    df_smote = oversample(df, sampling_strategy or DEFAULT_SAMPLING, seed)
+    noise_df = add_noise(df, noise_rows, noise_scale, rng)
+
+    final_df = pd.concat([df_smote, noise_df], axis=0)
+    final_df = final_df.sample(frac=1, random_state=rng).reset_index(drop=True)
 
-noise_df = df.sample(500, replace=True).copy()
+    if output_path:
+        final_df.to_csv(output_path, index=False)
+    if dataset_path:
+        write_dataset(final_df, dataset_path)
+    return final_df
 
-clinical_cols = [
-    'Age', 'IMC'
-]
 
-for col in clinical_cols:
-    noise_df[col] += np.random.normal(
-        loc=0,
-        scale=noise_df[col].std() * 0.05,
-        size=len(noise_df)
-    )
+def parse_sampling(value):
+    # "0:1500,1:1700,2:1800"
+    return {int(label): int(count) for label, count in (item.split(':') for item in value.split(','))}
 
-final_df = pd.concat([df_smote, noise_df], axis=0)
-final_df = final_df.sample(frac=1, random_state=42).reset_index(drop=True)
 
-print(final_df.shape)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Preprocess the raw PTSD export for training')
+    parser.add_argument('--raw', default=DEFAULT_RAW_PATH, help='Raw CSV export')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_PATH, help='Processed CSV to write')
+    parser.add_argument('--dataset', default=DEFAULT_DATASET_PATH, help='Typed .feather or .parquet copy to write')
+    parser.add_argument('--sampling', type=parse_sampling, default=None,
+                        help='SMOTE targets per risk level, e.g. 0:1500,1:1700,2:1800')
+    parser.add_argument('--noise-rows', type=int, default=500, help='Noisy copies of real rows to add')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--chunksize', type=int, default=100000, help='Rows read from the raw file at a time')
+    args = parser.parse_args()
 
-final_df.to_csv("processed_real_data.csv", index=False)
\ No newline at end of file
+    final_df = preprocess(args.raw, args.output, args.sampling, args.noise_rows, seed=args.seed,
+                          chunksize=args.chunksize, dataset_path=args.dataset)
+    print(final_df.shape)
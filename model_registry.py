@@ -0,0 +1,83 @@
+# Process-wide cache for loaded model artifacts.
+#
+# Artifacts are keyed by absolute path and reloaded only when the file on disk
+# changes (mtime, size or inode), so a retrained model promoted by
+# train_risk_model.py is picked up without restarting the server.
+import os
+import threading
+import time
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class _Entry:
+    __slots__ = ('signature', 'value', 'load_seconds')
+
+    def __init__(self, signature, value, load_seconds):
+        self.signature = signature
+        self.value = value
+        self.load_seconds = load_seconds
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.reloads = 0
+        self.load_seconds = 0.0
+        self.last_load_seconds = 0.0
+
+    def get(self, path, loader):
+        """
+        Return loader(path), loading it at most once per version of the file
+        """
+        key = os.path.abspath(path)
+        signature = file_signature(key)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.signature == signature:
+            self.hits += 1
+            return entry.value
+
+        with self._lock:
+            # Another thread may have loaded it while we waited for the lock
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                self.hits += 1
+                return entry.value
+
+            start = time.perf_counter()
+            value = loader(key)
+            elapsed = time.perf_counter() - start
+
+            # Swap in the new entry only once it is fully loaded
+            self._entries[key] = _Entry(signature, value, elapsed)
+            if entry is not None:
+                self.reloads += 1
+            self.loads += 1
+            self.load_seconds += elapsed
+            self.last_load_seconds = elapsed
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+    def stats(self):
+        return {
+            'cached': sorted(self._entries),
+            'hits': self.hits,
+            'loads': self.loads,
+            'reloads': self.reloads,
+            'load_seconds_total': round(self.load_seconds, 6),
+            'last_load_seconds': round(self.last_load_seconds, 6),
+        }
+
+
+# Shared by everything in this process
+registry = ModelRegistry()
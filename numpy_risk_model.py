@@ -0,0 +1,215 @@
+# NumPy-only inference for the risk MLP.
+#
+# The deployed network is a small stack of Dense layers over Age/IMC, so the
+# forward pass is a handful of matrix products. export_weights() dumps the
+# Keras weights together with the scaler's mean/scale into one .npz file;
+# NumpyRiskModel runs the forward pass from that file without TensorFlow,
+# scikit-learn or joblib.
+#
+# Weights can also be written as a flat file (.bin): a short JSON header
+# followed by the raw arrays, each 64-byte aligned. Loading it is a single
+# read-only mmap with the arrays as views onto the mapping, so pre-fork
+# workers share one physical copy through the page cache instead of each
+# unpacking their own. The flat file is used whenever it exists, unless
+# RISK_MODEL_WEIGHTS names another weights file.
+#
+#   python numpy_risk_model.py --output mental_health_risk_model_weights.bin
+import argparse
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+NPZ_WEIGHTS_PATH = os.path.join(BASE_DIR, 'mental_health_risk_model_weights.npz')
+FLAT_WEIGHTS_PATH = os.path.join(BASE_DIR, 'mental_health_risk_model_weights.bin')
+DEFAULT_WEIGHTS_PATH = os.environ.get('RISK_MODEL_WEIGHTS') or (
+    FLAT_WEIGHTS_PATH if os.path.exists(FLAT_WEIGHTS_PATH) else NPZ_WEIGHTS_PATH
+)
+
+FLAT_MAGIC = b'RISKW001'
+FLAT_ALIGN = 64
+ACTIVATIONS = ('relu', 'softmax', 'linear')
+
+
+def _align(offset):
+    return -(-offset // FLAT_ALIGN) * FLAT_ALIGN
+
+
+def dense_layers(model):
+    """
+    (kernels, biases, activations) of the Dense layers of a Keras model.
+    Dropout layers carry no weights and are identity at inference, so they
+    are left out.
+    """
+    import tensorflow as tf
+
+    kernels, biases, activations = [], [], []
+    for layer in model.layers:
+        if not isinstance(layer, tf.keras.layers.Dense):
+            continue
+        activation = layer.get_config()['activation']
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"Unsupported activation '{activation}' in layer {layer.name}")
+        kernel, bias = layer.get_weights()
+        kernels.append(kernel.astype(np.float32))
+        biases.append(bias.astype(np.float32))
+        activations.append(activation)
+    return kernels, biases, activations
+
+
+def export_weights(model_path, scaler_path, output_path=DEFAULT_WEIGHTS_PATH):
+    """
+    Write the Dense kernels/biases and scaler statistics of a trained model to
+    an .npz file, or a flat file for any other extension
+    """
+    import joblib
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path)
+    scaler = joblib.load(scaler_path)
+
+    weights = NumpyRiskModel.from_keras(model, scaler)
+
+    # Write next to the target and rename so readers never see a partial file;
+    # a mapped flat file must never be rewritten in place, the rename leaves
+    # running workers on the old inode until they reload
+    if output_path.endswith('.npz'):
+        tmp_path = output_path + '.tmp.npz'
+        weights.save(tmp_path)
+    else:
+        tmp_path = output_path + '.tmp'
+        weights.save_flat(tmp_path)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+class NumpyRiskModel:
+    def __init__(self, mean, scale, kernels, biases, activations):
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.kernels = [np.ascontiguousarray(k, dtype=np.float32) for k in kernels]
+        self.biases = [np.ascontiguousarray(b, dtype=np.float32) for b in biases]
+        self.activations = list(activations)
+
+    @classmethod
+    def load(cls, path=DEFAULT_WEIGHTS_PATH):
+        if not path.endswith('.npz'):
+            return cls.load_flat(path)
+        with np.load(path, allow_pickle=False) as data:
+            activations = [str(a) for a in data['activations']]
+            kernels = [data[f'kernel_{i}'] for i in range(len(activations))]
+            biases = [data[f'bias_{i}'] for i in range(len(activations))]
+            return cls(data['mean'], data['scale'], kernels, biases, activations)
+
+    @classmethod
+    def from_keras(cls, model, scaler):
+        kernels, biases, activations = dense_layers(model)
+        return cls(scaler.mean_, scaler.scale_, kernels, biases, activations)
+
+    @classmethod
+    def load_flat(cls, path=FLAT_WEIGHTS_PATH):
+        """
+        Map a flat weights file; the arrays are read-only views onto the file
+        """
+        with open(path, 'rb') as f:
+            # The mapping stays alive as long as the arrays reference it
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer[:len(FLAT_MAGIC)] != FLAT_MAGIC:
+            raise ValueError(f"{path} is not a flat weights file")
+        header_size, = struct.unpack_from('<I', buffer, len(FLAT_MAGIC))
+        start = len(FLAT_MAGIC) + 4
+        header = json.loads(buffer[start:start + header_size])
+        data_start = _align(start + header_size)
+
+        arrays = {}
+        for name, dtype, shape, offset in header['arrays']:
+            count = int(np.prod(shape))
+            array = np.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + offset)
+            arrays[name] = array.reshape(shape)
+        n = len(header['activations'])
+        return cls(arrays['mean'], arrays['scale'], [arrays[f'kernel_{i}'] for i in range(n)],
+                   [arrays[f'bias_{i}'] for i in range(n)], header['activations'])
+
+    def arrays(self):
+        arrays = {'mean': self.mean, 'scale': self.scale}
+        for i, (kernel, bias) in enumerate(zip(self.kernels, self.biases)):
+            arrays[f'kernel_{i}'] = kernel
+            arrays[f'bias_{i}'] = bias
+        return arrays
+
+    def save(self, output):
+        """
+        Write the weights as .npz to a path or file object
+        """
+        np.savez(output, activations=np.array(self.activations), **self.arrays())
+
+    def save_flat(self, output):
+        """
+        Write the weights as a flat file to a path or binary file object
+        """
+        arrays = self.arrays()
+        # Offsets are relative to the data section, which starts at the first
+        # aligned position after the header
+        layout = []
+        offset = 0
+        for name, array in arrays.items():
+            layout.append([name, array.dtype.str, list(array.shape), offset])
+            offset = _align(offset + array.nbytes)
+        header = json.dumps({'activations': self.activations, 'arrays': layout}).encode('utf-8')
+        data_start = _align(len(FLAT_MAGIC) + 4 + len(header))
+
+        chunks = [FLAT_MAGIC, struct.pack('<I', len(header)), header]
+        position = len(FLAT_MAGIC) + 4 + len(header)
+        for (_, _, _, offset), array in zip(layout, arrays.values()):
+            chunks.append(b'\0' * (data_start + offset - position))
+            chunks.append(np.ascontiguousarray(array).tobytes())
+            position = data_start + offset + array.nbytes
+        if isinstance(output, (str, os.PathLike)):
+            with open(output, 'wb') as f:
+                f.write(b''.join(chunks))
+        else:
+            output.write(b''.join(chunks))
+
+    def transform(self, X):
+        """
+        Same as StandardScaler.transform for the exported scaler
+        """
+        return (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+
+    def forward(self, X_scaled):
+        h = np.asarray(X_scaled, dtype=np.float32)
+        for kernel, bias, activation in zip(self.kernels, self.biases, self.activations):
+            h = h @ kernel
+            h += bias
+            if activation == 'relu':
+                np.maximum(h, 0, out=h)
+            elif activation == 'softmax':
+                h -= h.max(axis=1, keepdims=True)
+                np.exp(h, out=h)
+                h /= h.sum(axis=1, keepdims=True)
+        return h
+
+    def predict_proba(self, X):
+        """
+        Class probabilities for raw (unscaled) Age/IMC rows
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return self.forward(self.transform(X))
+
+
+if __name__ == "__main__":
+    from risk_model import DEFAULT_MODEL_PATH, DEFAULT_SCALER_PATH
+
+    parser = argparse.ArgumentParser(description='Export the Keras risk model to NumPy weights')
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--scaler', default=DEFAULT_SCALER_PATH)
+    parser.add_argument('--output', default=DEFAULT_WEIGHTS_PATH)
+    args = parser.parse_args()
+
+    path = export_weights(args.model, args.scaler, args.output)
+    print(f"NumPy weights saved as: {path}")
@@ -0,0 +1,266 @@
+# Offline re-scoring of archived conversations with the trauma chatbot.
+#
+#   python replay_transcripts.py conversations.jsonl --messages messages.parquet --sessions sessions.parquet
+#   python replay_transcripts.py conversations.jsonl --messages messages.csv --sessions sessions.csv \
+#       --lexicons lexicons.json --thresholds thresholds.json --workers 8
+#
+# Transcripts use the bulk_reports archive format, one JSON record per
+# session:
+#
+#   {"id": "abc123", "messages": ["I keep having nightmares", "I feel alone"]}
+#
+# Each user message is classified and answered by the stateless
+# TraumaEngine the live chatbot wraps (response_engine), and the session's
+# counters are kept in a ConversationStats of its own, so nothing is written
+# back to a live chatbot and sessions can be scored in any process.
+#
+# Outputs (.parquet or .csv, by extension):
+#
+#   messages  session_id, turn, sentiment, trauma_indicator, crisis,
+#             response (the reply type) and the session's risk_level so far
+#   sessions  session_id, messages, trauma_indicators, crisis_count,
+#             severe_distress, max_severity and the final risk_level
+#
+# --lexicons replaces keyword categories ({"crisis": [...], ...}) and
+# --thresholds replaces sentiment cut points ({"negative": -0.15, ...}), so
+# archives can be re-scored against a proposed change before it ships.
+# Sessions are scored in chunks across a process pool with a bounded number
+# of chunks in flight, so the archive is streamed rather than loaded.
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from bulk_reports import chunked, read_archive, user_messages
+from conversation_stats import TRAUMA_SEVERITY, ConversationStats
+from response_engine import EMPTY_SESSION, TraumaEngine, get_engine
+from sentiment_service import SentimentService
+from trauma_app import trauma_risk_level
+
+# (name, Arrow type) in output order
+MESSAGE_COLUMNS = [
+    ('session_id', 'string'),
+    ('turn', 'int32'),
+    ('sentiment', 'string'),
+    ('trauma_indicator', 'string'),
+    ('crisis', 'bool'),
+    ('response', 'string'),
+    ('risk_level', 'string'),
+]
+SESSION_COLUMNS = [
+    ('session_id', 'string'),
+    ('messages', 'int32'),
+    ('trauma_indicators', 'int32'),
+    ('crisis_count', 'int32'),
+    ('severe_distress', 'int32'),
+    ('max_severity', 'string'),
+    ('risk_level', 'string'),
+]
+
+# Engine used by score_sessions() in this process
+_engine = None
+
+
+def load_overrides(path):
+    if not path:
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def init_scorer(lexicons=None, thresholds=None, sentiment_backend=None):
+    """
+    Set up this process's engine; lexicons and thresholds replace the
+    defaults category by category
+    """
+    global _engine
+    sentiment = SentimentService(sentiment_backend) if sentiment_backend else None
+    _engine = get_engine(TraumaEngine, lexicons, thresholds, sentiment)
+
+
+def score_session(engine, session_id, messages):
+    """
+    (message rows, session row) for one session's user messages
+    """
+    stats = ConversationStats(TRAUMA_SEVERITY)
+    rows = []
+    for turn, message in enumerate(messages):
+        classification = engine.classify(message)
+        stats.record(classification.sentiment, classification.trauma_indicator)
+        # A fresh session has answered no screening questions
+        response = engine.decide(classification, EMPTY_SESSION)
+        rows.append((session_id, turn, classification.sentiment, classification.trauma_indicator,
+                     classification.crisis, response.get('type', response['sentiment']), trauma_risk_level(stats)))
+    if not rows:
+        raise ValueError('Conversation has no messages')
+    session = (session_id, stats.total_messages, stats.trauma_indicators, stats.crisis_count,
+               stats.count('severe_distress'), stats.max_severity, trauma_risk_level(stats))
+    return rows, session
+
+
+def score_sessions(items):
+    """
+    Score a chunk of (id, record) pairs in a worker; returns
+    (message rows, session rows, [(id, error)])
+    """
+    if _engine is None:
+        init_scorer()
+    message_rows = []
+    session_rows = []
+    errors = []
+    for session_id, record in items:
+        try:
+            rows, session = score_session(_engine, session_id, list(user_messages(record.get('messages', []))))
+        except Exception as e:
+            errors.append((session_id, str(e)))
+            continue
+        message_rows.extend(rows)
+        session_rows.append(session)
+    return message_rows, session_rows, errors
+
+
+class CSVOutput:
+    def __init__(self, path, columns):
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, _ in columns])
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetOutput:
+    # Rows are buffered and written as one row group per batch_size rows
+    def __init__(self, path, columns, batch_size=100000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.schema = pa.schema([(name, pa.type_for_alias(arrow_type)) for name, arrow_type in columns])
+        self._writer = pq.ParquetWriter(path, self.schema)
+        self.batch_size = batch_size
+        self._rows = []
+
+    def write(self, rows):
+        self._rows.extend(rows)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        columns = list(zip(*self._rows))
+        self._writer.write_table(self._pa.Table.from_arrays(
+            [self._pa.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+            schema=self.schema
+        ))
+        self._rows = []
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+
+def open_output(path, columns):
+    if path.endswith('.parquet'):
+        return ParquetOutput(path, columns)
+    return CSVOutput(path, columns)
+
+
+def run_replay(archive, messages_path, sessions_path, workers=None, chunk_size=64, lexicons=None,
+               thresholds=None, sentiment_backend=None, progress_interval=5.0, log=None):
+    """
+    Score every session in the archive and write the message and session
+    outcomes; returns a throughput summary. workers=0 scores in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    init_args = (lexicons, thresholds, sentiment_backend)
+
+    message_output = open_output(messages_path, MESSAGE_COLUMNS)
+    session_output = open_output(sessions_path, SESSION_COLUMNS)
+    n_messages = n_sessions = 0
+    errors = []
+    start = last_progress = time.perf_counter()
+
+    def handle(result):
+        nonlocal n_messages, n_sessions, last_progress
+        message_rows, session_rows, chunk_errors = result
+        message_output.write(message_rows)
+        session_output.write(session_rows)
+        n_messages += len(message_rows)
+        n_sessions += len(session_rows)
+        errors.extend(chunk_errors)
+
+        now = time.perf_counter()
+        if log and now - last_progress >= progress_interval:
+            last_progress = now
+            log(f"{n_sessions} sessions, {n_messages} messages, {len(errors)} failed, "
+                f"{n_messages / (now - start):.0f} messages/sec")
+
+    global _engine
+    try:
+        chunks = chunked(read_archive(archive), chunk_size)
+        if workers == 0:
+            init_scorer(*init_args)
+            for chunk in chunks:
+                handle(score_sessions(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_scorer, initargs=init_args) as pool:
+                in_flight = set()
+                for chunk in chunks:
+                    in_flight.add(pool.submit(score_sessions, chunk))
+                    if len(in_flight) >= workers * 2:
+                        finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            handle(future.result())
+                for future in in_flight:
+                    handle(future.result())
+    finally:
+        _engine = None
+        message_output.close()
+        session_output.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'sessions': n_sessions,
+        'messages': n_messages,
+        'failed': len(errors),
+        'elapsed_seconds': elapsed,
+        'messages_per_hour': n_messages / elapsed * 3600 if elapsed else 0.0,
+        'errors': errors,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Re-score archived conversations offline')
+    parser.add_argument('archive', help='JSONL file or SQLite database of conversations')
+    parser.add_argument('--messages', required=True, help='Per-message outcomes (.parquet or .csv)')
+    parser.add_argument('--sessions', required=True, help='Per-session outcomes (.parquet or .csv)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count, 0 = inline)')
+    parser.add_argument('--chunk-size', type=int, default=64, help='Sessions sent to a worker at a time')
+    parser.add_argument('--lexicons', default=None, help='JSON of keyword categories to replace')
+    parser.add_argument('--thresholds', default=None, help='JSON of sentiment thresholds to replace')
+    parser.add_argument('--sentiment-backend', default=None, help='textblob or lexicon (default: SENTIMENT_BACKEND)')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help='Seconds between progress lines')
+    args = parser.parse_args()
+
+    summary = run_replay(
+        args.archive, args.messages, args.sessions, workers=args.workers, chunk_size=args.chunk_size,
+        lexicons=load_overrides(args.lexicons), thresholds=load_overrides(args.thresholds),
+        sentiment_backend=args.sentiment_backend, progress_interval=args.progress_interval,
+        log=lambda line: print(line, file=sys.stderr)
+    )
+    print(f"Sessions: {summary['sessions']}")
+    print(f"Messages: {summary['messages']}")
+    print(f"Failed: {summary['failed']}")
+    print(f"Elapsed: {summary['elapsed_seconds']:.1f}s")
+    print(f"Throughput: {summary['messages_per_hour']:,.0f} messages/hour")
+    for session_id, error in summary['errors'][:10]:
+        print(f"  {session_id}: {error}")
@@ -1,54 +1,57 @@
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import inch
+from report_renderer import renderer, write_pdf
 
+RISK_EXPLANATIONS = {
+    'Critical': 'Immediate intervention required. Crisis indicators detected suggesting potential self-harm risk.',
+    'High': 'Significant mental health concerns present. Professional evaluation strongly recommended.',
+    'Medium': 'Moderate risk factors identified. Monitoring and support recommended.',
+    'Low': 'Minimal risk indicators. Maintain current positive practices.'
+}
 
 
-
-def generate_report(data, output_path):
-    styles = getSampleStyleSheet()
-    doc = SimpleDocTemplate(output_path)
+def build_report_story(data):
     story = []
 
-    story.append(Paragraph("<b>Mental Health Support Report</b>", styles['Title']))
-    story.append(Paragraph(f"Risk Level: <b>{data['risk_level']}</b>", styles['Normal']))
+    story.append(("<b>Mental Health Support Report</b>", 'Title'))
+    story.append((f"Risk Level: <b>{data['risk_level']}</b>", 'Normal'))
     
     # Risk Explanation Section
-    story.append(Paragraph("<b>Risk Assessment Explanation:</b>", styles['Heading2']))
-    risk_explanations = {
-        'Critical': 'Immediate intervention required. Crisis indicators detected suggesting potential self-harm risk.',
-        'High': 'Significant mental health concerns present. Professional evaluation strongly recommended.',
-        'Medium': 'Moderate risk factors identified. Monitoring and support recommended.',
-        'Low': 'Minimal risk indicators. Maintain current positive practices.'
-    }
-    story.append(Paragraph(risk_explanations.get(data['risk_level'], 'Risk level assessment unavailable.'), styles['Normal']))
+    story.append(("<b>Risk Assessment Explanation:</b>", 'Heading2'))
+    story.append((RISK_EXPLANATIONS.get(data['risk_level'], 'Risk level assessment unavailable.'), 'Normal'))
     
     # Medical Assessment Factors
-    story.append(Paragraph("<b>Medical Assessment Factors:</b>", styles['Heading2']))
+    story.append(("<b>Medical Assessment Factors:</b>", 'Heading2'))
     if 'medical_factors' in data:
         for factor, value in data['medical_factors'].items():
             impact = get_medical_impact(factor, value)
-            story.append(Paragraph(f"• {factor}: {value} - {impact}", styles['Normal']))
+            story.append((f"• {factor}: {value} - {impact}", 'Normal'))
     
     # Key Indicators
-    story.append(Paragraph("<b>Key Indicators:</b>", styles['Heading2']))
+    story.append(("<b>Key Indicators:</b>", 'Heading2'))
     for k, v in data['indicators'].items():
-        story.append(Paragraph(f"• {k}: {v}", styles['Normal']))
+        story.append((f"• {k}: {v}", 'Normal'))
 
     # Support Recommendations
-    story.append(Paragraph("<b>Support Recommendations:</b>", styles['Heading2']))
+    story.append(("<b>Support Recommendations:</b>", 'Heading2'))
     for rec in data['recommendations']:
-        story.append(Paragraph(f"• {rec}", styles['Normal']))
+        story.append((f"• {rec}", 'Normal'))
     
     # Clinical Notes
-    story.append(Paragraph("<b>Clinical Considerations:</b>", styles['Heading2']))
+    story.append(("<b>Clinical Considerations:</b>", 'Heading2'))
     clinical_notes = get_clinical_notes(data['risk_level'], data.get('medical_factors', {}))
     for note in clinical_notes:
-        story.append(Paragraph(f"• {note}", styles['Normal']))
+        story.append((f"• {note}", 'Normal'))
 
-    story.append(Paragraph("<i>This report is for support purposes only and is not a medical diagnosis.</i>", styles['Italic']))
+    story.append(("<i>This report is for support purposes only and is not a medical diagnosis.</i>", 'Italic'))
+    return story
 
-    doc.build(story)
+def render_report(data):
+    """
+    The mental health report as PDF bytes
+    """
+    return renderer.render(build_report_story(data))
+
+def generate_report(data, output_path):
+    write_pdf(render_report(data), output_path)
 
 def get_medical_impact(factor, value):
     impacts = {
@@ -113,7 +116,8 @@ def get_clinical_notes(risk_level, medical_factors):
         ])
     
     # Add medical factor specific notes
-    if medical_factors.get('Sleep Hours', 0) < 6:
+    sleep_hours = medical_factors.get('Sleep Hours', 0)
+    if isinstance(sleep_hours, (int, float)) and sleep_hours < 6:
         notes.append('Address sleep hygiene and consider sleep study if chronic insomnia persists')
     
     if medical_factors.get('Blood Sugar Issues') == 'yes':
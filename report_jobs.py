@@ -0,0 +1,234 @@
+# Background PDF report generation.
+#
+# Report requests are queued onto a bounded worker pool instead of being
+# rendered on the request thread. Each job is owned by the session that asked
+# for it and is dropped job_ttl seconds after it finishes.
+#
+# Job state and the rendered PDFs live in a job store. MemoryJobStore keeps
+# them in this process, so it only suits a single worker. SQLiteJobStore keeps
+# them in a SQLite file, so with several Gunicorn workers on one host any
+# worker can answer status and download requests; the job is still rendered
+# by the worker that accepted it, and other workers report it as queued until
+# it finishes. Jobs left unfinished by a worker that exited are dropped
+# job_ttl seconds after they were queued.
+import secrets
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class QueueFull(Exception):
+    pass
+
+
+class ReportJob:
+    __slots__ = ('id', 'owner', 'status', 'pdf', 'error', 'created', 'finished', 'future')
+
+    def __init__(self, job_id, owner):
+        self.id = job_id
+        self.owner = owner
+        self.status = QUEUED
+        self.pdf = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.future = None
+
+    def to_dict(self):
+        data = {'job_id': self.id, 'status': self.status}
+        if self.error:
+            data['error'] = self.error
+        return data
+
+
+class MemoryJobStore:
+    def __init__(self):
+        self._jobs = {}
+
+    def add(self, job, max_pending):
+        """
+        Store a new job; False when max_pending jobs are already in flight
+        """
+        active = sum(1 for other in self._jobs.values() if other.status in (QUEUED, RUNNING))
+        if active >= max_pending:
+            return False
+        self._jobs[job.id] = job
+        return True
+
+    def load(self, job_id):
+        return self._jobs.get(job_id)
+
+    def update(self, job):
+        # The stored job is the caller's object, already updated
+        pass
+
+    def delete(self, job_id):
+        self._jobs.pop(job_id, None)
+
+    def expire(self, cutoff):
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def counts(self):
+        by_status = {}
+        for job in self._jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return by_status
+
+
+class SQLiteJobStore:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS report_jobs ('
+            'job_id TEXT PRIMARY KEY, owner TEXT NOT NULL, status TEXT NOT NULL, '
+            'pdf BLOB, error TEXT, created REAL NOT NULL, finished REAL)'
+        )
+        conn.commit()
+
+    def _conn(self):
+        # sqlite3 connections must stay on the thread that created them
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def add(self, job, max_pending):
+        """
+        Store a new job; False when max_pending jobs are already in flight
+        across every worker sharing the file
+        """
+        conn = self._conn()
+        # Take the write lock before counting so two workers cannot both
+        # claim the last slot
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            (active,) = conn.execute(
+                'SELECT COUNT(*) FROM report_jobs WHERE status IN (?, ?)', (QUEUED, RUNNING)
+            ).fetchone()
+            if active >= max_pending:
+                return False
+            conn.execute(
+                'INSERT INTO report_jobs (job_id, owner, status, created) VALUES (?, ?, ?, ?)',
+                (job.id, job.owner, job.status, job.created)
+            )
+            return True
+        finally:
+            conn.execute('COMMIT')
+
+    def load(self, job_id):
+        row = self._conn().execute(
+            'SELECT owner, status, pdf, error, created, finished FROM report_jobs WHERE job_id = ?', (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = ReportJob(job_id, row[0])
+        job.status, job.pdf, job.error, job.created, job.finished = row[1:]
+        return job
+
+    def update(self, job):
+        self._conn().execute(
+            'UPDATE report_jobs SET status = ?, pdf = ?, error = ?, finished = ? WHERE job_id = ?',
+            (job.status, job.pdf, job.error, job.finished, job.id)
+        )
+
+    def delete(self, job_id):
+        self._conn().execute('DELETE FROM report_jobs WHERE job_id = ?', (job_id,))
+
+    def expire(self, cutoff):
+        # Unfinished jobs this old were orphaned by a worker that exited
+        self._conn().execute('DELETE FROM report_jobs WHERE COALESCE(finished, created) < ?', (cutoff,))
+
+    def counts(self):
+        return dict(self._conn().execute('SELECT status, COUNT(*) FROM report_jobs GROUP BY status'))
+
+
+class ReportJobQueue:
+    def __init__(self, render_fn, max_workers=2, max_pending=32, job_ttl=3600, use_processes=False, store=None):
+        """
+        render_fn(report_data) returns the PDF bytes; with use_processes it
+        must be a picklable module-level function
+        """
+        self.render_fn = render_fn
+        self.max_pending = max_pending
+        self.job_ttl = job_ttl
+        self.store = store or MemoryJobStore()
+
+        pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self._executor = pool(max_workers=max_workers)
+        # Futures of the jobs this process is rendering
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, owner, report_data):
+        self._expire_old_jobs()
+        job = ReportJob(secrets.token_urlsafe(16), owner)
+        with self._lock:
+            if not self.store.add(job, self.max_pending):
+                raise QueueFull('Too many reports are being generated, please try again shortly')
+
+        try:
+            job.future = self._executor.submit(self.render_fn, report_data)
+        except Exception:
+            # e.g. a broken process pool; never leave a queued job that
+            # nothing will render holding a max_pending slot
+            with self._lock:
+                self.store.delete(job.id)
+            raise
+        with self._lock:
+            self._futures[job.id] = job.future
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job
+
+    def _finish(self, job, future):
+        with self._lock:
+            self._futures.pop(job.id, None)
+            job.finished = time.time()
+            error = future.exception()
+            if error is None:
+                job.pdf = future.result()
+                job.status = DONE
+                self.completed += 1
+            else:
+                job.status = FAILED
+                job.error = str(error)
+                self.failed += 1
+            self.store.update(job)
+
+    def get(self, job_id, owner):
+        """
+        The job, or None when it does not exist or belongs to another session
+        """
+        with self._lock:
+            job = self.store.load(job_id)
+            future = self._futures.get(job_id)
+        if job is None or job.owner != owner:
+            return None
+        if job.status == QUEUED and future is not None and future.running():
+            job.status = RUNNING
+        return job
+
+    def _expire_old_jobs(self):
+        with self._lock:
+            self.store.expire(time.time() - self.job_ttl)
+
+    def stats(self):
+        with self._lock:
+            by_status = self.store.counts()
+        return {'jobs': by_status, 'completed': self.completed, 'failed': self.failed}
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,144 @@
+# In-memory PDF rendering for the support reports.
+#
+# A report is described as a list of (text, style name) paragraphs. The
+# stylesheet is built once, each distinct paragraph is parsed and line-broken
+# once and then reused (resource lists, disclaimers, explanations are the
+# same in every report), and finished PDFs are kept in a small LRU keyed on
+# their content and the day, so a repeated report is not laid out again.
+# PDFs carry the day they were rendered as their creation date, without a
+# time, so a cached copy is never stamped earlier than the day it is served
+# on. PDFs are built into a BytesIO and returned as bytes; nothing touches
+# the disk unless the caller writes the result out with write_pdf().
+import copy
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate
+
+from request_tracing import span
+
+
+class CachedParagraph(Paragraph):
+    # Copies share the parsed text and the line breaks computed per width
+    def wrap(self, availWidth, availHeight):
+        cached = self._wrap_cache.get(availWidth)
+        if cached is None:
+            size = Paragraph.wrap(self, availWidth, availHeight)
+            self._wrap_cache[availWidth] = (size, self.blPara, self._wrapWidths)
+            return size
+        size, self.blPara, self._wrapWidths = cached
+        self.width, self.height = size
+        return size
+
+
+class ReportRenderer:
+    def __init__(self, cache_size=256, paragraph_cache_size=2048, clock=time.time):
+        """
+        cache_size finished PDFs and paragraph_cache_size parsed paragraphs
+        are kept; 0 turns the PDF cache off
+        """
+        self.cache_size = cache_size
+        self.clock = clock
+        self.paragraph_cache_size = paragraph_cache_size
+        self._styles = None
+        self._paragraphs = OrderedDict()
+        self._pdfs = OrderedDict()
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.cache_hits = 0
+        self.render_seconds = 0.0
+        self.max_render_seconds = 0.0
+        self.bytes_out = 0
+
+    @property
+    def styles(self):
+        if self._styles is None:
+            self._styles = getSampleStyleSheet()
+        return self._styles
+
+    def paragraph(self, text, style):
+        key = (text, style)
+        with self._lock:
+            prototype = self._paragraphs.get(key)
+            if prototype is not None:
+                self._paragraphs.move_to_end(key)
+        if prototype is None:
+            prototype = CachedParagraph(text, self.styles[style])
+            prototype._wrap_cache = {}
+            with self._lock:
+                self._paragraphs[key] = prototype
+                while len(self._paragraphs) > self.paragraph_cache_size:
+                    self._paragraphs.popitem(last=False)
+        # Each document lays out its own copy
+        return copy.copy(prototype)
+
+    def render(self, story):
+        """
+        PDF bytes for a list of (text, style name) paragraphs
+        """
+        start = time.perf_counter()
+        day = time.strftime('%Y%m%d', time.localtime(self.clock()))
+        key = (day, tuple(story))
+        with self._lock:
+            pdf = self._pdfs.get(key)
+            if pdf is not None:
+                self._pdfs.move_to_end(key)
+                self.cache_hits += 1
+
+        if pdf is None:
+            with span('pdf_render'):
+                buffer = io.BytesIO()
+                doc = SimpleDocTemplate(buffer)
+                doc.build([self.paragraph(text, style) for text, style in story],
+                          onFirstPage=lambda canvas, doc: canvas.setDateFormatter(lambda *ymdhms: 'D:' + day))
+                pdf = buffer.getvalue()
+            if self.cache_size:
+                with self._lock:
+                    self._pdfs[key] = pdf
+                    while len(self._pdfs) > self.cache_size:
+                        self._pdfs.popitem(last=False)
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.renders += 1
+            self.render_seconds += elapsed
+            self.max_render_seconds = max(self.max_render_seconds, elapsed)
+            self.bytes_out += len(pdf)
+        return pdf
+
+    def clear_cache(self):
+        with self._lock:
+            self._paragraphs.clear()
+            self._pdfs.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'renders': self.renders,
+                'cache_hits': self.cache_hits,
+                'hit_rate': self.cache_hits / self.renders if self.renders else 0.0,
+                'cached_reports': len(self._pdfs),
+                'cached_paragraphs': len(self._paragraphs),
+                'mean_render_ms': self.render_seconds / self.renders * 1000 if self.renders else 0.0,
+                'max_render_ms': self.max_render_seconds * 1000,
+                'bytes_out': self.bytes_out,
+            }
+
+
+def write_pdf(pdf, output):
+    """
+    Write rendered PDF bytes to a path or a binary file object
+    """
+    if hasattr(output, 'write'):
+        output.write(pdf)
+    else:
+        with open(output, 'wb') as f:
+            f.write(pdf)
+
+
+# Shared by every report in this process
+renderer = ReportRenderer(cache_size=int(os.environ.get('REPORT_CACHE_SIZE', 256)))
@@ -0,0 +1,302 @@
+# Opt-in request tracing, sampled profiling and Prometheus metrics.
+#
+# Code on the request path wraps its stages in span('sentiment'),
+# span('keywords'), span('inference') or span('pdf_render'); JSON encoding
+# uses request_span('json'), which is only timed on a request thread.
+# With tracing off (the default) span() hands back a shared no-op context
+# manager, so the cost is one flag check. With SAFE_AI_TRACING=1 a span on a
+# request thread is appended to that request's trace, which is returned as a
+# Server-Timing header when the request ends and queued for the per-stage
+# latency histograms. Queued traces are folded in batches, under one lock,
+# every FOLD_EVERY requests and whenever the histograms are read. Spans off
+# the request thread (report rendering, micro-batched inference) go straight
+# to the histograms.
+#
+# Profiling: SAFE_AI_PROFILE_RATE (0..1) profiles that fraction of requests,
+# and a request carrying X-Profile set to SAFE_AI_PROFILE_TOKEN is always
+# profiled. Profiles are written to SAFE_AI_PROFILE_DIR as cProfile .prof
+# files, or pyinstrument .html files with SAFE_AI_PROFILER=pyinstrument.
+#
+# render_metrics() returns every histogram in the Prometheus text format.
+import os
+import random
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from time import perf_counter
+
+PROFILE_HEADER = 'X-Profile'
+# Seconds; Prometheus' default buckets with finer steps below 5 ms
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FOLD_EVERY = 256
+
+
+class Histogram:
+    # Not locked itself; the Tracer serializes observe() and snapshot()
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def snapshot(self):
+        return list(self.counts), self.sum, self.count
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ('tracer', 'stage', 'trace', 'start')
+
+    def __init__(self, tracer, stage, trace):
+        self.tracer = tracer
+        self.stage = stage
+        # The request's trace list, looked up once when the span is made
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = perf_counter() - self.start
+        if self.trace is not None:
+            self.trace.append((self.stage, seconds))
+        else:
+            self.tracer.record(self.stage, seconds)
+        return False
+
+
+class _RequestState(threading.local):
+    # Class defaults stand in for getattr() fallbacks on threads that have
+    # not started a request
+    trace = None
+    start = None
+    profile = None
+
+
+class Tracer:
+    def __init__(self, enabled=False, profile_rate=0.0, profile_token=None, profile_dir='profiles',
+                 profiler='cprofile'):
+        self.enabled = enabled
+        self.profile_rate = profile_rate
+        self.profile_token = profile_token
+        self.profile_dir = profile_dir
+        self.profiler = profiler
+        self._stages = {}
+        self._requests = {}
+        # (endpoint, status, elapsed, trace) of requests not yet folded into
+        # the histograms; deque appends need no lock
+        self._finished = deque()
+        self.profiles_written = 0
+        self._local = _RequestState()
+        self._lock = threading.Lock()
+
+    @property
+    def stages(self):
+        self._fold()
+        return self._stages
+
+    @property
+    def requests(self):
+        self._fold()
+        return self._requests
+
+    def _observe(self, table, key, seconds):
+        # Caller holds self._lock
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram()
+        histogram.observe(seconds)
+
+    def span(self, stage):
+        if not self.enabled:
+            return NOOP_SPAN
+        # On a request thread the span joins the request's trace and reaches
+        # the histograms through end_request()
+        return Span(self, stage, self._local.trace)
+
+    def request_span(self, stage):
+        """
+        Like span(), but only timed on a traced request thread; for stages
+        that also run elsewhere and are only of interest per request
+        """
+        trace = self._local.trace
+        if trace is None:
+            return NOOP_SPAN
+        return Span(self, stage, trace)
+
+    def record(self, stage, seconds):
+        trace = self._local.trace
+        if trace is not None:
+            trace.append((stage, seconds))
+        else:
+            with self._lock:
+                self._observe(self._stages, stage, seconds)
+
+    # Request lifecycle, called from the server's before/after request hooks
+
+    def begin_request(self, profile_header=None):
+        local = self._local
+        local.trace = [] if self.enabled else None
+        local.start = perf_counter()
+        if self._should_profile(profile_header):
+            local.profile = self._start_profile()
+
+    def end_request(self, endpoint, status):
+        """
+        Record the request; returns its Server-Timing header value, or None
+        when tracing is off
+        """
+        local = self._local
+        start = local.start
+        if start is None:
+            return None
+        elapsed = perf_counter() - start
+        trace = local.trace
+        profile = local.profile
+        local.trace = local.start = local.profile = None
+
+        if profile is not None:
+            self._stop_profile(profile, endpoint)
+        if trace is None:
+            return None
+
+        finished = self._finished
+        finished.append((endpoint, status, elapsed, trace))
+        if len(finished) >= FOLD_EVERY:
+            self._fold()
+
+        totals = {}
+        for stage, seconds in trace:
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        parts = [f'{stage};dur={seconds * 1000:.3f}' for stage, seconds in totals.items()]
+        parts.append(f'total;dur={elapsed * 1000:.3f}')
+        return ', '.join(parts)
+
+    def _fold(self):
+        # Move queued requests into the histograms
+        finished = self._finished
+        with self._lock:
+            while finished:
+                endpoint, status, elapsed, trace = finished.popleft()
+                self._observe(self._requests, (endpoint, f'{status // 100}xx'), elapsed)
+                for stage, seconds in trace:
+                    self._observe(self._stages, stage, seconds)
+
+    def _should_profile(self, profile_header):
+        if self.profile_token and profile_header == self.profile_token:
+            return True
+        return self.profile_rate > 0 and random.random() < self.profile_rate
+
+    def _start_profile(self):
+        try:
+            if self.profiler == 'pyinstrument':
+                from pyinstrument import Profiler
+
+                profile = Profiler()
+                profile.start()
+            else:
+                import cProfile
+
+                profile = cProfile.Profile()
+                profile.enable()
+        except (ImportError, ValueError):
+            # Profiler not installed, or another profile is already running
+            # where the interpreter allows only one at a time
+            return None
+        return profile
+
+    def _stop_profile(self, profile, endpoint):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident()}-{endpoint}"
+        if self.profiler == 'pyinstrument':
+            profile.stop()
+            with open(os.path.join(self.profile_dir, name + '.html'), 'w', encoding='utf-8') as f:
+                f.write(profile.output_html())
+        else:
+            profile.disable()
+            profile.dump_stats(os.path.join(self.profile_dir, name + '.prof'))
+        with self._lock:
+            self.profiles_written += 1
+
+    def reset(self):
+        with self._lock:
+            self._finished.clear()
+            self._stages = {}
+            self._requests = {}
+
+    def render_metrics(self):
+        """
+        Stage and request histograms in the Prometheus text exposition format
+        """
+        self._fold()
+        with self._lock:
+            stages = [(stage, h.buckets, h.snapshot()) for stage, h in sorted(self._stages.items())]
+            requests = [(key, h.buckets, h.snapshot()) for key, h in sorted(self._requests.items())]
+        lines = [
+            '# HELP safe_ai_stage_seconds Time spent in each request stage.',
+            '# TYPE safe_ai_stage_seconds histogram',
+        ]
+        for stage, buckets, snapshot in stages:
+            lines.extend(_histogram_lines('safe_ai_stage_seconds', {'stage': stage}, buckets, snapshot))
+        lines += [
+            '# HELP safe_ai_request_seconds Request latency by endpoint and status class.',
+            '# TYPE safe_ai_request_seconds histogram',
+        ]
+        for (endpoint, status), buckets, snapshot in requests:
+            lines.extend(_histogram_lines('safe_ai_request_seconds', {'endpoint': endpoint, 'status': status},
+                                          buckets, snapshot))
+        lines += [
+            '# HELP safe_ai_profiles_written_total Request profiles written to disk.',
+            '# TYPE safe_ai_profiles_written_total counter',
+            f'safe_ai_profiles_written_total {self.profiles_written}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+def _label_value(value):
+    return re.sub(r'(["\\])', r'\\\1', str(value)).replace('\n', '\\n')
+
+
+def _histogram_lines(name, labels, buckets, snapshot):
+    counts, total, count = snapshot
+    label_text = ','.join(f'{key}="{_label_value(value)}"' for key, value in labels.items())
+    lines = []
+    cumulative = 0
+    for bound, bucket_count in zip(buckets, counts):
+        cumulative += bucket_count
+        lines.append(f'{name}_bucket{{{label_text},le="{bound:g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{label_text},le="+Inf"}} {count}')
+    lines.append(f'{name}_sum{{{label_text}}} {total:.9f}')
+    lines.append(f'{name}_count{{{label_text}}} {count}')
+    return lines
+
+
+tracer = Tracer(
+    enabled=os.environ.get('SAFE_AI_TRACING', '0') == '1',
+    profile_rate=float(os.environ.get('SAFE_AI_PROFILE_RATE', 0)),
+    profile_token=os.environ.get('SAFE_AI_PROFILE_TOKEN') or None,
+    profile_dir=os.environ.get('SAFE_AI_PROFILE_DIR', 'profiles'),
+    profiler=os.environ.get('SAFE_AI_PROFILER', 'cprofile'),
+)
+span = tracer.span
+request_span = tracer.request_span
@@ -0,0 +1,328 @@
+# Stateless message classification and response selection for the chatbots.
+#
+# An engine holds fixed configuration only: keyword lexicons, sentiment
+# thresholds and the sentiment service. classify(message) returns an
+# immutable Classification and decide(classification, snapshot) picks the
+# reply from that and an immutable SessionSnapshot of the screening factors
+# already answered; neither reads or writes conversation state. Engines are
+# therefore thread-safe, one engine serves every session in a process, and
+# classifications are cached per engine on the message text (with the
+# sentiment service's cache size, so an uncached service means uncached
+# classification).
+#
+# get_engine() hands out one shared engine per configuration, and engines
+# pickle as their configuration, so the same engine runs in request threads,
+# process pools and the offline replay. TraumaInformedChatbot and
+# SentimentChatbot are thin wrappers: classify, record the message in their
+# history and stats, then decide against a snapshot of their factors.
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+
+from keyword_matcher import get_matcher
+from sentiment_service import sentiment_service as shared_sentiment
+
+Classification = namedtuple('Classification', ['sentiment', 'categories', 'trauma_indicator', 'crisis'])
+
+# known_factors: names of the screening factors the user has already answered
+SessionSnapshot = namedtuple('SessionSnapshot', ['known_factors'])
+EMPTY_SESSION = SessionSnapshot(frozenset())
+
+
+def session_snapshot(factors):
+    """
+    Snapshot of a chatbot's {factor: value or None} screening answers
+    """
+    return SessionSnapshot(frozenset(name for name, value in factors.items() if value is not None))
+
+
+class ResponseEngine(ABC):
+    # category -> phrases; overridden per chatbot
+    LEXICONS = {}
+    # sentiment label -> polarity cut point; 'positive' is a lower bound,
+    # every other label an upper bound, and anything in between is neutral
+    THRESHOLDS = {}
+
+    def __init__(self, lexicons=None, thresholds=None, sentiment=None):
+        """
+        lexicons and thresholds replace the class defaults entry by entry
+        """
+        merged_lexicons = dict(self.LEXICONS)
+        merged_lexicons.update(lexicons or {})
+        merged_thresholds = dict(self.THRESHOLDS)
+        for label, bound in (thresholds or {}).items():
+            if label not in merged_thresholds:
+                raise ValueError(f"Unknown sentiment threshold '{label}'")
+            merged_thresholds[label] = float(bound)
+
+        self.matcher = get_matcher(merged_lexicons)
+        self.lexicons = self.matcher.lexicons
+        self.thresholds = MappingProxyType(merged_thresholds)
+        self.sentiment = sentiment or shared_sentiment
+        self._below = sorted((bound, label) for label, bound in merged_thresholds.items() if label != 'positive')
+        self._classify = lru_cache(maxsize=self.sentiment.cache_size)(self._uncached_classify)
+
+    def sentiment_label(self, polarity):
+        for bound, label in self._below:
+            if polarity < bound:
+                return label
+        if polarity > self.thresholds['positive']:
+            return 'positive'
+        return 'neutral'
+
+    def analyze_sentiment(self, message):
+        return self.sentiment_label(self.sentiment.polarity(message))
+
+    def trauma_indicator(self, categories):
+        return None
+
+    def _uncached_classify(self, message):
+        categories = frozenset(self.matcher.categories(message))
+        return Classification(self.analyze_sentiment(message), categories, self.trauma_indicator(categories),
+                              'crisis' in categories)
+
+    def classify(self, message):
+        return self._classify(message)
+
+    def screening_question(self, categories, snapshot=EMPTY_SESSION):
+        return None
+
+    @abstractmethod
+    def decide(self, classification, snapshot=EMPTY_SESSION):
+        """
+        The reply for a classification, given the session's screening answers
+        """
+
+    def respond(self, message, snapshot=EMPTY_SESSION):
+        return self.decide(self.classify(message), snapshot)
+
+    def clear_cache(self):
+        self._classify.cache_clear()
+
+    def __reduce__(self):
+        # Pickled sessions carry the configuration only; unpickling reuses
+        # this process's shared engine with its shared sentiment service
+        return (get_engine, (type(self), dict(self.lexicons), dict(self.thresholds)))
+
+
+class TraumaEngine(ResponseEngine):
+    LEXICONS = {
+        'crisis': ['suicide', 'kill myself', 'hurt myself', 'want to die', 'end my life', 'not safe', 'harm myself'],
+        'trauma': ['assault', 'rape', 'abuse', 'attacked', 'violated', 'forced', 'unwanted touch', 'sexual violence'],
+        'ptsd': ['flashbacks', 'nightmares', 'triggered', 'panic attacks', 'hypervigilant', 'dissociate', 'numb'],
+        'safety': ['unsafe', 'danger', 'threat', 'scared', 'afraid'],
+        'isolation': ['alone', 'isolated', 'no one', 'lonely'],
+        'therapy': ['therapy', 'counselor', 'treatment', 'help']
+    }
+    THRESHOLDS = {
+        'severe_distress': -0.6,
+        'distressed': -0.3,
+        'negative': -0.1,
+        'positive': 0.1
+    }
+
+    def trauma_indicator(self, categories):
+        # Check for trauma-related content
+        if 'trauma' in categories:
+            return 'trauma_disclosure'
+
+        # Check for PTSD symptoms
+        if 'ptsd' in categories:
+            return 'ptsd_symptoms'
+
+        return None
+
+    def screening_question(self, categories, snapshot=EMPTY_SESSION):
+        known = snapshot.known_factors
+
+        # Safety assessment
+        if 'safety' in categories and 'safety_concerns' not in known:
+            return "Your safety is my primary concern. Are you currently in a safe place? Do you feel safe right now?"
+
+        # Support system inquiry
+        if 'isolation' in categories and 'support_system' not in known:
+            return "Having support is crucial for healing. Do you have trusted people in your life you can talk to - friends, family, or professionals?"
+
+        # Therapy/treatment history
+        if 'therapy' in categories and 'therapy_history' not in known:
+            return "Professional support can be very helpful. Have you worked with a trauma-informed therapist or counselor before?"
+
+        return None
+
+    def decide(self, classification, snapshot=EMPTY_SESSION):
+        sentiment = classification.sentiment
+        trauma_indicator = classification.trauma_indicator
+
+        # Priority 1: Crisis detection
+        if classification.crisis:
+            return {
+                'reply': 'I\'m very concerned about your safety right now. Please reach out for immediate help:\n• Call 911 if in immediate danger\n• National Suicide Prevention Lifeline: 988\n• Crisis Text Line: Text HOME to 741741\n\nYou matter, and there are people who want to help you.',
+                'sentiment': 'crisis',
+                'emergency': True,
+                'resources': ['911', '988', 'Crisis Text Line: 741741']
+            }
+
+        # Priority 2: Trauma disclosure response
+        if trauma_indicator == 'trauma_disclosure':
+            return {
+                'reply': 'Thank you for trusting me with something so difficult to share. What happened to you was not your fault. You showed incredible strength by surviving and reaching out. I\'m here to support you in whatever way feels helpful right now.',
+                'sentiment': 'trauma_support',
+                'validation': True,
+                'resources': ['RAINN: 1-800-656-HOPE', 'Crisis Text Line: 741741']
+            }
+
+        # Priority 3: PTSD symptoms support
+        if trauma_indicator == 'ptsd_symptoms':
+            return {
+                'reply': 'What you\'re experiencing sounds like trauma responses, which are normal reactions to abnormal experiences. These symptoms can be very distressing, but they can improve with proper support and treatment. Have you been able to connect with a trauma-informed therapist?',
+                'sentiment': 'ptsd_support',
+                'suggestions': ['Grounding techniques', 'Deep breathing', 'Professional trauma therapy']
+            }
+
+        # Check for trauma-specific factors
+        trauma_question = self.screening_question(classification.categories, snapshot)
+        if trauma_question:
+            return {
+                'reply': trauma_question,
+                'sentiment': 'assessment',
+                'type': 'trauma_screening'
+            }
+
+        # Sentiment-based responses with trauma-informed approach
+        if sentiment == 'severe_distress':
+            return {
+                'reply': 'I can hear how much pain you\'re in right now. That level of distress is overwhelming, and you don\'t have to face it alone. Your feelings are valid, and healing is possible, even when it doesn\'t feel that way.',
+                'sentiment': sentiment,
+                'suggestions': ['Contact RAINN: 1-800-656-HOPE', 'Reach out to a trusted person', 'Consider crisis support']
+            }
+
+        elif sentiment == 'distressed':
+            return {
+                'reply': 'I can sense you\'re struggling right now. Trauma can make everything feel more difficult, and that\'s understandable. You\'ve already shown so much strength. What would feel most supportive right now?',
+                'sentiment': sentiment,
+                'suggestions': ['Practice self-compassion', 'Use grounding techniques', 'Connect with support']
+            }
+
+        elif sentiment == 'positive':
+            return {
+                'reply': 'I\'m glad to hear some hope or positivity in your words. Healing isn\'t linear, and these moments of light are important to acknowledge. You\'re doing important work in your recovery.',
+                'sentiment': sentiment,
+                'suggestions': ['Celebrate small victories', 'Build on positive moments', 'Continue self-care practices']
+            }
+
+        else:
+            return {
+                'reply': 'I\'m here to listen and support you. Trauma recovery takes time, and every step forward matters, no matter how small. What\'s on your mind today?',
+                'sentiment': sentiment,
+                'suggestions': ['Take things at your own pace', 'Practice self-care', 'Remember you\'re not alone']
+            }
+
+
+class SentimentEngine(ResponseEngine):
+    LEXICONS = {
+        'crisis': ['suicide', 'kill myself', 'hurt myself', 'want to die', 'end my life'],
+        'recent_events': ['stressed', 'overwhelmed', 'difficult', 'hard time', 'struggling', 'upset', 'worried', 'anxious'],
+        'sleep': ['sleep', 'tired', 'exhausted', 'insomnia'],
+        'mental_health': ['depression', 'anxiety', 'therapy', 'medication', 'psychiatrist'],
+        'blood_sugar': ['sugar', 'diabetes', 'glucose', 'dizzy', 'shaky']
+    }
+    THRESHOLDS = {
+        'very_negative': -0.5,
+        'negative': -0.1,
+        'positive': 0.1
+    }
+
+    def screening_question(self, categories, snapshot=EMPTY_SESSION):
+        known = snapshot.known_factors
+
+        # Check for recent events/stressors
+        if 'recent_events' in categories and 'recent_events' not in known:
+            return "It sounds like you're going through something challenging. Can you tell me about any recent changes or stressful events in your life? This could include work, relationships, family, health, or financial situations."
+
+        # Check for sleep patterns
+        if 'sleep' in categories and 'sleep_hours' not in known:
+            return "I notice you mentioned sleep. How many hours of sleep do you typically get per night?"
+
+        # Check for mental health history
+        if 'mental_health' in categories and 'mental_health_history' not in known:
+            return "It sounds like you may have experience with mental health support. Do you have any diagnosed mental health conditions?"
+
+        # Check for blood sugar/diabetes
+        if 'blood_sugar' in categories and 'blood_sugar_issues' not in known:
+            return "I'm wondering about your physical health. Do you have any issues with blood sugar or diabetes?"
+
+        return None
+
+    def decide(self, classification, snapshot=EMPTY_SESSION):
+        sentiment = classification.sentiment
+
+        # Check for health factor questions
+        health_question = self.screening_question(classification.categories, snapshot)
+        if health_question:
+            return {
+                'reply': health_question,
+                'sentiment': 'assessment',
+                'type': 'health_screening'
+            }
+
+        # Crisis detection
+        if classification.crisis:
+            return {
+                'reply': 'I\'m very concerned about you. Please reach out for immediate help.',
+                'sentiment': 'crisis',
+                'emergency': True
+            }
+
+        # Sentiment-based responses
+        if sentiment == 'very_negative':
+            return {
+                'reply': 'I can sense you\'re going through a really difficult time. Your pain is real and valid. Would you like to talk about what\'s weighing on you most right now?',
+                'sentiment': sentiment,
+                'suggestions': ['Deep breathing exercises', 'Call a trusted friend', 'Consider professional support']
+            }
+
+        elif sentiment == 'negative':
+            return {
+                'reply': 'I hear that things are tough for you right now. It takes strength to reach out. What\'s been the hardest part of your day?',
+                'sentiment': sentiment,
+                'suggestions': ['Take a short walk', 'Practice mindfulness', 'Journal your thoughts']
+            }
+
+        elif sentiment == 'positive':
+            return {
+                'reply': 'I\'m glad to hear some positivity in your message! It\'s wonderful when we can find moments of light. What\'s been going well for you?',
+                'sentiment': sentiment,
+                'suggestions': ['Keep doing what\'s working', 'Share your positivity', 'Build on this momentum']
+            }
+
+        else:
+            return {
+                'reply': 'Thank you for sharing with me. I\'m here to listen and support you. What would be most helpful right now?',
+                'sentiment': sentiment,
+                'suggestions': ['Take things one step at a time', 'Focus on self-care', 'Reach out when you need support']
+            }
+
+
+@lru_cache(maxsize=32)
+def _build(engine_class, frozen_lexicons, frozen_thresholds, sentiment):
+    return engine_class(dict(frozen_lexicons), dict(frozen_thresholds), sentiment)
+
+
+def get_engine(engine_class, lexicons=None, thresholds=None, sentiment=None):
+    """
+    Shared engine for a configuration; lexicons and thresholds override the
+    class defaults, and sentiment defaults to the shared sentiment service
+    """
+    # Keyed on the full configuration, so overrides equal to the defaults
+    # (as in a pickled engine) map to the same engine
+    merged_lexicons = dict(engine_class.LEXICONS)
+    merged_lexicons.update(lexicons or {})
+    merged_thresholds = dict(engine_class.THRESHOLDS)
+    merged_thresholds.update(thresholds or {})
+    return _build(
+        engine_class,
+        tuple((category, tuple(phrases)) for category, phrases in merged_lexicons.items()),
+        tuple(merged_thresholds.items()),
+        sentiment or shared_sentiment
+    )
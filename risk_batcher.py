@@ -0,0 +1,131 @@
+# Micro-batching for single-row risk predictions.
+#
+# Concurrent callers each hand in one (age, imc) row. When nothing else is
+# queued or running the row is scored directly on the caller's thread; under
+# load, rows are queued for up to max_wait seconds (or until max_batch rows
+# are waiting) and scored together in one forward pass by a worker thread.
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, score_fn, max_batch=64, max_wait=0.002):
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+        self._pending = []
+        self._inflight = 0
+        self._cond = threading.Condition()
+        self._worker = None
+
+        self.direct_calls = 0
+        self.batches = 0
+        self.rows = 0
+        self.batch_sizes = {}
+        self.queue_wait_seconds = 0.0
+        self.max_queue_wait_seconds = 0.0
+
+    def submit(self, row):
+        """
+        Score one row; returns a Future resolving to its probability row
+        """
+        future = Future()
+        with self._cond:
+            direct = not self._pending and self._inflight == 0
+            if direct:
+                self._inflight += 1
+                self.direct_calls += 1
+            else:
+                self._pending.append((row, future, time.perf_counter()))
+                self._ensure_worker()
+                self._cond.notify()
+
+        if direct:
+            try:
+                self._execute([(row, future, None)])
+            finally:
+                with self._cond:
+                    self._inflight -= 1
+        return future
+
+    def predict(self, row):
+        return self.submit(row).result()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='risk-micro-batcher', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+                # Hold the batch open until it is full or the oldest row has waited max_wait
+                deadline = self._pending[0][2] + self.max_wait
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                self._inflight += 1
+
+            try:
+                self._execute(batch)
+            finally:
+                with self._cond:
+                    self._inflight -= 1
+
+    def _execute(self, batch):
+        started = time.perf_counter()
+        try:
+            probabilities = self.score_fn(np.array([row for row, _, _ in batch], dtype=np.float64))
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        finally:
+            self._record(batch, started)
+
+        for i, (_, future, _) in enumerate(batch):
+            future.set_result(probabilities[i])
+
+    def _record(self, batch, started):
+        size = len(batch)
+        # Power-of-two buckets: 1, 2, 4, ... max_batch
+        bucket = 1
+        while bucket < size:
+            bucket *= 2
+        with self._cond:
+            self.batches += 1
+            self.rows += size
+            self.batch_sizes[bucket] = self.batch_sizes.get(bucket, 0) + 1
+            for _, _, enqueued in batch:
+                if enqueued is None:
+                    continue
+                wait = started - enqueued
+                self.queue_wait_seconds += wait
+                self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, wait)
+
+    def stats(self):
+        with self._cond:
+            queued_rows = self.rows - self.direct_calls
+            return {
+                'max_batch': self.max_batch,
+                'max_wait_ms': self.max_wait * 1000,
+                'direct_calls': self.direct_calls,
+                'batches': self.batches,
+                'rows': self.rows,
+                'pending': len(self._pending),
+                'batch_size_histogram': {str(k): v for k, v in sorted(self.batch_sizes.items())},
+                'mean_queue_wait_ms': (self.queue_wait_seconds / queued_rows * 1000) if queued_rows else 0.0,
+                'max_queue_wait_ms': self.max_queue_wait_seconds * 1000,
+            }
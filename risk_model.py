@@ -1,176 +1,269 @@
-# Mental Health Risk Prediction Model using TensorFlow
-import pandas as pd
-import tensorflow as tf
-import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import classification_report, confusion_matrix
-import joblib
-import os
-
-# Set random seeds for reproducibility
-np.random.seed(42)
-tf.random.set_seed(42)
-
-try:
-    print("Loading and preprocessing data...")
-    # Load data
-    data = pd.read_csv(r'C:\Users\vaish\OneDrive\Desktop\Early detection of mental health\processed_real_data.csv')
-    
-    # Remove rows with missing values in key columns
-    data = data.dropna(subset=['Age', 'IMC', 'risk_level'])
-    print(f"Data shape after removing missing values: {data.shape}")
-    
-    # Features and target
-    X = data[['Age', 'IMC']]
-    y = data['risk_level']
-    
-    print(f"Feature columns: {X.columns.tolist()}")
-    print(f"Target distribution: {y.value_counts().to_dict()}")
-    
-    # Scale features
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_scaled, y, test_size=0.2, random_state=42, stratify=y
-    )
-    
-    print(f"Training set shape: {X_train.shape}")
-    print(f"Test set shape: {X_test.shape}")
-    
-    # Create TensorFlow model
-    print("\nBuilding TensorFlow model...")
-    model = tf.keras.Sequential([
-        tf.keras.layers.Input(shape=(X_train.shape[1],)),
-        tf.keras.layers.Dense(64, activation='relu', name='hidden_layer_1'),
-        tf.keras.layers.Dropout(0.3, name='dropout_1'),
-        tf.keras.layers.Dense(32, activation='relu', name='hidden_layer_2'),
-        tf.keras.layers.Dropout(0.2, name='dropout_2'),
-        tf.keras.layers.Dense(16, activation='relu', name='hidden_layer_3'),
-        tf.keras.layers.Dense(3, activation='softmax', name='output_layer')
-    ])
-    
-    # Compile model
-    model.compile(
-        optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
-        loss='sparse_categorical_crossentropy',
-        metrics=['accuracy']
-    )
-    
-    print("\nModel Architecture:")
-    model.summary()
-    
-    # Add callbacks
-    callbacks = [
-        tf.keras.callbacks.EarlyStopping(
-            monitor='val_loss',
-            patience=10,
-            restore_best_weights=True
-        ),
-        tf.keras.callbacks.ReduceLROnPlateau(
-            monitor='val_loss',
-            factor=0.5,
-            patience=5,
-            min_lr=0.0001
-        )
-    ]
-    
-    # Train model
-    print("\nTraining model...")
-    history = model.fit(
-        X_train, y_train,
-        epochs=100,
-        batch_size=32,
-        validation_data=(X_test, y_test),
-        callbacks=callbacks,
-        verbose=1
-    )
-    
-    # Evaluate model
-    print("\nEvaluating model...")
-    test_loss, test_accuracy = model.evaluate(X_test, y_test, verbose=0)
-    print(f"Test Accuracy: {test_accuracy:.4f}")
-    print(f"Test Loss: {test_loss:.4f}")
-    
-    # Make predictions
-    y_pred = model.predict(X_test, verbose=0)
-    y_pred_classes = np.argmax(y_pred, axis=1)
-    
-    # Print classification report
-    print("\nClassification Report:")
-    print(classification_report(y_test, y_pred_classes))
-    
-    # Print confusion matrix
-    print("\nConfusion Matrix:")
-    print(confusion_matrix(y_test, y_pred_classes))
-    
-    # Save model and scaler
-    print("\nSaving model and scaler...")
-    model.save('mental_health_risk_model.keras')
-    joblib.dump(scaler, 'scaler.pkl')
-    
-    print("\n" + "="*50)
-    print("MODEL TRAINING COMPLETED SUCCESSFULLY!")
-    print("="*50)
-    print(f"Model saved as: mental_health_risk_model.keras")
-    print(f"Scaler saved as: scaler.pkl")
-    print(f"Final Accuracy: {test_accuracy:.2%}")
-    print("="*50)
-    
-except Exception as e:
-    print(f"Error during training: {str(e)}")
-    exit(1)
-
-# Function to make predictions on new data
-def predict_risk(age, imc, model_path='mental_health_risk_model.keras', scaler_path='scaler.pkl'):
-    """
-    Predict mental health risk for given age and IMC values
-    """
-    try:
-        # Load model and scaler
-        if not os.path.exists(model_path) or not os.path.exists(scaler_path):
-            raise FileNotFoundError("Model or scaler file not found")
-            
-        model = tf.keras.models.load_model(model_path)
-        scaler = joblib.load(scaler_path)
-        
-        # Prepare input data
-        input_data = np.array([[age, imc]])
-        input_scaled = scaler.transform(input_data)
-        
-        # Make prediction
-        prediction = model.predict(input_scaled, verbose=0)
-        risk_level = np.argmax(prediction, axis=1)[0]
-        confidence = np.max(prediction, axis=1)[0]
-        
-        risk_labels = {0: 'Low Risk', 1: 'Medium Risk', 2: 'High Risk'}
-        
-        return {
-            'risk_level': risk_labels[risk_level],
-            'confidence': float(confidence),
-            'probabilities': {
-                'Low Risk': float(prediction[0][0]),
-                'Medium Risk': float(prediction[0][1]),
-                'High Risk': float(prediction[0][2])
-            }
-        }
-    except Exception as e:
-        return {'error': str(e)}
-
-# Test prediction function
-if __name__ == "__main__":
-    print("\nTesting prediction function...")
-    example_result = predict_risk(25, 22.5)
-    
-    if 'error' not in example_result:
-        print(f"Age: 25, IMC: 22.5")
-        print(f"Predicted Risk: {example_result['risk_level']}")
-        print(f"Confidence: {example_result['confidence']:.2%}")
-        print("Probabilities:")
-        for risk, prob in example_result['probabilities'].items():
-            print(f"  {risk}: {prob:.2%}")
-        print("\nModel is ready for deployment!")
-    else:
-        print(f"Prediction error: {example_result['error']}")
\ No newline at end of file
+# Mental health risk model - inference
+#
+# This module only loads the trained artifacts; training lives in
+# train_risk_model.py. TensorFlow and joblib are imported on first prediction
+# so importing this module stays cheap for the server and Streamlit workers.
+#
+# The scoring backend is chosen with the RISK_MODEL_BACKEND environment
+# variable: 'numpy' runs the exported weights (numpy_risk_model.py) without
+# TensorFlow, 'keras' loads the saved Keras model, 'tflite' runs the float16
+# or int8 TFLite export (tflite_risk_model.py, RISK_MODEL_TFLITE picks the
+# file) on a lightweight interpreter, and 'rule' evaluates the
+# threshold rule the labels were derived from (rule_risk_model.py) for
+# high-volume screening; benchmark_risk_scorers.py reports how closely it
+# agrees with the MLP. The default, 'auto', uses numpy whenever the exported
+# weights file exists. Other scorers can be added with register_backend().
+import math
+import os
+
+import numpy as np
+
+from features import FEATURE_COLUMNS
+from model_registry import registry
+from request_tracing import span
+from numpy_risk_model import DEFAULT_WEIGHTS_PATH, NumpyRiskModel
+from risk_batcher import MicroBatcher
+from rule_risk_model import DEFAULT_RULE_PATH, RuleRiskModel
+from tflite_risk_model import DEFAULT_TFLITE_PATH, TFLiteRiskModel
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL_PATH = os.path.join(BASE_DIR, 'mental_health_risk_model.keras')
+DEFAULT_SCALER_PATH = os.path.join(BASE_DIR, 'scaler.pkl')
+BACKEND = os.environ.get('RISK_MODEL_BACKEND', 'auto')
+
+RISK_LABELS = ['Low Risk', 'Medium Risk', 'High Risk']
+
+
+def load_model(model_path=DEFAULT_MODEL_PATH):
+    import tensorflow as tf
+    return tf.keras.models.load_model(model_path)
+
+
+def load_scaler(scaler_path=DEFAULT_SCALER_PATH):
+    import joblib
+    return joblib.load(scaler_path)
+
+
+class KerasRiskModel:
+    def __init__(self, model, scaler):
+        self.model = model
+        self.scaler = scaler
+
+    def predict_proba(self, X):
+        # predict_on_batch skips the per-call overhead of predict()
+        return np.asarray(self.model.predict_on_batch(self.scaler.transform(X)))
+
+
+# Artifacts are loaded once per process and reloaded only when the files change
+def _numpy_backend(weights_path=DEFAULT_WEIGHTS_PATH, **paths):
+    return registry.get(weights_path, NumpyRiskModel.load)
+
+
+def _keras_backend(model_path=DEFAULT_MODEL_PATH, scaler_path=DEFAULT_SCALER_PATH, **paths):
+    return KerasRiskModel(registry.get(model_path, load_model), registry.get(scaler_path, load_scaler))
+
+
+def _tflite_backend(tflite_path=DEFAULT_TFLITE_PATH, **paths):
+    return registry.get(tflite_path, TFLiteRiskModel.load)
+
+
+def _rule_backend(rule_path=DEFAULT_RULE_PATH, **paths):
+    # The uncalibrated rule still yields the right levels
+    if not os.path.exists(rule_path):
+        return RuleRiskModel()
+    return registry.get(rule_path, RuleRiskModel.load)
+
+
+# name -> factory(**artifact paths) returning a scorer whose predict_proba(X)
+# takes raw (n, 2) Age/IMC rows and returns (n, 3) class probabilities
+BACKENDS = {
+    'numpy': _numpy_backend,
+    'keras': _keras_backend,
+    'tflite': _tflite_backend,
+    'rule': _rule_backend,
+}
+
+
+def register_backend(name, factory):
+    BACKENDS[name] = factory
+
+
+def resolve_backend(backend=None, weights_path=DEFAULT_WEIGHTS_PATH):
+    backend = backend or BACKEND
+    if backend == 'auto':
+        backend = 'numpy' if os.path.exists(weights_path) else 'keras'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown risk model backend '{backend}'")
+    return backend
+
+
+def get_scorer(backend=None, model_path=DEFAULT_MODEL_PATH, scaler_path=DEFAULT_SCALER_PATH,
+               weights_path=DEFAULT_WEIGHTS_PATH, rule_path=DEFAULT_RULE_PATH, tflite_path=DEFAULT_TFLITE_PATH):
+    factory = BACKENDS[resolve_backend(backend, weights_path)]
+    return factory(model_path=model_path, scaler_path=scaler_path, weights_path=weights_path,
+                   rule_path=rule_path, tflite_path=tflite_path)
+
+
+def predict_proba(X, backend=None, model_path=DEFAULT_MODEL_PATH, scaler_path=DEFAULT_SCALER_PATH,
+                  weights_path=DEFAULT_WEIGHTS_PATH, rule_path=DEFAULT_RULE_PATH, tflite_path=DEFAULT_TFLITE_PATH):
+    """
+    Class probabilities for an (n, 2) array of raw Age/IMC rows
+    """
+    X = np.asarray(X, dtype=np.float64).reshape(-1, len(FEATURE_COLUMNS))
+    scorer = get_scorer(backend, model_path, scaler_path, weights_path, rule_path, tflite_path)
+    return scorer.predict_proba(X)
+
+
+def format_prediction(probabilities):
+    """
+    Turn one row of class probabilities into the predict_risk response dict
+    """
+    # max() over indexes works on lists and arrays alike and, like argmax,
+    # keeps the first of tied classes
+    risk_level = max(range(len(RISK_LABELS)), key=probabilities.__getitem__)
+    return {
+        'risk_level': RISK_LABELS[risk_level],
+        'confidence': float(probabilities[risk_level]),
+        'probabilities': {
+            label: float(probabilities[i]) for i, label in enumerate(RISK_LABELS)
+        }
+    }
+
+
+# Coalesces concurrent single-row predictions made with the default artifacts
+batcher = MicroBatcher(
+    predict_proba,
+    max_batch=int(os.environ.get('RISK_BATCH_MAX_ROWS', 64)),
+    max_wait=float(os.environ.get('RISK_BATCH_WINDOW_MS', 2)) / 1000
+)
+BATCHING = os.environ.get('RISK_BATCHING', 'auto')
+
+
+def batching_enabled():
+    # Batching pays off when each call has a large fixed cost (Keras); the
+    # NumPy forward pass is cheaper than the queue hand-off, so 'auto' skips it
+    if BATCHING == 'auto':
+        return resolve_backend() == 'keras'
+    return BATCHING == 'on'
+
+
+# Function to make predictions on new data
+def predict_risk(age, imc, model_path=DEFAULT_MODEL_PATH, scaler_path=DEFAULT_SCALER_PATH,
+                 weights_path=DEFAULT_WEIGHTS_PATH, backend=None, batched=False, rule_path=DEFAULT_RULE_PATH,
+                 tflite_path=DEFAULT_TFLITE_PATH):
+    """
+    Predict mental health risk for given age and IMC values. With batched=True
+    the row goes through the shared micro-batcher (default artifacts only).
+    """
+    try:
+        with span('inference'):
+            if batched:
+                # Includes the wait for the batch to fill
+                probabilities = batcher.predict((age, imc))
+            else:
+                scorer = get_scorer(backend, model_path, scaler_path, weights_path, rule_path, tflite_path)
+                # Scorers with a scalar score() (the rule) skip array set-up for one row
+                if hasattr(scorer, 'score'):
+                    probabilities = scorer.score(float(age), float(imc))
+                else:
+                    probabilities = scorer.predict_proba(np.array([[age, imc]], dtype=np.float64))[0]
+        return format_prediction(probabilities)
+    except Exception as e:
+        return {'error': str(e)}
+
+
+def _parse_number(value, name):
+    # Plain JSON numbers are the common case; strings like "25" are accepted too
+    if value is None or value == '':
+        raise ValueError(f'{name} is required')
+    if isinstance(value, bool):
+        raise ValueError(f'{name} must be a number')
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a number')
+    if not math.isfinite(value):
+        raise ValueError(f'{name} must be a finite number')
+    return value
+
+
+def parse_record(record):
+    """
+    Validate one batch record ({'age': ..., 'bmi': ...}) and return (age, imc)
+    """
+    if isinstance(record, Exception):
+        raise ValueError(str(record))
+    if not isinstance(record, dict):
+        raise ValueError('Record must be a JSON object')
+
+    bmi = record.get('bmi')
+    if bmi is None:
+        bmi = record.get('imc')
+    return _parse_number(record.get('age'), 'age'), _parse_number(bmi, 'bmi')
+
+
+def score_records(records, chunk_size=4096, backend=None):
+    """
+    Score an iterable of records, yielding one result dict per record in
+    input order. Valid rows are scaled and scored one chunk at a time with a
+    single vectorized forward pass; invalid rows get an 'error' entry.
+    """
+    chunk = []
+    offset = 0
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield from _score_chunk(chunk, offset, backend)
+            offset += len(chunk)
+            chunk = []
+    if chunk:
+        yield from _score_chunk(chunk, offset, backend)
+
+
+def _score_chunk(chunk, offset, backend):
+    rows = []
+    errors = {}
+    for i, record in enumerate(chunk):
+        try:
+            rows.append(parse_record(record))
+        except ValueError as e:
+            errors[i] = str(e)
+
+    if rows:
+        with span('inference'):
+            probabilities = predict_proba(rows, backend=backend)
+        levels = probabilities.argmax(axis=1).tolist()
+        probabilities = probabilities.tolist()
+
+    row = 0
+    for i, record in enumerate(chunk):
+        result = {'index': offset + i}
+        if isinstance(record, dict) and 'id' in record:
+            result['id'] = record['id']
+        if i in errors:
+            result['error'] = errors[i]
+        else:
+            p = probabilities[row]
+            level = levels[row]
+            result['risk_level'] = RISK_LABELS[level]
+            result['confidence'] = p[level]
+            result['probabilities'] = dict(zip(RISK_LABELS, p))
+            row += 1
+        yield result
+
+
+# Test prediction function
+if __name__ == "__main__":
+    print("\nTesting prediction function...")
+    example_result = predict_risk(25, 22.5)
+
+    if 'error' not in example_result:
+        print(f"Age: 25, IMC: 22.5")
+        print(f"Predicted Risk: {example_result['risk_level']}")
+        print(f"Confidence: {example_result['confidence']:.2%}")
+        print("Probabilities:")
+        for risk, prob in example_result['probabilities'].items():
+            print(f"  {risk}: {prob:.2%}")
+        print("\nModel is ready for deployment!")
+    else:
+        print(f"Prediction error: {example_result['error']}")
@@ -0,0 +1,126 @@
+# Closed-form risk scorer.
+#
+# risk_level in the training data is a threshold rule on Age + IMC
+# (load_real_data.assign_risk_levels: < 40 low, < 50 medium, else high), so
+# the MLP is learning a piecewise-linear boundary. This scorer evaluates the
+# rule directly and turns it into probabilities with an ordinal logistic on
+# s = Age + IMC:
+#
+#   P(level >= medium) = sigmoid((s - 40) / temperature)
+#   P(level >= high)   = sigmoid((s - 50) / temperature)
+#
+# The temperature is fitted to the training labels (the noise rows added by
+# preprocessing are what keep it above zero) and stored in
+# rule_risk_model.json. Scoring needs nothing beyond NumPy, and score() is a
+# few float operations per row.
+#
+#   python rule_risk_model.py --data processed_real_data.feather
+import argparse
+import json
+import math
+import os
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RULE_PATH = os.path.join(BASE_DIR, 'rule_risk_model.json')
+
+# Same cut points as load_real_data.RISK_THRESHOLDS
+DEFAULT_THRESHOLDS = (40.0, 50.0)
+DEFAULT_TEMPERATURE = 1.0
+
+
+def _sigmoid(x):
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1.0 + z)
+
+
+class RuleRiskModel:
+    def __init__(self, thresholds=DEFAULT_THRESHOLDS, temperature=DEFAULT_TEMPERATURE):
+        if temperature <= 0:
+            raise ValueError('temperature must be positive')
+        self.thresholds = tuple(float(t) for t in thresholds)
+        self.temperature = float(temperature)
+
+    @classmethod
+    def load(cls, path=DEFAULT_RULE_PATH):
+        with open(path, encoding='utf-8') as f:
+            params = json.load(f)
+        return cls(params['thresholds'], params['temperature'])
+
+    def save(self, path=DEFAULT_RULE_PATH):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'thresholds': list(self.thresholds), 'temperature': self.temperature}, f, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def calibrate(cls, age, imc, labels, thresholds=DEFAULT_THRESHOLDS, temperatures=None):
+        """
+        Pick the temperature with the lowest log loss on labelled rows
+        """
+        X = np.column_stack([np.asarray(age, dtype=np.float64), np.asarray(imc, dtype=np.float64)])
+        labels = np.asarray(labels, dtype=np.int64)
+        if temperatures is None:
+            temperatures = np.logspace(-3, 1, 81)
+
+        best, best_loss = None, math.inf
+        rows = np.arange(len(labels))
+        for temperature in temperatures:
+            model = cls(thresholds, temperature)
+            p = model.predict_proba(X)[rows, labels]
+            loss = -np.log(np.clip(p, 1e-12, 1.0)).mean()
+            if loss < best_loss:
+                best, best_loss = model, loss
+        return best
+
+    def predict_levels(self, X):
+        """
+        Risk level (0, 1, 2) for raw Age/IMC rows, exactly as preprocessing assigns it
+        """
+        X = np.asarray(X, dtype=np.float64).reshape(-1, 2)
+        s = X[:, 0] + X[:, 1]
+        low, medium = self.thresholds
+        return np.select([s < low, s < medium], [0, 1], default=2)
+
+    def predict_proba(self, X):
+        """
+        Class probabilities for raw (unscaled) Age/IMC rows. Exactly on a
+        cut point the two neighbouring classes tie at 0.5.
+        """
+        X = np.asarray(X, dtype=np.float64).reshape(-1, 2)
+        s = X[:, 0] + X[:, 1]
+        # tanh form of the sigmoid does not overflow for far-off rows
+        at_least = 0.5 + 0.5 * np.tanh((s[:, None] - np.array(self.thresholds)) / (2 * self.temperature))
+        # Cumulative probabilities may cross only through rounding; keep them ordered
+        at_least[:, 1] = np.minimum(at_least[:, 1], at_least[:, 0])
+        return np.column_stack([1.0 - at_least[:, 0], at_least[:, 0] - at_least[:, 1], at_least[:, 1]])
+
+    def score(self, age, imc):
+        """
+        [low, medium, high] probabilities for one row in plain Python
+        """
+        s = age + imc
+        medium = _sigmoid((s - self.thresholds[0]) / self.temperature)
+        high = min(_sigmoid((s - self.thresholds[1]) / self.temperature), medium)
+        return [1.0 - medium, medium - high, high]
+
+
+if __name__ == "__main__":
+    from training_data import load_training_data
+
+    parser = argparse.ArgumentParser(description='Calibrate the closed-form risk scorer')
+    parser.add_argument('--data', default=None, help='Training data (default: SAFE_AI_TRAINING_DATA)')
+    parser.add_argument('--output', default=DEFAULT_RULE_PATH)
+    args = parser.parse_args()
+
+    X, y = load_training_data(args.data)
+    model = RuleRiskModel.calibrate(X['Age'], X['IMC'], y)
+    accuracy = float((model.predict_levels(X.to_numpy()) == y.to_numpy()).mean())
+    model.save(args.output)
+    print(f"Temperature: {model.temperature:.4f}")
+    print(f"Rule accuracy on training labels: {accuracy:.2%}")
+    print(f"Rule parameters saved as: {args.output}")
@@ -1,15 +1,134 @@
-from flask import Flask, request, jsonify, render_template_string, send_from_directory
+from flask import (Flask, Response, g, request, jsonify, render_template_string, send_file,
+                   stream_with_context)
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from trauma_app import TraumaInformedApp
-from risk_model import predict_risk
+from risk_model import predict_risk, score_records, batcher, batching_enabled
+from model_registry import registry
+from sentiment_service import sentiment_service
+from session_store import (SESSION_COOKIE, SESSION_HEADER, MemorySessionBackend,
+                           SQLiteSessionBackend, SessionManager)
+from report_jobs import DONE, FAILED, QueueFull, ReportJobQueue, SQLiteJobStore
+from trauma_chatbot import render_trauma_report
+from report_renderer import renderer
+from request_tracing import PROFILE_HEADER, request_span, tracer
+import io
 import os
 import json
 
+class TracedJSONProvider(DefaultJSONProvider):
+    # jsonify() goes through dumps(); time it as the 'json' stage of the
+    # request, skipping encodes outside one (e.g. test client request bodies)
+    def dumps(self, obj, **kwargs):
+        with request_span('json'):
+            return super().dumps(obj, **kwargs)
+
 app = Flask(__name__)
-CORS(app)
+app.json = TracedJSONProvider(app)
+CORS(app, expose_headers=[SESSION_HEADER, 'Server-Timing'])
+
+def session_size(safe_ai_app):
+    # Rough per-session footprint used for the memory cap
+    return 2048 + safe_ai_app.chatbot.conversation_history.memory_size()
+
+# Older turns of server conversations spill here; an empty
+# SAFE_AI_HISTORY_DIR drops them instead
+HISTORY_DIR = os.environ.get('SAFE_AI_HISTORY_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history'))
+
+def new_session_app():
+    # Only sessions spill: the session store discards the log on eviction
+    safe_ai_app = TraumaInformedApp()
+    safe_ai_app.chatbot.conversation_history.spill_dir = HISTORY_DIR
+    return safe_ai_app
+
+def discard_history(safe_ai_app):
+    # Spilled turns are users' messages; remove them with the session
+    safe_ai_app.chatbot.conversation_history.discard()
+
+def shared_db_path():
+    # SAFE_AI_SESSION_BACKEND=sqlite shares sessions and report jobs between
+    # workers on one host; None means each worker keeps its own
+    if os.environ.get('SAFE_AI_SESSION_BACKEND', 'memory') != 'sqlite':
+        return None
+    return os.environ.get('SAFE_AI_SESSION_DB', os.path.join(os.path.dirname(__file__), 'sessions.db'))
+
+def create_session_manager():
+    db_path = shared_db_path()
+    if db_path:
+        backend = SQLiteSessionBackend(db_path)
+        evict_interval = 30
+    else:
+        backend = MemorySessionBackend()
+        evict_interval = 0
+    return SessionManager(
+        backend,
+        new_session_app,
+        max_sessions=int(os.environ.get('SAFE_AI_MAX_SESSIONS', 10000)),
+        idle_ttl=float(os.environ.get('SAFE_AI_SESSION_TTL', 1800)),
+        max_bytes=int(float(os.environ.get('SAFE_AI_SESSION_MAX_MB', 256)) * 1024 * 1024),
+        sizeof=session_size,
+        evict_interval=evict_interval,
+        on_evict=discard_history
+    )
+
+# Per-user SAFE AI state, keyed by session token
+sessions = create_session_manager()
+
+def create_report_queue():
+    # PDFs are rendered off the request thread; SAFE_AI_REPORT_POOL=process
+    # moves rendering out of the server process entirely. Job state and PDFs
+    # go in the shared database with the sessions, so any worker can serve
+    # the status and download requests
+    db_path = shared_db_path()
+    return ReportJobQueue(
+        render_trauma_report,
+        max_workers=int(os.environ.get('SAFE_AI_REPORT_WORKERS', 2)),
+        max_pending=int(os.environ.get('SAFE_AI_REPORT_MAX_PENDING', 32)),
+        job_ttl=float(os.environ.get('SAFE_AI_REPORT_TTL', 3600)),
+        use_processes=os.environ.get('SAFE_AI_REPORT_POOL', 'thread') == 'process',
+        store=SQLiteJobStore(db_path) if db_path else None
+    )
+
+report_jobs = create_report_queue()
 
-# Initialize SAFE AI app
-safe_ai_app = TraumaInformedApp()
+def request_session_token():
+    return request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+
+def current_session():
+    session_id, safe_ai_app = sessions.get(request_session_token())
+    if session_id == request_session_token():
+        # An existing session; get() never adopts a client-chosen token.
+        # New sessions only get a cookie once save_session() stores them
+        g.session_id = session_id
+    return session_id, safe_ai_app
+
+def save_session(session_id, safe_ai_app):
+    sessions.save(session_id, safe_ai_app)
+    g.session_id = session_id
+
+@app.after_request
+def attach_session(response):
+    session_id = g.get('session_id')
+    if session_id:
+        response.headers[SESSION_HEADER] = session_id
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite='Lax')
+    return response
+
+@app.before_request
+def begin_trace():
+    tracer.begin_request(request.headers.get(PROFILE_HEADER))
+
+@app.after_request
+def end_trace(response):
+    # Streamed bodies (the batch endpoint) are timed up to the first byte
+    server_timing = tracer.end_request(request.endpoint or 'unknown', response.status_code)
+    if server_timing is not None:
+        response.headers['Server-Timing'] = server_timing
+    return response
+
+@app.route('/metrics')
+def metrics():
+    return Response(tracer.render_metrics(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def index():
@@ -26,7 +145,9 @@ def chat():
             return jsonify({'error': 'No message provided'}), 400
         
         # Get response from SAFE AI
+        session_id, safe_ai_app = current_session()
         response = safe_ai_app.chat(message)
+        save_session(session_id, safe_ai_app)
         
         return jsonify({
             'reply': response['reply'],
@@ -51,7 +172,7 @@ def risk_assessment():
             return jsonify({'error': 'Age and BMI are required'}), 400
         
         # Get risk prediction
-        risk_result = predict_risk(float(age), float(bmi))
+        risk_result = predict_risk(float(age), float(bmi), batched=batching_enabled())
         
         if 'error' in risk_result:
             return jsonify({'error': 'Risk model not available'}), 500
@@ -61,37 +182,121 @@ def risk_assessment():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def read_batch_records():
+    # NDJSON: one record per line, parsed lazily so large uploads are not held twice
+    content_type = request.content_type or ''
+    if 'ndjson' in content_type or 'jsonlines' in content_type:
+        def records():
+            # Werkzeug's input stream reads lines in tiny pieces; buffer it
+            for line in io.BufferedReader(request.stream, buffer_size=1 << 16):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield ValueError('Invalid JSON')
+        return records()
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('records')
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array of records or NDJSON')
+    return data
+
+@app.route('/api/risk-assessment-batch', methods=['POST'])
+def risk_assessment_batch():
+    try:
+        records = read_batch_records()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Results stream back as NDJSON in input order, one line per record,
+    # flushed in blocks so the WSGI server is not handed one tiny write per row
+    def generate():
+        lines = []
+        try:
+            for result in score_records(records):
+                lines.append(json.dumps(result))
+                if len(lines) >= 1024:
+                    yield '\n'.join(lines) + '\n'
+                    lines = []
+        except Exception as e:
+            lines.append(json.dumps({'error': str(e)}))
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/model-stats')
+def model_stats():
+    stats = registry.stats()
+    stats['micro_batcher'] = batcher.stats()
+    stats['sessions'] = sessions.stats()
+    stats['sentiment'] = sentiment_service.stats()
+    stats['report_jobs'] = report_jobs.stats()
+    stats['report_renderer'] = renderer.stats()
+    return jsonify(stats)
+
 @app.route('/api/generate-report', methods=['POST'])
 def generate_report():
     try:
-        if not safe_ai_app.chatbot.conversation_history:
+        session_id, safe_ai_app = current_session()
+        report_data = safe_ai_app.build_report_data()
+        if report_data is None:
             return jsonify({'error': 'No conversation data available'}), 400
         
-        # Generate trauma support report
-        result = safe_ai_app.generate_trauma_report()
+        # Queue the trauma support report; the client polls status_url
+        job = report_jobs.submit(session_id, report_data)
         
         return jsonify({
-            'message': 'Report generated successfully',
-            'path': result,
-            'download_url': '/api/download-report'
-        })
+            'message': 'Report generation started',
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': f'/api/report-status/{job.id}',
+            'download_url': f'/api/download-report/{job.id}'
+        }), 202
     
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/download-report')
-def download_report():
+@app.route('/api/report-status/<job_id>')
+def report_status(job_id):
     try:
-        report_path = os.path.join(os.path.dirname(__file__), "trauma_support_report.pdf")
-        if os.path.exists(report_path):
-            return send_from_directory(
-                os.path.dirname(__file__), 
-                "trauma_support_report.pdf",
-                as_attachment=True,
-                download_name="safe_ai_trauma_report.pdf"
-            )
-        else:
+        session_id, safe_ai_app = current_session()
+        job = report_jobs.get(job_id, session_id)
+        if job is None:
             return jsonify({'error': 'Report not found'}), 404
+        
+        status = job.to_dict()
+        if job.status == DONE:
+            status['download_url'] = f'/api/download-report/{job.id}'
+        return jsonify(status)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/download-report/<job_id>')
+def download_report(job_id):
+    try:
+        session_id, safe_ai_app = current_session()
+        job = report_jobs.get(job_id, session_id)
+        if job is None:
+            return jsonify({'error': 'Report not found'}), 404
+        if job.status == FAILED:
+            return jsonify(job.to_dict()), 500
+        if job.status != DONE:
+            return jsonify(job.to_dict()), 409
+        
+        return send_file(
+            io.BytesIO(job.pdf),
+            mimetype='application/pdf',
+            as_attachment=True,
+            download_name="safe_ai_trauma_report.pdf"
+        )
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -99,30 +304,9 @@ def download_report():
 @app.route('/api/conversation-stats')
 def conversation_stats():
     try:
-        history = safe_ai_app.chatbot.conversation_history
-        
-        if not history:
-            return jsonify({
-                'total_messages': 0,
-                'trauma_indicators': 0,
-                'crisis_indicators': 0,
-                'sentiment_breakdown': {}
-            })
-        
-        sentiments = [entry['sentiment'] for entry in history]
-        trauma_indicators = sum(1 for entry in history 
-                              if entry.get('trauma_indicator') is not None)
-        
-        sentiment_counts = {}
-        for sentiment in sentiments:
-            sentiment_counts[sentiment] = sentiment_counts.get(sentiment, 0) + 1
-        
-        return jsonify({
-            'total_messages': len(history),
-            'trauma_indicators': trauma_indicators,
-            'crisis_indicators': sentiment_counts.get('crisis', 0),
-            'sentiment_breakdown': sentiment_counts
-        })
+        session_id, safe_ai_app = current_session()
+        # O(1): the chatbot keeps running totals as messages arrive
+        return jsonify(safe_ai_app.chatbot.stats.to_dict())
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -130,8 +314,9 @@ def conversation_stats():
 @app.route('/api/clear-conversation', methods=['POST'])
 def clear_conversation():
     try:
-        global safe_ai_app
-        safe_ai_app = TraumaInformedApp()
+        # Only this user's conversation is dropped; deleting the session
+        # also removes its spilled history
+        sessions.delete(request_session_token())
         return jsonify({'message': 'Conversation cleared successfully'})
     
     except Exception as e:
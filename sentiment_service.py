@@ -0,0 +1,113 @@
+# Shared sentiment scoring for the chatbots.
+#
+# The scoring backend (TextBlob by default) is imported on first use, and
+# polarity scores are kept in a bounded LRU cache keyed on the message with
+# whitespace normalized, so repeated or replayed messages are scored once.
+# The backend is chosen with the SENTIMENT_BACKEND environment variable.
+import os
+import threading
+import time
+from functools import lru_cache
+
+from request_tracing import span
+
+
+def _textblob_backend():
+    from textblob import TextBlob
+
+    def polarity(text):
+        return TextBlob(text).sentiment.polarity
+    return polarity
+
+
+def _lexicon_backend():
+    # Same lexicon and rules as TextBlob, roughly 15-20x faster per message
+    import lexicon_sentiment
+    return lexicon_sentiment.polarity
+
+
+# name -> factory returning a polarity(text) function
+BACKENDS = {
+    'textblob': _textblob_backend,
+    'lexicon': _lexicon_backend,
+}
+
+
+def register_backend(name, factory):
+    BACKENDS[name] = factory
+
+
+def normalize(message):
+    return ' '.join(message.split())
+
+
+class SentimentService:
+    def __init__(self, backend='textblob', cache_size=4096):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown sentiment backend '{backend}'")
+        self.backend = backend
+        self.cache_size = cache_size
+        self._polarity_fn = None
+        self._lock = threading.Lock()
+        self._cached = lru_cache(maxsize=cache_size)(self._score)
+        self.calls = 0
+        self.total_seconds = 0.0
+
+    def _backend_fn(self):
+        if self._polarity_fn is None:
+            with self._lock:
+                if self._polarity_fn is None:
+                    self._polarity_fn = BACKENDS[self.backend]()
+        return self._polarity_fn
+
+    def _score(self, text):
+        return self._backend_fn()(text)
+
+    def polarity(self, message):
+        start = time.perf_counter()
+        with span('sentiment'):
+            score = self._cached(normalize(message))
+        self.calls += 1
+        self.total_seconds += time.perf_counter() - start
+        return score
+
+    def analyze_many(self, messages):
+        """
+        Polarity for each message, in order; duplicates are scored once
+        """
+        start = time.perf_counter()
+        scores = {}
+        results = []
+        with span('sentiment'):
+            for message in messages:
+                text = normalize(message)
+                if text not in scores:
+                    scores[text] = self._cached(text)
+                results.append(scores[text])
+        self.calls += len(results)
+        self.total_seconds += time.perf_counter() - start
+        return results
+
+    def clear_cache(self):
+        self._cached.cache_clear()
+
+    def stats(self):
+        info = self._cached.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'backend': self.backend,
+            'calls': self.calls,
+            'cache_hits': info.hits,
+            'cache_misses': info.misses,
+            'cache_size': info.currsize,
+            'cache_max_size': info.maxsize,
+            'hit_rate': info.hits / lookups if lookups else 0.0,
+            'mean_latency_us': self.total_seconds / self.calls * 1e6 if self.calls else 0.0,
+        }
+
+
+# Shared by both chatbots in this process
+sentiment_service = SentimentService(
+    os.environ.get('SENTIMENT_BACKEND', 'textblob'),
+    cache_size=int(os.environ.get('SENTIMENT_CACHE_SIZE', 4096))
+)
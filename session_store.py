@@ -0,0 +1,233 @@
+# Per-user session state for the SAFE AI server.
+#
+# Each client gets its own chatbot state, looked up by an opaque session token.
+# Sessions are evicted least-recently-used first once there are more than
+# max_sessions or their estimated size passes max_bytes, and expire after
+# idle_ttl seconds without a request. Every state dropped that way, or by
+# delete(), is passed to the on_evict callback, which the server uses to
+# remove the conversation's spilled history from disk.
+#
+# Two backends are provided: an in-process dict (single worker) and a SQLite
+# file, which lets several Gunicorn workers on one host share sessions as a
+# local stand-in for a shared store.
+import pickle
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+SESSION_COOKIE = 'safe_ai_session'
+SESSION_HEADER = 'X-Session-Id'
+
+_TOKEN_RE = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+
+def new_session_id():
+    return secrets.token_urlsafe(24)
+
+
+def is_valid_session_id(session_id):
+    return bool(session_id) and _TOKEN_RE.match(session_id) is not None
+
+
+class MemorySessionBackend:
+    def __init__(self):
+        # session_id -> (state, last_access, size), oldest access first
+        self._sessions = OrderedDict()
+        self._total_bytes = 0
+
+    def load(self, session_id):
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None, None
+        return entry[0], entry[1]
+
+    def touch(self, session_id, now):
+        entry = self._sessions.pop(session_id, None)
+        if entry is not None:
+            self._sessions[session_id] = (entry[0], now, entry[2])
+
+    def store(self, session_id, state, now, size):
+        old = self._sessions.pop(session_id, None)
+        if old is not None:
+            self._total_bytes -= old[2]
+        self._sessions[session_id] = (state, now, size)
+        self._total_bytes += size
+
+    def delete(self, session_id):
+        old = self._sessions.pop(session_id, None)
+        if old is None:
+            return None
+        self._total_bytes -= old[2]
+        return old[0]
+
+    def evict(self, expire_before, max_sessions, max_bytes):
+        """
+        Drop expired and over-limit sessions; returns their states
+        """
+        evicted = []
+        while self._sessions:
+            session_id, (_, last_access, _) = next(iter(self._sessions.items()))
+            if (last_access >= expire_before and len(self._sessions) <= max_sessions
+                    and self._total_bytes <= max_bytes):
+                break
+            evicted.append(self.delete(session_id))
+        return evicted
+
+    def stats(self):
+        return {'sessions': len(self._sessions), 'bytes': self._total_bytes}
+
+
+class SQLiteSessionBackend:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            'session_id TEXT PRIMARY KEY, state BLOB NOT NULL, '
+            'last_access REAL NOT NULL, size INTEGER NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access)')
+        conn.commit()
+
+    def _conn(self):
+        # sqlite3 connections must stay on the thread that created them
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id):
+        row = self._conn().execute(
+            'SELECT state, last_access FROM sessions WHERE session_id = ?', (session_id,)
+        ).fetchone()
+        if row is None:
+            return None, None
+        return pickle.loads(row[0]), row[1]
+
+    def touch(self, session_id, now):
+        conn = self._conn()
+        conn.execute('UPDATE sessions SET last_access = ? WHERE session_id = ?', (now, session_id))
+        conn.commit()
+
+    def store(self, session_id, state, now, size=None):
+        blob = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO sessions (session_id, state, last_access, size) VALUES (?, ?, ?, ?)',
+            (session_id, blob, now, len(blob))
+        )
+        conn.commit()
+
+    def delete(self, session_id):
+        conn = self._conn()
+        row = conn.execute('SELECT state FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+        conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+        conn.commit()
+        return pickle.loads(row[0]) if row else None
+
+    def evict(self, expire_before, max_sessions, max_bytes):
+        """
+        Drop expired and over-limit sessions; returns their states
+        """
+        conn = self._conn()
+        to_delete = [row[0] for row in conn.execute(
+            'SELECT session_id FROM sessions WHERE last_access < ?', (expire_before,)
+        )]
+        count, total = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions WHERE last_access >= ?', (expire_before,)
+        ).fetchone()
+        if count > max_sessions or total > max_bytes:
+            # Walk from the least recently used live session until both limits hold
+            for session_id, size in conn.execute(
+                'SELECT session_id, size FROM sessions WHERE last_access >= ? ORDER BY last_access', (expire_before,)
+            ):
+                if count <= max_sessions and total <= max_bytes:
+                    break
+                to_delete.append(session_id)
+                count -= 1
+                total -= size
+
+        evicted = []
+        for session_id in to_delete:
+            row = conn.execute('SELECT state FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+            if row is not None:
+                evicted.append(pickle.loads(row[0]))
+        conn.executemany('DELETE FROM sessions WHERE session_id = ?', [(session_id,) for session_id in to_delete])
+        conn.commit()
+        return evicted
+
+    def stats(self):
+        count, total = self._conn().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions'
+        ).fetchone()
+        return {'sessions': count, 'bytes': total}
+
+
+class SessionManager:
+    def __init__(self, backend, factory, max_sessions=10000, idle_ttl=1800,
+                 max_bytes=256 * 1024 * 1024, sizeof=None, evict_interval=0, clock=time.time, on_evict=None):
+        self.backend = backend
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda state: 0)
+        self.evict_interval = evict_interval
+        self.clock = clock
+        self.on_evict = on_evict
+        self.evicted = 0
+        self._last_evict = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """
+        Return (session_id, state) for a token, starting a new session when
+        the token is missing, malformed, unknown or expired
+        """
+        now = self.clock()
+        if is_valid_session_id(session_id):
+            with self._lock:
+                state, last_access = self.backend.load(session_id)
+                if state is not None and last_access >= now - self.idle_ttl:
+                    self.backend.touch(session_id, now)
+                    return session_id, state
+                if state is not None:
+                    self._dropped([self.backend.delete(session_id)])
+
+        # Never adopt a client-chosen id for a new session
+        return new_session_id(), self.factory()
+
+    def save(self, session_id, state):
+        now = self.clock()
+        with self._lock:
+            self.backend.store(session_id, state, now, self.sizeof(state))
+            if now - self._last_evict >= self.evict_interval:
+                self._dropped(self.backend.evict(now - self.idle_ttl, self.max_sessions, self.max_bytes))
+                self._last_evict = now
+
+    def _dropped(self, states):
+        for state in states:
+            if state is None:
+                continue
+            self.evicted += 1
+            if self.on_evict is not None:
+                self.on_evict(state)
+
+    def delete(self, session_id):
+        if is_valid_session_id(session_id):
+            with self._lock:
+                state = self.backend.delete(session_id)
+            if state is not None and self.on_evict is not None:
+                self.on_evict(state)
+
+    def stats(self):
+        with self._lock:
+            stats = self.backend.stats()
+        stats['evicted'] = self.evicted
+        return stats
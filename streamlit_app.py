@@ -1,10 +1,8 @@
 import streamlit as st
 import pandas as pd
-from trauma_chatbot import TraumaInformedChatbot
+from trauma_chatbot import TraumaInformedChatbot, render_trauma_report
 from trauma_app import TraumaInformedApp
 from risk_model import predict_risk
-import os
-import base64
 
 # Page config
 st.set_page_config(
@@ -114,18 +112,15 @@ with col1:
     if st.button("Generate Trauma Support Report", type="primary"):
         if st.session_state.app.chatbot.conversation_history:
             try:
-                result = st.session_state.app.generate_trauma_report()
+                # Rendered in memory and handed straight to the download button
+                pdf_data = render_trauma_report(st.session_state.app.build_report_data())
                 st.success("Report generated successfully!")
-                st.info(result)
-                
-                # Provide download link
-                report_path = os.path.join(os.path.dirname(__file__), "trauma_support_report.pdf")
-                if os.path.exists(report_path):
-                    with open(report_path, "rb") as pdf_file:
-                        pdf_data = pdf_file.read()
-                        b64_pdf = base64.b64encode(pdf_data).decode()
-                        href = f'<a href="data:application/pdf;base64,{b64_pdf}" download="safe_ai_trauma_report.pdf">Download SAFE AI Report</a>'
-                        st.markdown(href, unsafe_allow_html=True)
+                st.download_button(
+                    "Download SAFE AI Report",
+                    pdf_data,
+                    file_name="safe_ai_trauma_report.pdf",
+                    mime="application/pdf"
+                )
             except Exception as e:
                 st.error(f"Error generating report: {str(e)}")
         else:
@@ -143,25 +138,21 @@ if st.session_state.app.chatbot.conversation_history:
     st.markdown("---")
     st.header("📈 Conversation Statistics")
     
-    history = st.session_state.app.chatbot.conversation_history
-    sentiments = [entry['sentiment'] for entry in history]
+    stats = st.session_state.app.chatbot.stats
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Messages", len(history))
+        st.metric("Total Messages", stats.total_messages)
     
     with col2:
-        negative_count = sum(1 for s in sentiments if s in ['negative', 'very_negative'])
-        st.metric("Negative Sentiment", negative_count)
+        st.metric("Negative Sentiment", stats.count('negative', 'very_negative'))
     
     with col3:
-        positive_count = sum(1 for s in sentiments if s == 'positive')
-        st.metric("Positive Sentiment", positive_count)
+        st.metric("Positive Sentiment", stats.count('positive'))
     
     with col4:
-        crisis_count = sum(1 for s in sentiments if s == 'crisis')
-        st.metric("Crisis Indicators", crisis_count, delta_color="inverse")
+        st.metric("Crisis Indicators", stats.crisis_count, delta_color="inverse")
 
 # Footer
 st.markdown("---")
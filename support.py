@@ -1,5 +1,5 @@
 import streamlit as st
-from chatbot import chat_response, generate_pdf
+from chatbot import chat_response, render_pdf
 
 st.title('🧠 SAFE-MIND AI Support')
 
@@ -29,9 +29,6 @@ if st.button('Check Risk'):
     
     # Generate PDF report
     if st.button('📄 Generate Report'):
-        filename = generate_pdf({'risk': risk})
-        st.success(f'Report saved as {filename}')
-        with open(filename, 'rb') as f:
-            st.download_button('Download Report', f.read(), filename, 'application/pdf')
+        st.download_button('Download Report', render_pdf({'risk': risk}), 'support_report.pdf', 'application/pdf')
 
 st.error('🆘 Crisis: Call 988 or 911')
\ No newline at end of file
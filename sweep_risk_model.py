@@ -0,0 +1,206 @@
+# Hyperparameter sweep for the risk model.
+#
+#   python sweep_risk_model.py --widths 64,32,16 32,16 16 --batch-sizes 32 128 \
+#       --learning-rates 0.001 0.01 --workers 4 --min-accuracy 0.95
+#
+# Every combination of layer widths, batch size and learning rate is trained
+# with the same split and seed as train_risk_model.py, alongside scikit-learn
+# logistic regression and linear (ridge) classifier baselines. Runs are spread
+# over worker processes, each pinned to one TensorFlow thread so timings do
+# not depend on how many runs share the machine. Each run records wall-clock
+# train time, inference latency per 1k rows on the serving path (NumpyRiskModel
+# for the MLPs), serialized model size, accuracy and macro F1; the table is
+# written to --output and the cheapest run meeting --min-accuracy is printed.
+import argparse
+import csv
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+RESULT_COLUMNS = ['name', 'kind', 'params', 'train_seconds', 'latency_ms_per_1k', 'model_bytes',
+                  'accuracy', 'f1_macro', 'error']
+
+
+def mlp_configs(widths, batch_sizes, learning_rates, epochs):
+    configs = []
+    for hidden_units, batch_size, learning_rate in itertools.product(widths, batch_sizes, learning_rates):
+        configs.append({
+            'name': f"mlp_{'x'.join(map(str, hidden_units))}_bs{batch_size}_lr{learning_rate:g}",
+            'kind': 'mlp',
+            'hidden_units': list(hidden_units),
+            'batch_size': batch_size,
+            'learning_rate': learning_rate,
+            'epochs': epochs,
+        })
+    return configs
+
+
+def baseline_configs():
+    return [
+        {'name': 'logistic', 'kind': 'logistic'},
+        {'name': 'linear', 'kind': 'linear'},
+    ]
+
+
+def limit_threads():
+    # One thread per worker process; must run before TensorFlow starts up
+    os.environ.setdefault('OMP_NUM_THREADS', '1')
+    os.environ.setdefault('TF_NUM_INTRAOP_THREADS', '1')
+    os.environ.setdefault('TF_NUM_INTEROP_THREADS', '1')
+
+
+def time_per_1k(predict, X, repeats=20):
+    rows = X[:1000]
+    predict(rows)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(rows)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000 * 1000 / len(rows)
+
+
+def train_mlp(config, X_train, y_train, X_test, y_test, seed):
+    import tensorflow as tf
+
+    from train_risk_model import build_model, train_model
+
+    tf.keras.utils.set_random_seed(seed)
+    model = build_model(X_train.shape[1], hidden_units=config['hidden_units'],
+                        learning_rate=config['learning_rate'])
+    start = time.perf_counter()
+    train_model(model, X_train, y_train, X_test, y_test, epochs=config['epochs'],
+                batch_size=config['batch_size'], verbose=0)
+    return model, time.perf_counter() - start
+
+
+def run_config(config, data_path=None, seed=42):
+    """
+    Train and measure one configuration; returns a result row
+    """
+    from sklearn.metrics import accuracy_score, f1_score
+
+    from numpy_risk_model import NumpyRiskModel
+    from train_risk_model import load_dataset, split_dataset
+
+    params = {k: v for k, v in config.items() if k not in ('name', 'kind')}
+    result = {'name': config['name'], 'kind': config['kind'], 'params': json.dumps(params)}
+    try:
+        X, y = load_dataset(data_path)
+        scaler, X_train, X_test, y_train, y_test = split_dataset(X, y, seed=seed)
+        X_raw = X.to_numpy()
+
+        if config['kind'] == 'mlp':
+            model, train_seconds = train_mlp(config, X_train, y_train, X_test, y_test, seed)
+            # Measure what is served: the NumPy forward pass over raw features
+            served = NumpyRiskModel.from_keras(model, scaler)
+            predictions = np.argmax(served.forward(X_test), axis=1)
+            latency = time_per_1k(served.predict_proba, X_raw)
+            buffer = io.BytesIO()
+            served.save(buffer)
+            model_bytes = len(buffer.getvalue())
+        else:
+            from sklearn.linear_model import LogisticRegression, RidgeClassifier
+
+            model = LogisticRegression(max_iter=1000) if config['kind'] == 'logistic' else RidgeClassifier()
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            train_seconds = time.perf_counter() - start
+            predictions = model.predict(X_test)
+            latency = time_per_1k(lambda rows: model.predict(scaler.transform(rows)), X)
+            model_bytes = len(pickle.dumps((scaler, model)))
+
+        result.update({
+            'train_seconds': train_seconds,
+            'latency_ms_per_1k': latency,
+            'model_bytes': model_bytes,
+            'accuracy': float(accuracy_score(y_test, predictions)),
+            'f1_macro': float(f1_score(y_test, predictions, average='macro')),
+        })
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def run_sweep(configs, data_path=None, workers=None, seed=42):
+    """
+    Run every configuration; workers=0 trains in this process
+    """
+    if workers == 0:
+        return [run_config(config, data_path, seed) for config in configs]
+
+    # spawn: TensorFlow does not survive fork, and each worker must set its
+    # thread limits before importing it
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=context,
+                             initializer=limit_threads) as pool:
+        futures = [pool.submit(run_config, config, data_path, seed) for config in configs]
+        return [future.result() for future in futures]
+
+
+def cheapest(results, min_accuracy):
+    """
+    Fastest run at or above the accuracy bar, ties broken by model size
+    """
+    passing = [r for r in results if not r.get('error') and r['accuracy'] >= min_accuracy]
+    if not passing:
+        return None
+    return min(passing, key=lambda r: (r['latency_ms_per_1k'], r['model_bytes']))
+
+
+def write_results(results, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        for result in results:
+            writer.writerow({column: result.get(column, '') for column in RESULT_COLUMNS})
+
+
+def parse_widths(value):
+    return tuple(int(units) for units in value.split(','))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Sweep risk model configurations')
+    parser.add_argument('--data', default=None, help='Training data (default: SAFE_AI_TRAINING_DATA)')
+    parser.add_argument('--widths', type=parse_widths, nargs='+', default=[(64, 32, 16), (32, 16), (16,)],
+                        help='Hidden layer widths, e.g. 64,32,16 32,16')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[32, 128])
+    parser.add_argument('--learning-rates', type=float, nargs='+', default=[0.001, 0.01])
+    parser.add_argument('--epochs', type=int, default=100)
+    parser.add_argument('--no-baselines', action='store_true', help='Skip the scikit-learn baselines')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count, 0 = inline)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='sweep_results.csv', help='Results table (CSV)')
+    parser.add_argument('--min-accuracy', type=float, default=0.95, help='Accuracy bar for the recommendation')
+    args = parser.parse_args()
+
+    configs = mlp_configs(args.widths, args.batch_sizes, args.learning_rates, args.epochs)
+    if not args.no_baselines:
+        configs += baseline_configs()
+
+    limit_threads()
+    results = run_sweep(configs, args.data, args.workers, args.seed)
+    write_results(results, args.output)
+
+    print(f"{'name':32s} {'train s':>8s} {'ms/1k':>8s} {'bytes':>8s} {'acc':>6s} {'f1':>6s}")
+    for r in sorted(results, key=lambda r: r.get('latency_ms_per_1k', float('inf'))):
+        if r.get('error'):
+            print(f"{r['name']:32s} error: {r['error']}")
+            continue
+        print(f"{r['name']:32s} {r['train_seconds']:8.1f} {r['latency_ms_per_1k']:8.3f} {r['model_bytes']:8d} "
+              f"{r['accuracy']:6.3f} {r['f1_macro']:6.3f}")
+    print(f"Results written to {args.output}")
+
+    best = cheapest(results, args.min_accuracy)
+    if best:
+        print(f"Cheapest run with accuracy >= {args.min_accuracy}: {best['name']}")
+    else:
+        print(f"No run reached accuracy {args.min_accuracy}")
@@ -0,0 +1,45 @@
+import copy
+import json
+
+from benchmark_api import ENDPOINTS, compare, run
+
+
+def test_client_run_covers_every_endpoint():
+    result = run('client', concurrency=2, iterations=3, report_every=3, synthetic=10)
+    print(json.dumps(result['total']))
+    assert sorted(result['endpoints']) == sorted(ENDPOINTS)
+    for endpoint, metrics in result['endpoints'].items():
+        assert metrics['errors'] == 0, endpoint
+        assert metrics['p50_ms'] <= metrics['p95_ms'] <= metrics['p99_ms']
+    assert result['endpoints']['/api/chat']['requests'] == 2 * 3 * 4
+    assert result['endpoints']['/api/generate-report']['requests'] == 2
+    json.dumps(result)
+
+
+def test_local_server_run():
+    result = run('server', concurrency=2, iterations=2, report_every=0, synthetic=10)
+    assert result['target'] == 'server'
+    assert result['total']['errors'] == 0
+    assert '/api/generate-report' not in result['endpoints']
+    assert result['endpoints']['/api/risk-assessment']['requests'] == 2 * 2 * 2
+
+
+def test_compare_flags_regressions():
+    baseline = {'endpoints': {
+        '/api/chat': {'requests': 100, 'errors': 0, 'throughput_rps': 500.0,
+                      'p50_ms': 2.0, 'p95_ms': 10.0, 'p99_ms': 20.0},
+    }}
+    assert compare(baseline, baseline) == []
+
+    slower = copy.deepcopy(baseline)
+    slower['endpoints']['/api/chat'].update(throughput_rps=400.0, p95_ms=13.0, p50_ms=2.5)
+    failures = compare(slower, baseline, max_regression=10.0, latency_floor_ms=1.0)
+    # p50 rose 25% but by less than the 1 ms floor
+    assert len(failures) == 2
+    assert any('throughput_rps' in f for f in failures) and any('p95_ms' in f for f in failures)
+    assert compare(slower, baseline, max_regression=30.0) == []
+
+    failing = copy.deepcopy(baseline)
+    failing['endpoints']['/api/chat']['errors'] = 3
+    assert compare(failing, baseline) == ['/api/chat errors: 0 -> 3']
+    assert compare({'endpoints': {}}, baseline) == ['/api/chat: missing from this run']
@@ -0,0 +1,46 @@
+from benchmark_chatbot import (LONG_LENGTH, adversarial_messages, compare, long_messages, run,
+                               scaled_lexicons)
+from sentiment_service import sentiment_service
+from trauma_chatbot import TraumaInformedChatbot
+import chatbot
+import trauma_chatbot
+
+
+def test_inputs_and_lexicons():
+    assert all(len(m) == LONG_LENGTH for m in long_messages(3))
+    assert all(len(m) == LONG_LENGTH for m in adversarial_messages())
+
+    bot = TraumaInformedChatbot()
+    # The near misses must stay misses, or the case measures something else
+    assert bot.matcher.categories(adversarial_messages()[0]) == set()
+
+    lexicons = bot.matcher.lexicons
+    scaled = scaled_lexicons(lexicons, 10)
+    for category, phrases in lexicons.items():
+        assert len(scaled[category]) == 10 * len(phrases)
+        assert list(scaled[category][:len(phrases)]) == list(phrases)
+    assert scaled_lexicons(lexicons, 10) == scaled
+
+
+def test_quick_run():
+    result = run('lexicon', repeat=1, quick=True, inputs=['short', 'adversarial'], scales=(1, 10))
+    names = set(result['results'])
+    assert 'keywords/adversarial/x10' in names
+    assert 'end_to_end_trauma/short/x1' in names
+    assert 'history/short' in names
+    assert all(us > 0 for us in result['results'].values())
+    # The uncached service is swapped back out afterwards
+    assert trauma_chatbot.sentiment_service is sentiment_service
+    assert chatbot.sentiment_service is sentiment_service
+
+
+def test_compare_uses_calibration():
+    baseline = {'calibration_us': 100.0, 'results': {'keywords/short/x1': 10.0, 'history/short': 2.0}}
+    # Everything twice as slow on a machine that is twice as slow: no regression
+    slower_machine = {'calibration_us': 200.0, 'results': {'keywords/short/x1': 20.0, 'history/short': 4.0}}
+    assert compare(slower_machine, baseline) == []
+
+    regressed = {'calibration_us': 100.0, 'results': {'keywords/short/x1': 12.0, 'history/short': 2.1}}
+    failures = compare(regressed, baseline, max_regression=10.0)
+    assert len(failures) == 1 and failures[0].startswith('keywords/short/x1')
+    assert compare({'calibration_us': 100.0, 'results': {}}, baseline)[0].endswith('missing from this run')
@@ -0,0 +1,126 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import zipfile
+
+from bulk_reports import ZipOutput, run_bulk
+
+CONVERSATIONS = [
+    {'id': 'a1', 'messages': ["I'm feeling really sad today", 'I want to hurt myself']},
+    {'id': 'b/2', 'messages': ['Things are going great!'], 'health_factors': {'sleep_hours': 4}},
+    {'id': 'c3', 'history': [{'message': 'meh', 'sentiment': 'negative'}]},
+    {'id': 'empty', 'messages': []},
+]
+
+
+def test_jsonl_to_directory_and_resume(tmp_path):
+    archive = tmp_path / 'conversations.jsonl'
+    archive.write_text('\n'.join(json.dumps(c) for c in CONVERSATIONS[:2]) + '\n')
+    output = tmp_path / 'reports'
+
+    summary = run_bulk(str(archive), str(output), workers=0)
+    assert summary['written'] == 2
+    assert summary['failed'] == 0
+    assert (output / 'a1.pdf').read_bytes().startswith(b'%PDF')
+    assert (output / 'b_2.pdf').exists()
+
+    # A second run with more conversations only renders the new ones
+    archive.write_text('\n'.join(json.dumps(c) for c in CONVERSATIONS) + '\n')
+    summary = run_bulk(str(archive), str(output), workers=0)
+    assert summary['skipped'] == 2
+    assert summary['written'] == 1
+    assert summary['failed'] == 1
+    assert summary['errors'][0][0] == 'empty'
+    assert summary['p95_render_ms'] >= summary['p50_render_ms'] > 0
+
+
+def test_sqlite_to_zip(tmp_path):
+    archive = tmp_path / 'archive.db'
+    conn = sqlite3.connect(str(archive))
+    conn.execute('CREATE TABLE conversations (id TEXT, data TEXT)')
+    conn.executemany('INSERT INTO conversations VALUES (?, ?)',
+                     [(c['id'], json.dumps(c)) for c in CONVERSATIONS[:3]])
+    conn.commit()
+    conn.close()
+
+    output = tmp_path / 'reports.zip'
+    summary = run_bulk(str(archive), str(output), workers=0, commit_every=1)
+    assert summary['written'] == 3
+    with zipfile.ZipFile(str(output)) as reports:
+        assert sorted(reports.namelist()) == ['a1.pdf', 'b_2.pdf', 'c3.pdf']
+        assert reports.read('c3.pdf').startswith(b'%PDF')
+
+
+def test_zip_survives_a_run_killed_mid_batch(tmp_path):
+    archive = tmp_path / 'conversations.jsonl'
+    records = [{'id': f'c{i}', 'messages': ['I feel really stressed lately']} for i in range(12)]
+    archive.write_text('\n'.join(json.dumps(r) for r in records) + '\n')
+    output = tmp_path / 'reports.zip'
+
+    # Killed without cleanup while rendering the 8th report, after one
+    # committed batch of 5
+    code = (
+        "import os, bulk_reports\n"
+        "render = bulk_reports.render_report\n"
+        "calls = []\n"
+        "def render_then_die(data):\n"
+        "    calls.append(1)\n"
+        "    if len(calls) == 8:\n"
+        "        os._exit(1)\n"
+        "    return render(data)\n"
+        "bulk_reports.render_report = render_then_die\n"
+        f"bulk_reports.run_bulk({str(archive)!r}, {str(output)!r}, workers=0, chunk_size=1, commit_every=5)\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.returncode == 1
+
+    done = (tmp_path / 'reports.zip.checkpoint').read_text().split()
+    assert done == ['c0', 'c1', 'c2', 'c3', 'c4']
+    with zipfile.ZipFile(str(output)) as reports:
+        for conversation_id in done:
+            assert reports.read(conversation_id + '.pdf').startswith(b'%PDF')
+
+    summary = run_bulk(str(archive), str(output), workers=0, commit_every=5)
+    assert summary['skipped'] == 5 and summary['written'] == 7
+    with zipfile.ZipFile(str(output)) as reports:
+        assert sorted(reports.namelist()) == sorted(f'c{i}.pdf' for i in range(12))
+        assert all(reports.read(name).startswith(b'%PDF') for name in reports.namelist())
+
+
+def test_zip_rolls_back_a_commit_killed_mid_append(tmp_path):
+    archive = tmp_path / 'conversations.jsonl'
+    records = [{'id': f'c{i}', 'messages': ['I feel really stressed lately']} for i in range(12)]
+    archive.write_text('\n'.join(json.dumps(r) for r in records) + '\n')
+    output = tmp_path / 'reports.zip'
+
+    # Killed while writing the 3rd PDF of the second commit, after the
+    # first entries overwrote the old central directory
+    code = (
+        "import os, zipfile, bulk_reports\n"
+        "writestr = zipfile.ZipFile.writestr\n"
+        "calls = []\n"
+        "def write_then_die(self, *args, **kwargs):\n"
+        "    calls.append(1)\n"
+        "    if len(calls) == 8:\n"
+        "        os._exit(1)\n"
+        "    return writestr(self, *args, **kwargs)\n"
+        "zipfile.ZipFile.writestr = write_then_die\n"
+        f"bulk_reports.run_bulk({str(archive)!r}, {str(output)!r}, workers=0, chunk_size=1, commit_every=5)\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.returncode == 1
+    assert (tmp_path / 'reports.zip.journal').exists()
+
+    ZipOutput(str(output))
+    assert not (tmp_path / 'reports.zip.journal').exists()
+    with zipfile.ZipFile(str(output)) as reports:
+        assert reports.testzip() is None
+        assert sorted(reports.namelist()) == [f'c{i}.pdf' for i in range(5)]
+
+    summary = run_bulk(str(archive), str(output), workers=0, commit_every=5)
+    assert summary['skipped'] == 5 and summary['written'] == 7
+    with zipfile.ZipFile(str(output)) as reports:
+        assert reports.testzip() is None
+        assert sorted(reports.namelist()) == sorted(f'c{i}.pdf' for i in range(12))
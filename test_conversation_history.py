@@ -0,0 +1,77 @@
+import pickle
+
+from conversation_history import ConversationHistory
+from trauma_app import TraumaInformedApp
+
+FIELDS = ('message', 'sentiment', 'trauma_indicator')
+
+
+def make_entries(n):
+    return [{'message': f'message {i}', 'sentiment': 'negative' if i % 2 else 'positive',
+             'trauma_indicator': 'ptsd_symptoms' if i % 3 == 0 else None} for i in range(n)]
+
+
+def test_behaves_like_a_list_of_entries():
+    history = ConversationHistory(fields=FIELDS, max_in_memory=0)
+    assert not history
+    entries = make_entries(5)
+    for entry in entries:
+        history.append(entry)
+    assert len(history) == 5
+    assert list(history) == entries
+    assert history[-1] == entries[-1]
+
+    try:
+        history.append({'message': 'x', 'sentiment': 'ecstatic'})
+        assert False, 'expected ValueError'
+    except ValueError:
+        pass
+
+
+def test_spills_old_turns_to_disk(tmp_path):
+    history = ConversationHistory(fields=FIELDS, max_in_memory=10, spill_dir=str(tmp_path))
+    entries = make_entries(25)
+    for entry in entries:
+        history.append(entry)
+
+    assert len(history) == 25
+    assert len(history.tail()) <= 10
+    assert history.tail() == entries[-len(history.tail()):]
+    assert list(history) == entries
+
+    history.discard()
+    assert not list(tmp_path.iterdir())
+
+
+def test_does_not_spill_by_default():
+    assert ConversationHistory().spill_dir == ''
+
+
+def test_drops_old_turns_without_spill_dir(caplog):
+    history = ConversationHistory(max_in_memory=4)
+    for entry in make_entries(9):
+        history.append(entry)
+    # Logged once per conversation, not on every spill
+    assert len([r for r in caplog.records if 'dropping conversation turns' in r.getMessage()]) == 1
+    assert len(history) == 9
+    assert [entry['message'] for entry in history] == [f'message {i}' for i in range(9 - len(history.tail()), 9)]
+    try:
+        history[0]
+        assert False, 'expected IndexError'
+    except IndexError:
+        pass
+
+
+def test_sessions_pickle_small_and_keep_totals(tmp_path):
+    app = TraumaInformedApp()
+    app.chatbot.conversation_history.max_in_memory = 20
+    app.chatbot.conversation_history.spill_dir = str(tmp_path)
+    for i in range(200):
+        app.chat(f"I keep having nightmares {i}")
+
+    data = pickle.dumps(app)
+    assert len(data) < 8 * 1024
+    restored = pickle.loads(data)
+    assert restored.chatbot.matcher is app.chatbot.matcher
+    assert len(restored.chatbot.conversation_history) == 200
+    assert restored.chatbot.stats.trauma_indicators == 200
@@ -0,0 +1,101 @@
+from app import MentalHealthApp
+from conversation_stats import SENTIMENT_SEVERITY, TRAUMA_SEVERITY, ConversationStats
+from trauma_app import TraumaInformedApp
+
+MESSAGES = [
+    "I'm feeling really sad today",
+    "I keep having nightmares",
+    "I was assaulted last month",
+    "Things are going great!",
+    "I want to hurt myself",
+    "I feel so alone",
+]
+
+
+def test_counters_follow_history():
+    app = TraumaInformedApp()
+    for message in MESSAGES:
+        app.chat(message)
+
+    history = app.chatbot.conversation_history
+    stats = app.chatbot.stats
+    assert stats.total_messages == len(history)
+    assert stats.trauma_indicators == sum(1 for entry in history if entry['trauma_indicator'] is not None)
+    for sentiment in set(entry['sentiment'] for entry in history):
+        assert stats.count(sentiment) == sum(1 for entry in history if entry['sentiment'] == sentiment)
+
+    assert stats.crisis_count == sum(1 for entry in history if entry['sentiment'] == 'crisis')
+
+
+def scan_trauma_risk(history):
+    # The risk level as computed from the history before the running totals
+    sentiments = [entry['sentiment'] for entry in history]
+    trauma_indicators = sum(1 for entry in history if entry.get('trauma_indicator') is not None)
+    if any(s == 'crisis' for s in sentiments):
+        return "Critical - Immediate Support Needed"
+    elif any(s == 'severe_distress' for s in sentiments) or trauma_indicators > 2:
+        return "High - Trauma-Informed Care Recommended"
+    elif any(s == 'distressed' for s in sentiments) or trauma_indicators > 0:
+        return "Moderate - Ongoing Support Beneficial"
+    return "Stable - Continue Self-Care"
+
+
+def scan_general_risk(history):
+    sentiments = [entry['sentiment'] for entry in history]
+    if any(s == 'crisis' for s in sentiments):
+        return "Critical"
+    elif any(s == 'very_negative' for s in sentiments):
+        return "High"
+    elif any(s == 'negative' for s in sentiments):
+        return "Medium"
+    return "Low"
+
+
+def test_totals_match_the_history_scan():
+    from safe_ai_server import app as server
+    client = server.test_client()
+    trauma = TraumaInformedApp()
+    general = MentalHealthApp()
+    for message in MESSAGES + ["Sometimes I want to die", "I feel terrible and worthless"]:
+        client.post('/api/chat', json={'message': message})
+        trauma.chat(message)
+        general.chat(message)
+        assert trauma.build_report_data()['risk'] == scan_trauma_risk(trauma.chatbot.conversation_history)
+        assert general.build_report_data()['risk_level'] == scan_general_risk(general.chatbot.conversation_history)
+
+    # Crisis keyword hits get a crisis reply but are not crisis sentiments
+    assert trauma.build_report_data()['factors']['Crisis Indicators'] == 0
+    history = trauma.chatbot.conversation_history
+    breakdown = {}
+    for entry in history:
+        breakdown[entry['sentiment']] = breakdown.get(entry['sentiment'], 0) + 1
+    assert client.get('/api/conversation-stats').get_json() == {
+        'total_messages': len(history),
+        'trauma_indicators': sum(1 for entry in history if entry['trauma_indicator'] is not None),
+        'crisis_indicators': breakdown.get('crisis', 0),
+        'sentiment_breakdown': breakdown,
+    }
+
+
+def test_severity_ordering():
+    stats = ConversationStats(TRAUMA_SEVERITY)
+    assert not stats.at_least('negative')
+    stats.record('positive')
+    stats.record('distressed')
+    stats.record('negative')
+    assert stats.max_severity == 'distressed'
+    assert stats.at_least('negative')
+    assert not stats.at_least('severe_distress')
+    assert stats.to_dict()['sentiment_breakdown'] == {'positive': 1, 'distressed': 1, 'negative': 1}
+
+
+def test_mental_health_report_uses_counters():
+    app = MentalHealthApp()
+    app.chat("Things are going great!")
+    app.chat("I feel terrible and worthless")
+    data = app.build_report_data()
+    assert data['indicators']['Total Messages'] == 2
+    assert data['indicators']['Positive Sentiment'] == 1
+
+    stored = ConversationStats.from_history(app.chatbot.conversation_history, SENTIMENT_SEVERITY)
+    assert stored.to_dict() == app.chatbot.stats.to_dict()
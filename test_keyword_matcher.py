@@ -0,0 +1,60 @@
+import time
+
+from keyword_matcher import KeywordMatcher, get_matcher
+from trauma_chatbot import TraumaInformedChatbot
+from chatbot import SentimentChatbot
+
+
+def test_scan_reports_categories_and_offsets():
+    matcher = KeywordMatcher({
+        'crisis': ['kill myself', 'want to die'],
+        'isolation': ['alone', 'no one'],
+        'trauma': ['rape', 'abuse'],
+    })
+    message = "No one knows I was abused and I want to die"
+    hits = matcher.scan(message)
+
+    assert {(h.category, h.phrase) for h in hits} == {
+        ('isolation', 'no one'), ('trauma', 'abuse'), ('crisis', 'want to die')
+    }
+    for hit in hits:
+        assert message[hit.start:hit.end].lower() == hit.phrase
+
+
+def test_phrases_match_at_word_start_only():
+    matcher = KeywordMatcher({'trauma': ['rape'], 'ptsd': ['flashback']})
+    assert matcher.categories("My therapist helped with the grapes") == set()
+    assert matcher.categories("Flashbacks again last night") == {'ptsd'}
+
+
+def test_prefix_phrases_are_all_reported():
+    matcher = KeywordMatcher({'therapy': ['help'], 'distress': ['helpless']})
+    assert matcher.categories("I feel so helpless") == {'therapy', 'distress'}
+
+
+def test_chatbots_share_compiled_matcher():
+    assert TraumaInformedChatbot().matcher is TraumaInformedChatbot().matcher
+    assert SentimentChatbot().matcher is SentimentChatbot().matcher
+
+
+def test_chatbot_detection():
+    bot = TraumaInformedChatbot()
+    assert bot.detect_trauma_indicators("I was assaulted last month") == 'trauma_disclosure'
+    assert bot.detect_trauma_indicators("I keep having nightmares") == 'ptsd_symptoms'
+    assert bot.get_response("Sometimes I want to die")['emergency'] is True
+    assert SentimentChatbot().get_response("I feel dizzy and shaky")['type'] == 'health_screening'
+
+
+def test_cost_stays_flat_as_lexicon_grows():
+    message = "I have been feeling alone and scared since the attack, and sleep is hard " * 20
+    small = get_matcher({'words': ['alone', 'scared', 'attack']})
+    large = get_matcher({'words': ['alone', 'scared', 'attack'] + [f'term{i} phrase' for i in range(5000)]})
+
+    def cost(matcher):
+        start = time.perf_counter()
+        for _ in range(200):
+            matcher.scan(message)
+        return time.perf_counter() - start
+
+    cost(small), cost(large)
+    assert cost(large) < cost(small) * 3
@@ -0,0 +1,21 @@
+from benchmark_sentiment import CORPUS, run, synthetic_corpus
+from sentiment_service import SentimentService
+from trauma_app import TraumaInformedApp
+import trauma_chatbot
+
+
+def test_agrees_with_textblob():
+    result = run(CORPUS + synthetic_corpus(500))
+    print(f"Bucket agreement: {result['trauma_bucket_agreement']:.2%}, speedup {result['speedup']:.1f}x")
+    assert result['trauma_bucket_agreement'] >= 0.98
+    assert result['sentiment_bucket_agreement'] >= 0.98
+
+
+def test_lexicon_backend_drives_chatbot(monkeypatch):
+    service = SentimentService('lexicon')
+    monkeypatch.setattr(trauma_chatbot, 'sentiment_service', service)
+
+    app = TraumaInformedApp()
+    assert app.chat("I feel terrible and worthless")['sentiment'] == 'severe_distress'
+    assert app.chat("Things are going great!")['sentiment'] == 'positive'
+    assert service.stats()['calls'] == 2
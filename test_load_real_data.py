@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from load_real_data import DEFAULT_RAW_PATH, add_noise, assign_risk_levels, load_raw, preprocess
+
+
+def test_risk_labels_match_thresholds():
+    age = np.array([18, 20, 30, 25, 40, 60])
+    imc = np.array([21.9, 20.0, 19.9, 24.9, 10.0, 30.0])
+    assert assign_risk_levels(age, imc).tolist() == [0, 1, 1, 1, 2, 2]
+
+
+def test_chunked_load_matches_single_read():
+    whole = load_raw(DEFAULT_RAW_PATH, chunksize=1000000)
+    chunked = load_raw(DEFAULT_RAW_PATH, chunksize=7)
+    assert len(whole) > 0
+    assert whole.to_csv(index=False) == chunked.to_csv(index=False)
+    assert whole[['Age', 'IMC', 'PTSD']].notna().all().all()
+
+
+def test_seeded_steps_are_reproducible(tmp_path):
+    # Every step of preprocess() except SMOTE, which needs imblearn
+    def run(path, chunksize):
+        rng = np.random.RandomState(7)
+        df = load_raw(DEFAULT_RAW_PATH, chunksize=chunksize)
+        df['risk_level'] = assign_risk_levels(df['Age'].to_numpy(), df['IMC'].to_numpy())
+        final_df = pd.concat([df, add_noise(df, 50, 0.05, rng)], axis=0)
+        final_df.sample(frac=1, random_state=rng).reset_index(drop=True).to_csv(path, index=False)
+        return path.read_bytes()
+
+    first = run(tmp_path / 'first.csv', 1000000)
+    assert first == run(tmp_path / 'second.csv', 10)
+    assert first != b''
+
+
+def test_pipeline_is_reproducible(tmp_path):
+    pytest.importorskip('imblearn')
+    first = tmp_path / 'first.csv'
+    second = tmp_path / 'second.csv'
+    preprocess(output_path=str(first), sampling_strategy={0: 150, 1: 170, 2: 180}, noise_rows=50, seed=7,
+               dataset_path=None)
+    preprocess(output_path=str(second), sampling_strategy={0: 150, 1: 170, 2: 180}, noise_rows=50, seed=7,
+               chunksize=10, dataset_path=None)
+    assert first.read_bytes() == second.read_bytes()
@@ -0,0 +1,31 @@
+import os
+import time
+
+from model_registry import ModelRegistry
+
+
+def test_loads_once_and_reloads_on_change(tmp_path):
+    path = tmp_path / 'artifact.txt'
+    path.write_text('v1')
+    registry = ModelRegistry()
+    loader = lambda p: open(p).read()
+
+    assert registry.get(str(path), loader) == 'v1'
+    assert registry.get(str(path), loader) == 'v1'
+    assert registry.loads == 1 and registry.hits == 1
+
+    path.write_text('v2 changed')
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert registry.get(str(path), loader) == 'v2 changed'
+    assert registry.loads == 2 and registry.reloads == 1
+    print(registry.stats())
+
+
+def test_missing_file_raises(tmp_path):
+    registry = ModelRegistry()
+    try:
+        registry.get(str(tmp_path / 'missing.keras'), lambda p: None)
+    except FileNotFoundError:
+        pass
+    else:
+        raise AssertionError('expected FileNotFoundError')
@@ -0,0 +1,77 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from numpy_risk_model import NumpyRiskModel, export_weights, DEFAULT_WEIGHTS_PATH, FLAT_WEIGHTS_PATH, NPZ_WEIGHTS_PATH
+from risk_model import DEFAULT_MODEL_PATH, DEFAULT_SCALER_PATH, FEATURE_COLUMNS, predict_risk
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'processed_real_data.csv')
+
+
+def test_numpy_matches_keras_on_processed_data():
+    data = pd.read_csv(DATA_PATH).dropna(subset=FEATURE_COLUMNS)
+    X = data[FEATURE_COLUMNS].to_numpy()
+
+    keras_model = tf.keras.models.load_model(DEFAULT_MODEL_PATH)
+    scaler = joblib.load(DEFAULT_SCALER_PATH)
+    expected = np.asarray(keras_model.predict_on_batch(scaler.transform(X)))
+
+    actual = NumpyRiskModel.load(DEFAULT_WEIGHTS_PATH).predict_proba(X)
+
+    max_diff = np.abs(actual - expected).max()
+    print(f"Rows: {len(X)}, max |numpy - keras|: {max_diff:.2e}")
+    assert actual.shape == expected.shape
+    assert max_diff < 1e-5
+
+
+def test_export_round_trip(tmp_path):
+    output_path = str(tmp_path / 'weights.npz')
+    export_weights(DEFAULT_MODEL_PATH, DEFAULT_SCALER_PATH, output_path)
+    model = NumpyRiskModel.load(output_path)
+    assert model.activations == ['relu', 'relu', 'relu', 'softmax']
+    assert [k.shape for k in model.kernels] == [(2, 64), (64, 32), (32, 16), (16, 3)]
+
+
+def test_backends_agree():
+    numpy_result = predict_risk(25, 22.5, backend='numpy')
+    keras_result = predict_risk(25, 22.5, backend='keras')
+    assert numpy_result['risk_level'] == keras_result['risk_level']
+    assert abs(numpy_result['confidence'] - keras_result['confidence']) < 1e-5
+
+
+def test_flat_weights_are_shared_read_only_views(tmp_path):
+    model = NumpyRiskModel.load(NPZ_WEIGHTS_PATH)
+    path = str(tmp_path / 'weights.bin')
+    model.save_flat(path)
+    flat = NumpyRiskModel.load(path)
+
+    X = np.random.RandomState(0).uniform(15, 60, (500, 2))
+    assert np.array_equal(flat.predict_proba(X), model.predict_proba(X))
+    assert flat.activations == model.activations
+    for array in flat.kernels + flat.biases:
+        assert not array.flags.writeable and not array.flags.owndata
+        assert array.ctypes.data % 64 == 0
+
+
+def test_committed_flat_weights_match_npz():
+    X = np.random.RandomState(1).uniform(15, 60, (200, 2))
+    expected = NumpyRiskModel.load(NPZ_WEIGHTS_PATH).predict_proba(X)
+    assert np.array_equal(NumpyRiskModel.load(FLAT_WEIGHTS_PATH).predict_proba(X), expected)
+
+
+def test_flat_export_and_bad_file(tmp_path):
+    output_path = str(tmp_path / 'weights.bin')
+    export_weights(DEFAULT_MODEL_PATH, DEFAULT_SCALER_PATH, output_path)
+    assert [k.shape for k in NumpyRiskModel.load(output_path).kernels] == [(2, 64), (64, 32), (32, 16), (16, 3)]
+
+    bad_path = tmp_path / 'bad.bin'
+    bad_path.write_bytes(b'not weights at all')
+    try:
+        NumpyRiskModel.load(str(bad_path))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('expected ValueError')
@@ -0,0 +1,82 @@
+import csv
+import json
+
+import pandas as pd
+import pytest
+
+from replay_transcripts import init_scorer, run_replay
+from response_engine import TraumaEngine, get_engine
+from trauma_app import TraumaInformedApp
+
+SESSIONS = [
+    {'id': 's1', 'messages': ['I keep having nightmares', 'I feel so alone', 'I want to end my life']},
+    {'id': 's2', 'messages': ['Things are going great!', {'role': 'assistant', 'content': 'Glad to hear it'},
+                              {'role': 'user', 'content': 'I have been attacked'}]},
+    {'id': 'empty', 'messages': []},
+]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = tmp_path / 'conversations.jsonl'
+    path.write_text('\n'.join(json.dumps(s) for s in SESSIONS) + '\n')
+    return str(path)
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_replay_matches_live_chatbot(archive, tmp_path):
+    summary = run_replay(archive, str(tmp_path / 'messages.csv'), str(tmp_path / 'sessions.csv'), workers=0)
+    assert summary['sessions'] == 2 and summary['messages'] == 5
+    assert summary['errors'] == [('empty', 'Conversation has no messages')]
+
+    messages = read_csv(tmp_path / 'messages.csv')
+    sessions = {row['session_id']: row for row in read_csv(tmp_path / 'sessions.csv')}
+
+    live = TraumaInformedApp()
+    for row, message in zip(messages[:3], SESSIONS[0]['messages']):
+        response = live.chat(message)
+        entry = live.chatbot.conversation_history[-1]
+        assert row['sentiment'] == entry['sentiment']
+        assert row['trauma_indicator'] == (entry['trauma_indicator'] or '')
+        assert row['response'] == response.get('type', response['sentiment'])
+    assert messages[2]['crisis'] == 'True'
+    assert sessions['s1']['risk_level'] == live.build_report_data()['risk']
+    assert sessions['s1']['crisis_count'] == '0'
+
+    # Assistant turns are skipped
+    assert [row['turn'] for row in messages[3:]] == ['0', '1']
+    assert sessions['s2']['trauma_indicators'] == '1'
+
+
+def test_overrides_and_parquet_with_workers(archive, tmp_path):
+    messages_path = str(tmp_path / 'messages.parquet')
+    summary = run_replay(archive, messages_path, str(tmp_path / 'sessions.parquet'), workers=1,
+                         lexicons={'ptsd': ['great']}, thresholds={'positive': 1.0})
+    assert summary['messages'] == 5
+
+    messages = pd.read_parquet(messages_path)
+    assert str(messages['turn'].dtype) == 'int32'
+    by_message = messages.set_index(['session_id', 'turn'])
+    # 'nightmares' is no longer a PTSD keyword, 'great' is
+    assert pd.isna(by_message.loc[('s1', 0), 'trauma_indicator'])
+    assert by_message.loc[('s2', 0), 'trauma_indicator'] == 'ptsd_symptoms'
+    assert by_message.loc[('s2', 0), 'sentiment'] != 'positive'
+    assert pd.read_parquet(str(tmp_path / 'sessions.parquet'))['session_id'].tolist() == ['s1', 's2']
+
+
+def test_inline_replay_leaves_shared_engine_alone(archive, tmp_path):
+    shared = get_engine(TraumaEngine)
+    run_replay(archive, str(tmp_path / 'm.csv'), str(tmp_path / 's.csv'), workers=0,
+               lexicons={'ptsd': ['great']}, thresholds={'positive': 1.0}, sentiment_backend='lexicon')
+    assert get_engine(TraumaEngine) is shared
+    assert shared.thresholds['positive'] == TraumaEngine.THRESHOLDS['positive']
+    assert TraumaInformedApp().chatbot.detect_trauma_indicators('I keep having nightmares') == 'ptsd_symptoms'
+
+
+def test_unknown_threshold():
+    with pytest.raises(ValueError, match="Unknown sentiment threshold 'calm'"):
+        init_scorer(thresholds={'calm': 0.0})
@@ -0,0 +1,118 @@
+import time
+
+from report_jobs import DONE, FAILED, QueueFull, ReportJobQueue, SQLiteJobStore
+
+
+def wait_for(queue, job, owner, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job.id, owner)
+        if job.status in (DONE, FAILED):
+            return job
+        time.sleep(0.05)
+    raise AssertionError('report job did not finish')
+
+
+def test_queue_renders_in_background():
+    def render(report_data):
+        return report_data['risk'].encode()
+
+    queue = ReportJobQueue(render, max_workers=1)
+    job = wait_for(queue, queue.submit('alice', {'risk': 'Low'}), 'alice')
+    assert job.status == DONE
+    assert job.pdf == b'Low'
+
+    # Jobs are only visible to the session that queued them
+    assert queue.get(job.id, 'bob') is None
+    assert queue.stats()['completed'] == 1
+    queue.shutdown()
+
+
+def test_queue_reports_failures_and_backpressure():
+    def render(report_data):
+        if report_data.get('slow'):
+            time.sleep(0.5)
+        raise RuntimeError('renderer crashed')
+
+    queue = ReportJobQueue(render, max_workers=1, max_pending=1)
+    slow = queue.submit('alice', {'slow': True})
+    try:
+        queue.submit('alice', {})
+        assert False, 'expected QueueFull'
+    except QueueFull:
+        pass
+
+    job = wait_for(queue, slow, 'alice')
+    assert job.status == FAILED
+    assert 'renderer crashed' in job.error
+    queue.shutdown()
+
+
+def test_failed_submit_frees_its_slot(tmp_path):
+    for store in (None, SQLiteJobStore(str(tmp_path / 'sessions.db'))):
+        queue = ReportJobQueue(lambda report_data: b'', max_workers=1, max_pending=1, store=store)
+        queue.shutdown()
+        for _ in range(3):
+            try:
+                queue.submit('alice', {})
+                assert False, 'expected the executor to refuse the job'
+            except RuntimeError:
+                # Shut down, not QueueFull from the earlier failed attempts
+                pass
+        assert queue.stats()['jobs'] == {}
+
+
+def test_sqlite_store_shares_jobs_between_workers(tmp_path):
+    db_path = str(tmp_path / 'sessions.db')
+
+    def render(report_data):
+        if report_data.get('slow'):
+            time.sleep(0.5)
+        return report_data['risk'].encode()
+
+    # Two queues on one file stand in for two Gunicorn workers
+    first = ReportJobQueue(render, max_workers=1, max_pending=1, store=SQLiteJobStore(db_path))
+    second = ReportJobQueue(render, max_workers=1, max_pending=1, store=SQLiteJobStore(db_path))
+
+    slow = first.submit('alice', {'risk': 'Low', 'slow': True})
+    # The pending limit holds across workers
+    try:
+        second.submit('alice', {'risk': 'High'})
+        assert False, 'expected QueueFull'
+    except QueueFull:
+        pass
+
+    wait_for(first, slow, 'alice')
+    job = wait_for(second, slow, 'alice')
+    assert job.status == DONE
+    assert job.pdf == b'Low'
+    assert second.get(slow.id, 'bob') is None
+    assert second.stats()['jobs'] == {DONE: 1}
+    first.shutdown()
+    second.shutdown()
+
+
+def test_report_endpoints():
+    from safe_ai_server import app
+    alice = app.test_client()
+    bob = app.test_client()
+
+    alice.post('/api/chat', json={'message': 'I keep having nightmares'})
+    response = alice.post('/api/generate-report')
+    assert response.status_code == 202
+    job = response.get_json()
+
+    deadline = time.time() + 30
+    status = alice.get(job['status_url']).get_json()
+    while status['status'] not in ('done', 'failed') and time.time() < deadline:
+        time.sleep(0.05)
+        status = alice.get(job['status_url']).get_json()
+    assert status['status'] == 'done'
+
+    download = alice.get(job['download_url'])
+    assert download.status_code == 200
+    assert download.data.startswith(b'%PDF')
+
+    # Another session cannot see or fetch the report
+    assert bob.get(job['status_url']).status_code == 404
+    assert bob.get(job['download_url']).status_code == 404
@@ -0,0 +1,74 @@
+import io
+import time
+
+from chatbot import build_pdf_story, generate_pdf
+from report import build_report_story, generate_report
+from report_renderer import ReportRenderer
+from trauma_chatbot import build_trauma_report_story, generate_trauma_report
+
+TRAUMA_REPORT = {'risk': 'High', 'trauma_indicators': 2}
+MENTAL_HEALTH_REPORT = {
+    'risk_level': 'Medium',
+    'indicators': {'Total interactions': 3},
+    'medical_factors': {'Sleep Hours': 5, 'Blood Sugar Issues': 'no'},
+    'recommendations': ['Consider counseling or therapy'],
+}
+
+
+def test_render_returns_pdf_bytes_and_caches():
+    renderer = ReportRenderer()
+    story = build_trauma_report_story(TRAUMA_REPORT)
+
+    first = renderer.render(story)
+    assert first.startswith(b'%PDF')
+    assert renderer.render(story) == first
+
+    stats = renderer.stats()
+    assert stats['renders'] == 2
+    assert stats['cache_hits'] == 1
+    assert stats['cached_reports'] == 1
+
+
+def test_cached_pdfs_carry_the_current_day():
+    now = [time.mktime((2026, 3, 1, 23, 0, 0, 0, 0, -1))]
+    renderer = ReportRenderer(clock=lambda: now[0])
+    story = build_trauma_report_story(TRAUMA_REPORT)
+
+    first = renderer.render(story)
+    assert b'(D:20260301)' in first
+    assert renderer.render(story) == first
+
+    # The next day's copy is rendered again with its own date
+    now[0] += 2 * 3600
+    second = renderer.render(story)
+    assert b'(D:20260302)' in second and b'D:20260301' not in second
+    assert renderer.stats()['cache_hits'] == 1
+
+
+def test_layout_cache_matches_fresh_layout():
+    # Reusing parsed and line-broken paragraphs must not change the page
+    story = build_report_story(MENTAL_HEALTH_REPORT)
+    warm = ReportRenderer(cache_size=0)
+    warm.render(build_report_story(dict(MENTAL_HEALTH_REPORT, risk_level='High')))
+    warm_pdf = warm.render(story)
+    fresh_pdf = ReportRenderer(cache_size=0).render(story)
+
+    # Creation dates and document ids differ between builds
+    def body(pdf):
+        return pdf[pdf.index(b'stream'):pdf.rindex(b'endstream')]
+    assert body(warm_pdf) == body(fresh_pdf)
+
+
+def test_generators_write_paths_and_file_objects(tmp_path):
+    path = tmp_path / 'trauma.pdf'
+    assert generate_trauma_report(TRAUMA_REPORT, str(path)) == str(path)
+    assert path.read_bytes().startswith(b'%PDF')
+
+    buffer = io.BytesIO()
+    generate_report(MENTAL_HEALTH_REPORT, buffer)
+    assert buffer.getvalue().startswith(b'%PDF')
+
+    path = tmp_path / 'support.pdf'
+    generate_pdf({'risk': 'Low'}, str(path))
+    assert path.read_bytes().startswith(b'%PDF')
+    assert build_pdf_story({'risk': 'Low'})[1] == ("Risk Level: <b>Low</b>", "Normal")
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from request_tracing import NOOP_SPAN, Tracer, tracer
+from safe_ai_server import app
+
+
+@pytest.fixture
+def enabled_tracer():
+    was_enabled = tracer.enabled
+    tracer.enabled = True
+    tracer.reset()
+    yield tracer
+    tracer.enabled = was_enabled
+    tracer.reset()
+
+
+def test_disabled_tracer_is_a_no_op():
+    local = Tracer(enabled=False)
+    assert local.span('sentiment') is NOOP_SPAN
+    local.begin_request()
+    with local.span('sentiment'):
+        pass
+    assert local.end_request('chat', 200) is None
+    assert local.stages == {} and local.requests == {}
+    # Ending a request that never began is harmless
+    assert local.end_request('chat', 200) is None
+
+
+def test_request_trace_and_histograms():
+    local = Tracer(enabled=True)
+    local.begin_request()
+    with local.span('sentiment'):
+        pass
+    with local.span('keywords'):
+        pass
+    with local.span('sentiment'):
+        pass
+    server_timing = local.end_request('chat', 200)
+
+    names = [part.split(';')[0] for part in server_timing.split(', ')]
+    assert names == ['sentiment', 'keywords', 'total']
+    assert local.stages['sentiment'].count == 2
+    assert local.requests[('chat', '2xx')].count == 1
+
+    # Off a request thread spans still reach the histograms, request spans
+    # are skipped
+    with local.span('pdf_render'):
+        pass
+    assert local.stages['pdf_render'].count == 1
+    assert local.request_span('json') is NOOP_SPAN
+
+
+def test_render_metrics_format():
+    local = Tracer(enabled=True)
+    local.record('inference', 0.0003)
+    local.record('inference', 7.0)
+    local.begin_request()
+    local.end_request('risk_assessment', 503)
+
+    text = local.render_metrics()
+    assert text.endswith('\n')
+    assert '# TYPE safe_ai_stage_seconds histogram' in text
+    assert 'safe_ai_stage_seconds_bucket{stage="inference",le="0.0005"} 1' in text
+    assert 'safe_ai_stage_seconds_bucket{stage="inference",le="5"} 1' in text
+    assert 'safe_ai_stage_seconds_bucket{stage="inference",le="+Inf"} 2' in text
+    assert 'safe_ai_stage_seconds_count{stage="inference"} 2' in text
+    assert 'safe_ai_request_seconds_count{endpoint="risk_assessment",status="5xx"} 1' in text
+    assert 'safe_ai_profiles_written_total 0' in text
+
+
+def test_profile_token_writes_a_profile(tmp_path):
+    local = Tracer(profile_token='secret', profile_dir=str(tmp_path))
+    local.begin_request('wrong')
+    local.end_request('chat', 200)
+    assert os.listdir(tmp_path) == []
+
+    local.begin_request('secret')
+    sum(i * i for i in range(1000))
+    local.end_request('chat', 200)
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and files[0].endswith('-chat.prof')
+    assert local.profiles_written == 1
+
+
+def test_server_timing_and_metrics_endpoint(enabled_tracer):
+    client = app.test_client()
+    # A message no other test sends, so its classification is not cached
+    response = client.post('/api/chat', json={'message': 'I keep having nightmares about tracing'})
+    assert response.status_code == 200
+    server_timing = response.headers['Server-Timing']
+    assert 'sentiment;dur=' in server_timing and 'keywords;dur=' in server_timing
+    assert 'json;dur=' in server_timing and 'total;dur=' in server_timing
+
+    response = client.post('/api/risk-assessment', json={'age': 30, 'bmi': 25})
+    assert 'inference;dur=' in response.headers['Server-Timing']
+
+    metrics = client.get('/metrics')
+    assert metrics.mimetype == 'text/plain'
+    text = metrics.get_data(as_text=True)
+    assert 'safe_ai_stage_seconds_count{stage="inference"}' in text
+    assert 'safe_ai_request_seconds_count{endpoint="chat",status="2xx"} 1' in text
+
+
+def test_no_server_timing_when_disabled():
+    was_enabled = tracer.enabled
+    tracer.enabled = False
+    try:
+        response = app.test_client().get('/api/conversation-stats')
+    finally:
+        tracer.enabled = was_enabled
+    assert 'Server-Timing' not in response.headers
@@ -0,0 +1,106 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from chatbot import SentimentChatbot
+from response_engine import (EMPTY_SESSION, ResponseEngine, SentimentEngine, TraumaEngine, get_engine,
+                             session_snapshot)
+from sentiment_service import SentimentService
+from trauma_app import TraumaInformedApp
+
+MESSAGES = [
+    'I was assaulted last month',
+    'I keep having nightmares',
+    'I feel scared all the time',
+    'Sometimes I want to die',
+    'Today was a really good day',
+    'I have been so stressed and I cannot sleep',
+]
+
+
+def test_classify_is_immutable_and_cached():
+    engine = get_engine(TraumaEngine)
+    classification = engine.classify('I was assaulted and I feel so alone')
+    assert classification.trauma_indicator == 'trauma_disclosure'
+    assert classification.categories == frozenset({'trauma', 'isolation'})
+    assert classification.crisis is False
+    with pytest.raises(AttributeError):
+        classification.sentiment = 'positive'
+    assert engine.classify('I was assaulted and I feel so alone') is classification
+
+
+def test_decide_depends_only_on_its_arguments():
+    engine = get_engine(TraumaEngine)
+    classification = engine.classify('I feel scared all the time')
+    assert engine.decide(classification)['type'] == 'trauma_screening'
+    assert engine.decide(classification) == engine.decide(classification, EMPTY_SESSION)
+
+    answered = session_snapshot({'safety_concerns': 'safe at home', 'support_system': None})
+    assert answered.known_factors == frozenset({'safety_concerns'})
+    assert engine.decide(classification, answered).get('type') != 'trauma_screening'
+
+
+def test_chatbots_wrap_the_engines():
+    app = TraumaInformedApp()
+    engine = app.chatbot.engine
+    general = SentimentChatbot()
+    for message in MESSAGES:
+        expected = engine.decide(engine.classify(message), app.chatbot.snapshot())
+        assert app.chat(message) == expected
+        assert app.chatbot.conversation_history[-1]['sentiment'] == engine.classify(message).sentiment
+        assert general.get_response(message) == general.engine.respond(message, general.snapshot())
+    assert app.chatbot.stats.total_messages == len(MESSAGES)
+
+
+def test_parallel_classification_matches_serial():
+    engine = TraumaEngine()
+    expected = [engine.classify(message) for message in MESSAGES]
+    engine.clear_cache()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert list(pool.map(engine.classify, MESSAGES * 20)) == expected * 20
+
+
+def test_engines_pickle_to_the_shared_engine():
+    assert pickle.loads(pickle.dumps(get_engine(TraumaEngine))) is get_engine(TraumaEngine)
+
+    custom = get_engine(SentimentEngine, thresholds={'negative': -0.2})
+    restored = pickle.loads(pickle.dumps(custom))
+    assert restored is custom and restored.thresholds['negative'] == -0.2
+
+    app = TraumaInformedApp()
+    app.chat('I keep having nightmares')
+    assert pickle.loads(pickle.dumps(app)).chatbot.engine is app.chatbot.engine
+
+
+def test_engines_must_implement_decide():
+    class Incomplete(ResponseEngine):
+        pass
+
+    with pytest.raises(TypeError, match='decide'):
+        Incomplete()
+
+
+def test_overrides():
+    engine = get_engine(TraumaEngine, lexicons={'ptsd': ['great']}, thresholds={'positive': 1.0})
+    assert engine.sentiment_label(0.5) == 'neutral'
+    assert engine.sentiment_label(-0.45) == 'distressed'
+    assert engine.classify('what a great day').trauma_indicator == 'ptsd_symptoms'
+    assert engine.lexicons['crisis'] == tuple(TraumaEngine.LEXICONS['crisis'])
+    with pytest.raises(ValueError, match="Unknown sentiment threshold 'calm'"):
+        TraumaEngine(thresholds={'calm': 0.0})
+
+
+def test_uncached_sentiment_means_uncached_classification():
+    service = SentimentService('lexicon', cache_size=0)
+    engine = get_engine(TraumaEngine, sentiment=service)
+    engine.classify('I keep having nightmares')
+    engine.classify('I keep having nightmares')
+    assert service.calls == 2
+
+
+def test_matcher_setter_swaps_engine():
+    app = TraumaInformedApp()
+    app.chatbot.matcher = get_engine(TraumaEngine, lexicons={'ptsd': ['great']}).matcher
+    assert app.chat('what a great day')['sentiment'] == 'ptsd_support'
+    assert get_engine(TraumaEngine).classify('what a great day').trauma_indicator is None
@@ -0,0 +1,49 @@
+import json
+
+from risk_model import predict_risk, score_records
+from safe_ai_server import app
+
+
+def test_score_records_keeps_order_and_reports_errors():
+    records = [
+        {'age': 25, 'bmi': 22.5},
+        {'age': 'abc', 'bmi': 22.5},
+        {'bmi': 30},
+        {'id': 'p-4', 'age': '40', 'imc': 31.2},
+        'not an object',
+    ]
+    results = list(score_records(records, chunk_size=2))
+
+    assert [r['index'] for r in results] == [0, 1, 2, 3, 4]
+    assert results[0]['risk_level'] == predict_risk(25, 22.5)['risk_level']
+    assert abs(results[0]['confidence'] - predict_risk(25, 22.5)['confidence']) < 1e-6
+    assert results[1]['error'] == 'age must be a number'
+    assert results[2]['error'] == 'age is required'
+    assert results[3]['id'] == 'p-4' and 'risk_level' in results[3]
+    assert results[4]['error'] == 'Record must be a JSON object'
+
+
+def test_batch_endpoint_json_array():
+    client = app.test_client()
+    response = client.post('/api/risk-assessment-batch',
+                           json=[{'age': 25, 'bmi': 22.5}, {'age': 60, 'bmi': None}])
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert response.status_code == 200
+    assert lines[0]['risk_level'] and lines[1]['error'] == 'bmi is required'
+
+
+def test_batch_endpoint_ndjson():
+    client = app.test_client()
+    body = '{"age": 30, "bmi": 25}\n{broken\n\n{"age": 19, "bmi": 18}\n'
+    response = client.post('/api/risk-assessment-batch', data=body,
+                           content_type='application/x-ndjson')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line['index'] for line in lines] == [0, 1, 2]
+    assert lines[1]['error'] == 'Invalid JSON'
+    assert 'risk_level' in lines[2]
+
+
+def test_batch_endpoint_rejects_bad_body():
+    client = app.test_client()
+    response = client.post('/api/risk-assessment-batch', json={'age': 25})
+    assert response.status_code == 400
@@ -0,0 +1,57 @@
+import threading
+import time
+
+import numpy as np
+
+from risk_batcher import MicroBatcher
+from risk_model import predict_proba, predict_risk
+
+
+def test_idle_calls_run_directly():
+    batcher = MicroBatcher(predict_proba)
+    result = batcher.predict((25, 22.5))
+    assert np.allclose(result, predict_proba([[25, 22.5]])[0])
+    stats = batcher.stats()
+    assert stats['direct_calls'] == 1 and stats['batches'] == 1
+
+
+def test_concurrent_calls_are_coalesced():
+    calls = []
+
+    def slow_score(X):
+        calls.append(len(X))
+        time.sleep(0.01)
+        return X * 2
+
+    batcher = MicroBatcher(slow_score, max_batch=16, max_wait=0.005)
+    results = {}
+
+    def worker(i):
+        results[i] = batcher.predict((i, i))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert all(list(results[i]) == [2 * i, 2 * i] for i in range(20))
+    assert sum(calls) == 20 and len(calls) < 20
+    print(batcher.stats())
+
+
+def test_errors_reach_every_caller():
+    def broken(X):
+        raise RuntimeError('model unavailable')
+
+    batcher = MicroBatcher(broken)
+    try:
+        batcher.predict((25, 22.5))
+    except RuntimeError as e:
+        assert str(e) == 'model unavailable'
+    else:
+        raise AssertionError('expected RuntimeError')
+
+
+def test_predict_risk_batched_matches_direct():
+    assert predict_risk(30, 24, batched=True) == predict_risk(30, 24)
@@ -0,0 +1,24 @@
+import subprocess
+import sys
+
+from risk_model import predict_risk, RISK_LABELS
+
+
+def test_import_does_not_load_training_stack():
+    # Importing the inference module must not pull in pandas or TensorFlow
+    code = "import sys, risk_model; print(sorted(m for m in ('pandas', 'tensorflow') if m in sys.modules))"
+    output = subprocess.check_output([sys.executable, '-c', code], text=True)
+    assert output.strip() == '[]'
+
+
+def test_predict_risk():
+    result = predict_risk(25, 22.5)
+    assert 'error' not in result, result
+    assert result['risk_level'] in RISK_LABELS
+    assert abs(sum(result['probabilities'].values()) - 1.0) < 1e-4
+    print(f"Age: 25, IMC: 22.5 -> {result['risk_level']} ({result['confidence']:.2%})")
+
+
+def test_missing_model_returns_error():
+    result = predict_risk(25, 22.5, model_path='missing_model.keras', backend='keras')
+    assert 'error' in result
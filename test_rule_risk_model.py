@@ -0,0 +1,79 @@
+import numpy as np
+
+import risk_model
+from benchmark_risk_scorers import run
+from load_real_data import RISK_THRESHOLDS, assign_risk_levels
+from risk_model import predict_proba, predict_risk, register_backend
+from rule_risk_model import DEFAULT_RULE_PATH, DEFAULT_THRESHOLDS, RuleRiskModel
+from training_data import load_training_data
+
+
+def test_rule_matches_preprocessing_labels():
+    assert DEFAULT_THRESHOLDS == tuple(float(t) for t in RISK_THRESHOLDS)
+    X, _ = load_training_data()
+    X = X.to_numpy(dtype=np.float64)
+    model = RuleRiskModel.load(DEFAULT_RULE_PATH)
+    expected = assign_risk_levels(X[:, 0], X[:, 1])
+    assert np.array_equal(model.predict_levels(X), expected)
+    assert np.array_equal(model.predict_proba(X).argmax(axis=1), expected)
+
+
+def test_probabilities_are_well_formed():
+    model = RuleRiskModel(temperature=0.05)
+    X = np.array([[0, 0], [20, 19.99], [20, 20.01], [25, 25.01], [1e6, 1e6], [-1e6, 3]])
+    p = model.predict_proba(X)
+    assert np.all(p >= 0) and np.allclose(p.sum(axis=1), 1.0)
+    assert p.argmax(axis=1).tolist() == [0, 0, 1, 2, 2, 0]
+    for (age, imc), row in zip(X.tolist(), p):
+        assert np.allclose(model.score(age, imc), row)
+
+
+def test_calibrate_recovers_temperature():
+    rng = np.random.RandomState(0)
+    age = rng.uniform(15, 40, 5000)
+    imc = rng.uniform(15, 35, 5000)
+    truth = RuleRiskModel(temperature=0.5)
+    labels = [rng.choice(3, p=p) for p in truth.predict_proba(np.column_stack([age, imc]))]
+    fitted = RuleRiskModel.calibrate(age, imc, labels)
+    assert 0.35 < fitted.temperature < 0.7
+
+
+def test_save_round_trip(tmp_path):
+    path = str(tmp_path / 'rule.json')
+    RuleRiskModel(temperature=0.25).save(path)
+    model = RuleRiskModel.load(path)
+    assert model.thresholds == (40.0, 50.0) and model.temperature == 0.25
+
+
+def test_rule_backend_agrees_with_mlp():
+    for age, imc in [(25, 22.5), (18, 19), (30, 15), (45, 30), (60, 35)]:
+        rule = predict_risk(age, imc, backend='rule')
+        mlp = predict_risk(age, imc, backend='numpy')
+        assert 'error' not in rule, rule
+        assert rule['risk_level'] == mlp['risk_level']
+        assert set(rule['probabilities']) == set(mlp['probabilities'])
+
+    # A missing parameter file falls back to the uncalibrated rule
+    result = predict_risk(25, 22.5, backend='rule', rule_path='missing_rule.json')
+    assert result['risk_level'] == 'Medium Risk'
+
+
+def test_register_backend(monkeypatch):
+    class Constant:
+        def predict_proba(self, X):
+            return np.tile([0.1, 0.2, 0.7], (len(X), 1))
+
+    monkeypatch.setattr(risk_model, 'BACKENDS', dict(risk_model.BACKENDS))
+    register_backend('constant', lambda **paths: Constant())
+    assert predict_risk(25, 22.5, backend='constant')['risk_level'] == 'High Risk'
+    assert predict_proba([[25, 22.5], [30, 30]], backend='constant').shape == (2, 3)
+    assert 'error' in predict_risk(25, 22.5, backend='missing')
+
+
+def test_agreement_harness():
+    result = run('numpy', 'rule', grid_step=2.0)
+    print({k: v for k, v in result.items() if k != 'disagreements'})
+    assert result['data_level_agreement'] > 0.99
+    assert result['candidate_accuracy'] > 0.99
+    assert result['grid_rows'] > 0
+    assert result['candidate_rows_per_second'] > 0
@@ -0,0 +1,38 @@
+import subprocess
+import sys
+
+from sentiment_service import SentimentService
+
+
+def test_textblob_is_imported_lazily():
+    code = "import sys, trauma_chatbot, chatbot; print('textblob' in sys.modules)"
+    output = subprocess.check_output([sys.executable, '-c', code], text=True)
+    assert output.strip() == 'False'
+
+
+def test_cache_hits_on_normalized_text():
+    service = SentimentService(cache_size=16)
+    first = service.polarity("Things are going great!")
+    second = service.polarity("  Things are   going great! ")
+    assert first == second > 0
+    stats = service.stats()
+    assert stats['cache_hits'] == 1 and stats['cache_misses'] == 1
+    print(stats)
+
+
+def test_analyze_many_matches_single_calls():
+    service = SentimentService()
+    messages = ["I'm feeling really sad today", "studies are going well",
+                "I'm feeling really sad today", "I don't know how I feel"]
+    scores = service.analyze_many(messages)
+    assert scores == [SentimentService().polarity(m) for m in messages]
+    assert service.stats()['cache_misses'] == 3
+
+
+def test_unknown_backend():
+    try:
+        SentimentService('missing')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('expected ValueError')
@@ -0,0 +1,159 @@
+from session_store import (SESSION_HEADER, MemorySessionBackend, SQLiteSessionBackend,
+                           SessionManager)
+from trauma_app import TraumaInformedApp
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def check_backend(backend):
+    clock = FakeClock()
+    sessions = SessionManager(backend, TraumaInformedApp, max_sessions=2, idle_ttl=60, clock=clock)
+
+    first_id, first = sessions.get(None)
+    first.chat("I keep having nightmares")
+    sessions.save(first_id, first)
+
+    same_id, same = sessions.get(first_id)
+    assert same_id == first_id
+    assert len(same.chatbot.conversation_history) == 1
+
+    # Unknown or malformed tokens never become session ids
+    assert sessions.get('not-a-real-session-token-000')[0] != 'not-a-real-session-token-000'
+    assert sessions.get('bad token!')[0] != 'bad token!'
+
+    # LRU: a third session pushes out the least recently used one
+    clock.now += 1
+    second_id, second = sessions.get(None)
+    sessions.save(second_id, second)
+    clock.now += 1
+    sessions.get(first_id)
+    clock.now += 1
+    third_id, third = sessions.get(None)
+    sessions.save(third_id, third)
+    assert sessions.get(second_id)[0] != second_id
+    assert sessions.get(first_id)[0] == first_id
+
+    # Idle sessions expire
+    clock.now += 120
+    assert sessions.get(third_id)[0] != third_id
+    print(sessions.stats())
+
+
+def test_memory_backend():
+    check_backend(MemorySessionBackend())
+
+
+def test_sqlite_backend(tmp_path):
+    check_backend(SQLiteSessionBackend(str(tmp_path / 'sessions.db')))
+
+
+def test_memory_cap_evicts_sessions():
+    sessions = SessionManager(MemorySessionBackend(), TraumaInformedApp, max_bytes=5000,
+                              sizeof=lambda state: 3000)
+    first_id, first = sessions.get(None)
+    sessions.save(first_id, first)
+    second_id, second = sessions.get(None)
+    sessions.save(second_id, second)
+    assert sessions.stats()['sessions'] == 1
+    assert sessions.get(second_id)[0] == second_id
+
+
+def spilling_app(spill_dir):
+    def factory():
+        safe_ai_app = TraumaInformedApp()
+        history = safe_ai_app.chatbot.conversation_history
+        history.max_in_memory = 2
+        history.spill_dir = spill_dir
+        return safe_ai_app
+    return factory
+
+
+def check_eviction_discards_spill_logs(backend, spill_dir):
+    clock = FakeClock()
+    sessions = SessionManager(backend, spilling_app(str(spill_dir)), max_sessions=1, idle_ttl=60, clock=clock,
+                              on_evict=lambda state: state.chatbot.conversation_history.discard())
+
+    def chat_and_save(session_id=None):
+        session_id, state = sessions.get(session_id)
+        for i in range(5):
+            state.chat(f"I keep having nightmares {i}")
+        sessions.save(session_id, state)
+        return session_id
+
+    # LRU: the second session pushes the first out
+    first_id = chat_and_save()
+    assert len(list(spill_dir.iterdir())) == 1
+    clock.now += 1
+    second_id = chat_and_save()
+    assert len(list(spill_dir.iterdir())) == 1
+    assert sessions.stats()['evicted'] == 1
+
+    # TTL: expired on its next request
+    clock.now += 120
+    assert sessions.get(second_id)[0] != second_id
+    assert list(spill_dir.iterdir()) == []
+
+    # Explicit delete
+    third_id = chat_and_save()
+    sessions.delete(third_id)
+    assert list(spill_dir.iterdir()) == []
+    assert first_id != second_id
+
+
+def test_memory_eviction_discards_spill_logs(tmp_path):
+    check_eviction_discards_spill_logs(MemorySessionBackend(), tmp_path / 'history')
+
+
+def test_sqlite_eviction_discards_spill_logs(tmp_path):
+    check_eviction_discards_spill_logs(SQLiteSessionBackend(str(tmp_path / 'sessions.db')), tmp_path / 'history')
+
+
+def test_server_keeps_users_apart():
+    from safe_ai_server import app
+
+    alice = app.test_client()
+    bob = app.test_client()
+    alice.post('/api/chat', json={'message': 'I was assaulted last month'})
+    bob.post('/api/chat', json={'message': 'Things are going great!'})
+    bob.post('/api/chat', json={'message': 'I feel a bit better'})
+
+    assert alice.get('/api/conversation-stats').get_json()['total_messages'] == 1
+    assert bob.get('/api/conversation-stats').get_json()['total_messages'] == 2
+
+    alice.post('/api/clear-conversation')
+    assert alice.get('/api/conversation-stats').get_json()['total_messages'] == 0
+    assert bob.get('/api/conversation-stats').get_json()['total_messages'] == 2
+
+    # API clients without cookies can use the header instead
+    response = app.test_client().post('/api/chat', json={'message': 'hello'})
+    token = response.headers[SESSION_HEADER]
+    stats = app.test_client().get('/api/conversation-stats', headers={SESSION_HEADER: token})
+    assert stats.get_json()['total_messages'] == 1
+
+
+def test_unsaved_sessions_get_no_token():
+    from safe_ai_server import app, sessions
+    client = app.test_client()
+    before = sessions.stats()['sessions']
+    response = client.get('/api/conversation-stats')
+    assert SESSION_HEADER not in response.headers
+    assert 'Set-Cookie' not in response.headers
+    assert sessions.stats()['sessions'] == before
+
+    token = client.post('/api/chat', json={'message': 'hello'}).headers[SESSION_HEADER]
+    # Later requests keep the stored session
+    assert client.get('/api/conversation-stats').headers[SESSION_HEADER] == token
+    assert client.post('/api/chat', json={'message': 'hello again'}).headers[SESSION_HEADER] == token
+
+
+def test_only_server_sessions_spill():
+    from safe_ai_server import HISTORY_DIR, new_session_app
+    assert new_session_app().chatbot.conversation_history.spill_dir == HISTORY_DIR
+    # CLIs, Streamlit and bulk runs never discard, so they keep turns in memory only
+    assert TraumaInformedApp().chatbot.conversation_history.spill_dir == ''
@@ -0,0 +1,52 @@
+import csv
+import json
+
+from sweep_risk_model import RESULT_COLUMNS, baseline_configs, cheapest, mlp_configs, run_sweep, write_results
+
+
+def test_configs_cover_the_grid():
+    configs = mlp_configs([(32, 16), (16,)], [32, 128], [0.001], epochs=5)
+    assert [c['name'] for c in configs] == [
+        'mlp_32x16_bs32_lr0.001', 'mlp_32x16_bs128_lr0.001', 'mlp_16_bs32_lr0.001', 'mlp_16_bs128_lr0.001',
+    ]
+    assert configs[0]['hidden_units'] == [32, 16]
+
+
+def test_sweep_records_every_metric(tmp_path):
+    configs = mlp_configs([(8,)], [256], [0.01], epochs=1) + baseline_configs()
+    results = run_sweep(configs, workers=0)
+
+    assert [r['name'] for r in results] == ['mlp_8_bs256_lr0.01', 'logistic', 'linear']
+    for result in results:
+        assert 'error' not in result, result.get('error')
+        assert result['train_seconds'] > 0
+        assert result['latency_ms_per_1k'] > 0
+        assert result['model_bytes'] > 0
+        assert 0 <= result['f1_macro'] <= 1
+        assert 0 <= result['accuracy'] <= 1
+    assert json.loads(results[0]['params'])['hidden_units'] == [8]
+
+    path = str(tmp_path / 'results.csv')
+    write_results(results, path)
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == RESULT_COLUMNS
+    assert len(rows) == 3
+
+
+def test_failed_runs_are_recorded(tmp_path):
+    results = run_sweep(baseline_configs()[:1], data_path=str(tmp_path / 'missing.feather'), workers=0)
+    assert results[0]['error']
+    assert cheapest(results, 0.0) is None
+
+
+def test_cheapest_prefers_latency_then_size():
+    results = [
+        {'name': 'big', 'accuracy': 0.99, 'latency_ms_per_1k': 0.5, 'model_bytes': 9000},
+        {'name': 'small', 'accuracy': 0.97, 'latency_ms_per_1k': 0.5, 'model_bytes': 2000},
+        {'name': 'fast', 'accuracy': 0.90, 'latency_ms_per_1k': 0.1, 'model_bytes': 1000},
+        {'name': 'broken', 'error': 'boom'},
+    ]
+    assert cheapest(results, 0.95)['name'] == 'small'
+    assert cheapest(results, 0.5)['name'] == 'fast'
+    assert cheapest(results, 0.999) is None
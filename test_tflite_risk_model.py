@@ -0,0 +1,39 @@
+import numpy as np
+
+from risk_model import DEFAULT_MODEL_PATH, DEFAULT_SCALER_PATH, predict_proba, predict_risk
+from tflite_risk_model import TFLiteRiskModel, default_tflite_path, export_tflite
+from training_data import load_training_data
+
+
+def test_committed_artifacts_match_numpy():
+    X, _ = load_training_data()
+    X = X.to_numpy(dtype=np.float64)[::10]
+    expected = predict_proba(X, backend='numpy')
+    for quantization in ('float16', 'int8'):
+        model = TFLiteRiskModel.load(default_tflite_path(quantization))
+        actual = model.predict_proba(X)
+        agreement = (actual.argmax(axis=1) == expected.argmax(axis=1)).mean()
+        print(f"{quantization}: agreement {agreement:.2%}, max diff {np.abs(actual - expected).max():.4f}")
+        assert agreement > 0.99
+        assert np.allclose(actual.sum(axis=1), 1.0, atol=1e-5)
+
+
+def test_batch_size_changes():
+    model = TFLiteRiskModel.load(default_tflite_path('int8'))
+    rows = np.array([[25, 22.5], [18, 19], [45, 30], [30, 15], [60, 35]])
+    batch = model.predict_proba(rows)
+    single = np.vstack([model.predict_proba(row) for row in rows])
+    assert batch.shape == (5, 3)
+    assert np.allclose(batch, single)
+
+
+def test_tflite_backend():
+    result = predict_risk(25, 22.5, backend='tflite')
+    assert 'error' not in result, result
+    assert result['risk_level'] == predict_risk(25, 22.5, backend='numpy')['risk_level']
+
+
+def test_export_float16(tmp_path):
+    path = export_tflite(DEFAULT_MODEL_PATH, DEFAULT_SCALER_PATH, str(tmp_path / 'model.tflite'), 'float16')
+    probabilities = TFLiteRiskModel.load(path).predict_proba([[25, 22.5]])
+    assert np.allclose(probabilities, predict_proba([[25, 22.5]], backend='numpy'), atol=1e-3)
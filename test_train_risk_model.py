@@ -0,0 +1,38 @@
+import os
+
+import joblib
+import numpy as np
+import tensorflow as tf
+
+import train_risk_model
+from numpy_risk_model import NumpyRiskModel
+from risk_model import DEFAULT_MODEL_PATH, DEFAULT_SCALER_PATH
+from tflite_risk_model import TFLiteRiskModel
+
+
+def test_promote_refreshes_every_serving_format(tmp_path, monkeypatch):
+    served = tmp_path / 'served'
+    served.mkdir()
+    for name in ('DEFAULT_MODEL_PATH', 'DEFAULT_SCALER_PATH', 'NPZ_WEIGHTS_PATH', 'FLAT_WEIGHTS_PATH',
+                 'DEFAULT_WEIGHTS_PATH'):
+        path = getattr(train_risk_model, name)
+        monkeypatch.setattr(train_risk_model, name, str(served / os.path.basename(path)))
+    monkeypatch.setattr(train_risk_model, 'default_tflite_path',
+                        lambda quantization: str(served / f'model_{quantization}.tflite'))
+
+    model = tf.keras.models.load_model(DEFAULT_MODEL_PATH)
+    scaler = joblib.load(DEFAULT_SCALER_PATH)
+    train_risk_model.save_artifacts(model, scaler, {'version': 'test'}, str(tmp_path / 'artifacts'), 'test')
+
+    assert sorted(os.listdir(served)) == sorted([
+        os.path.basename(DEFAULT_MODEL_PATH), os.path.basename(DEFAULT_SCALER_PATH),
+        'mental_health_risk_model_weights.npz', 'mental_health_risk_model_weights.bin',
+        'model_float16.tflite', 'model_int8.tflite',
+    ])
+    X = np.random.RandomState(2).uniform(15, 60, (200, 2))
+    expected = NumpyRiskModel.load(str(served / 'mental_health_risk_model_weights.npz')).predict_proba(X)
+    flat = NumpyRiskModel.load(str(served / 'mental_health_risk_model_weights.bin')).predict_proba(X)
+    assert np.array_equal(flat, expected)
+    for quantization in ('float16', 'int8'):
+        actual = TFLiteRiskModel.load(str(served / f'model_{quantization}.tflite')).predict_proba(X)
+        assert (actual.argmax(axis=1) == expected.argmax(axis=1)).mean() > 0.95
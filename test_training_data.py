@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+import training_data
+from training_data import DEFAULT_CSV_PATH, DEFAULT_DATASET_PATH, load_training_data, read_dataset, write_dataset
+
+
+def test_committed_dataset_matches_csv():
+    X_csv, y_csv = load_training_data(DEFAULT_CSV_PATH)
+    X, y = load_training_data(DEFAULT_DATASET_PATH)
+    assert X.dtypes.tolist() == [np.float32, np.float32]
+    assert y.dtype == np.int8
+    assert np.array_equal(X.to_numpy(), X_csv.to_numpy())
+    assert np.array_equal(y.to_numpy(), y_csv.to_numpy())
+
+
+def test_feather_columns_are_not_copied(monkeypatch):
+    data = read_dataset(DEFAULT_DATASET_PATH)
+    monkeypatch.setattr(training_data, 'read_dataset', lambda path=None: data)
+    X, y = load_training_data(DEFAULT_DATASET_PATH)
+    assert np.shares_memory(X['Age'].to_numpy(), data['Age'].to_numpy())
+    assert np.shares_memory(y.to_numpy(), data['risk_level'].to_numpy())
+
+
+def test_formats_round_trip_only_training_columns(tmp_path):
+    df = pd.DataFrame({
+        'Age': [20.5, 31.0, None, 45.25],
+        'IMC': [22.0, 27.5, 30.0, 19.0],
+        'risk_level': [0, 1, 2, 2],
+        'Religion': ['a', None, None, 'b'],
+    })
+    for name in ('data.feather', 'data.parquet'):
+        path = str(tmp_path / name)
+        write_dataset(df, path)
+        data = read_dataset(path)
+        assert list(data.columns) == ['Age', 'IMC', 'risk_level']
+        assert data['risk_level'].tolist() == [0, 1, 2]
+        assert data['Age'].tolist() == [20.5, 31.0, 45.25]
+        assert read_dataset(path, columns=['IMC'])['IMC'].dtype == np.float32
@@ -0,0 +1,142 @@
+# TFLite export and runtime for the risk model.
+#
+# export_tflite() converts the trained Keras model into a float16 or int8
+# quantized .tflite file. The scaler is folded into the graph as a
+# Normalization layer, so the artifact takes raw Age/IMC rows and serving needs
+# neither joblib nor scikit-learn. The int8 model is fully integer-quantized
+# (float input/output) with a representative sample of the training data.
+#
+# TFLiteRiskModel runs an artifact with the lightest interpreter available:
+# ai_edge_litert or tflite_runtime (a few MB, no TensorFlow), falling back to
+# tf.lite.Interpreter when only full TensorFlow is installed.
+#
+#   python tflite_risk_model.py --quantization float16 int8
+import argparse
+import os
+import threading
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+QUANTIZATIONS = ('float16', 'int8')
+
+
+def default_tflite_path(quantization):
+    return os.path.join(BASE_DIR, f'mental_health_risk_model_{quantization}.tflite')
+
+
+DEFAULT_TFLITE_PATH = os.environ.get('RISK_MODEL_TFLITE') or default_tflite_path('int8')
+
+
+def representative_rows(data_path=None, rows=500, seed=42):
+    from training_data import load_training_data
+
+    X, _ = load_training_data(data_path)
+    X = X.to_numpy(dtype=np.float32)
+    rng = np.random.RandomState(seed)
+    return X[rng.choice(len(X), min(rows, len(X)), replace=False)]
+
+
+def export_tflite(model_path, scaler_path, output_path=None, quantization='int8', data_path=None):
+    """
+    Convert the Keras model (with its scaler folded in) to a quantized .tflite
+    file; returns the output path
+    """
+    import joblib
+    import tensorflow as tf
+
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{quantization}'")
+    output_path = output_path or default_tflite_path(quantization)
+
+    model = tf.keras.models.load_model(model_path)
+    scaler = joblib.load(scaler_path)
+
+    inputs = tf.keras.Input(shape=(len(scaler.mean_),), name='age_imc')
+    scaled = tf.keras.layers.Normalization(mean=scaler.mean_, variance=np.square(scaler.scale_))(inputs)
+    wrapped = tf.keras.Model(inputs, model(scaled))
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(wrapped)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        sample = representative_rows(data_path)
+
+        def representative_dataset():
+            for row in sample:
+                yield [row.reshape(1, -1)]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(converter.convert())
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def load_interpreter_class():
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteRiskModel:
+    def __init__(self, model_content):
+        Interpreter = load_interpreter_class()
+        self.runtime = Interpreter.__module__.split('.')[0]
+        self.interpreter = Interpreter(model_content=model_content)
+        self.interpreter.allocate_tensors()
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self.batch_size = 1
+        # An interpreter holds its tensors in place, so calls are serialized
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=DEFAULT_TFLITE_PATH):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def predict_proba(self, X):
+        """
+        Class probabilities for raw (unscaled) Age/IMC rows
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32).reshape(-1, 2)
+        with self._lock:
+            # Re-planning the graph is only needed when the batch size changes
+            if len(X) != self.batch_size:
+                self.interpreter.resize_tensor_input(self.input_index, X.shape)
+                self.interpreter.allocate_tensors()
+                self.batch_size = len(X)
+            self.interpreter.set_tensor(self.input_index, X)
+            self.interpreter.invoke()
+            probabilities = self.interpreter.get_tensor(self.output_index).copy()
+        # The int8 softmax comes out in steps of 1/256; rescale rows to sum to 1
+        probabilities /= np.maximum(probabilities.sum(axis=1, keepdims=True), 1e-12)
+        return probabilities
+
+
+if __name__ == "__main__":
+    from risk_model import DEFAULT_MODEL_PATH, DEFAULT_SCALER_PATH
+
+    parser = argparse.ArgumentParser(description='Export the Keras risk model to quantized TFLite')
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--scaler', default=DEFAULT_SCALER_PATH)
+    parser.add_argument('--quantization', nargs='+', choices=QUANTIZATIONS, default=list(QUANTIZATIONS))
+    parser.add_argument('--data', default=None, help='Representative data for int8 (default: SAFE_AI_TRAINING_DATA)')
+    parser.add_argument('--output-dir', default=BASE_DIR)
+    args = parser.parse_args()
+
+    for quantization in args.quantization:
+        output_path = os.path.join(args.output_dir, os.path.basename(default_tflite_path(quantization)))
+        path = export_tflite(args.model, args.scaler, output_path, quantization, args.data)
+        print(f"{quantization} TFLite model saved as: {path} ({os.path.getsize(path):,} bytes)")
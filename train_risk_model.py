@@ -0,0 +1,209 @@
+# Training entry point for the mental health risk model.
+#
+# Run this once to (re)build the model; the serving code in risk_model.py only
+# loads the artifacts written here and never trains at import time.
+#
+#   python train_risk_model.py --data processed_real_data.feather
+import argparse
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+import tensorflow as tf
+import joblib
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import classification_report, confusion_matrix
+
+from features import FEATURE_COLUMNS
+from numpy_risk_model import DEFAULT_WEIGHTS_PATH, FLAT_WEIGHTS_PATH, NPZ_WEIGHTS_PATH, export_weights
+from risk_model import DEFAULT_MODEL_PATH, DEFAULT_SCALER_PATH
+from tflite_risk_model import QUANTIZATIONS, default_tflite_path, export_tflite
+from training_data import default_data_path, load_training_data
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ARTIFACT_DIR = os.path.join(BASE_DIR, 'artifacts')
+
+
+def load_dataset(data_path=None):
+    # Feather/Parquet are memory-mapped and only Age, IMC and risk_level are read
+    return load_training_data(data_path)
+
+
+def split_dataset(X, y, seed=42):
+    # Scale features
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_scaled, y, test_size=0.2, random_state=seed, stratify=y
+    )
+    return scaler, X_train, X_test, y_train, y_test
+
+
+def build_model(n_features, hidden_units=(64, 32, 16), dropout=(0.3, 0.2), learning_rate=0.001):
+    layers = [tf.keras.layers.Input(shape=(n_features,))]
+    for i, units in enumerate(hidden_units):
+        layers.append(tf.keras.layers.Dense(units, activation='relu', name=f'hidden_layer_{i + 1}'))
+        if i < len(dropout) and dropout[i]:
+            layers.append(tf.keras.layers.Dropout(dropout[i], name=f'dropout_{i + 1}'))
+    layers.append(tf.keras.layers.Dense(3, activation='softmax', name='output_layer'))
+
+    model = tf.keras.Sequential(layers)
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
+        loss='sparse_categorical_crossentropy',
+        metrics=['accuracy']
+    )
+    return model
+
+
+def train_model(model, X_train, y_train, X_test, y_test, epochs=100, batch_size=32, verbose=1):
+    callbacks = [
+        tf.keras.callbacks.EarlyStopping(
+            monitor='val_loss',
+            patience=10,
+            restore_best_weights=True
+        ),
+        tf.keras.callbacks.ReduceLROnPlateau(
+            monitor='val_loss',
+            factor=0.5,
+            patience=5,
+            min_lr=0.0001
+        )
+    ]
+
+    return model.fit(
+        X_train, y_train,
+        epochs=epochs,
+        batch_size=batch_size,
+        validation_data=(X_test, y_test),
+        callbacks=callbacks,
+        verbose=verbose
+    )
+
+
+def save_artifacts(model, scaler, metadata, artifact_dir, version, promote=True, data_path=None):
+    """
+    Write model, scaler, metadata and every serving export (NumPy .npz and
+    flat weights, float16 and int8 TFLite) to artifact_dir/<version>/ and,
+    when promote is set, copy them all over the served paths so no format is
+    left stale. data_path supplies the int8 calibration rows.
+    """
+    version_dir = os.path.join(artifact_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+
+    def versioned(path):
+        return os.path.join(version_dir, os.path.basename(path))
+
+    model_path = versioned(DEFAULT_MODEL_PATH)
+    scaler_path = versioned(DEFAULT_SCALER_PATH)
+    model.save(model_path)
+    joblib.dump(scaler, scaler_path)
+    # (written file, served path) pairs
+    exports = [(model_path, DEFAULT_MODEL_PATH), (scaler_path, DEFAULT_SCALER_PATH)]
+    weights_paths = [NPZ_WEIGHTS_PATH, FLAT_WEIGHTS_PATH]
+    if DEFAULT_WEIGHTS_PATH not in weights_paths:
+        # RISK_MODEL_WEIGHTS points elsewhere
+        weights_paths.append(DEFAULT_WEIGHTS_PATH)
+    for path in weights_paths:
+        exports.append((export_weights(model_path, scaler_path, versioned(path)), path))
+    for quantization in QUANTIZATIONS:
+        path = default_tflite_path(quantization)
+        exports.append((export_tflite(model_path, scaler_path, versioned(path), quantization, data_path), path))
+    with open(os.path.join(version_dir, 'metadata.json'), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+
+    if promote:
+        # Copy to a temp name first so a running server never sees a half-written file
+        for src, dst in exports:
+            tmp_path = dst + '.tmp'
+            shutil.copyfile(src, tmp_path)
+            os.replace(tmp_path, dst)
+
+    return version_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train the mental health risk model')
+    parser.add_argument('--data', default=None,
+                        help='Processed training data: .feather, .parquet or .csv (default: SAFE_AI_TRAINING_DATA)')
+    parser.add_argument('--artifact-dir', default=DEFAULT_ARTIFACT_DIR, help='Where versioned artifacts are written')
+    parser.add_argument('--version', default=None, help='Artifact version (default: UTC timestamp)')
+    parser.add_argument('--epochs', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-promote', action='store_true', help='Do not overwrite the served model/scaler')
+    args = parser.parse_args(argv)
+
+    # Set random seeds for reproducibility
+    np.random.seed(args.seed)
+    tf.random.set_seed(args.seed)
+
+    version = args.version or datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+    print("Loading and preprocessing data...")
+    args.data = args.data or default_data_path()
+    X, y = load_dataset(args.data)
+    print(f"Data shape after removing missing values: {X.shape}")
+    print(f"Feature columns: {X.columns.tolist()}")
+    print(f"Target distribution: {y.value_counts().to_dict()}")
+
+    scaler, X_train, X_test, y_train, y_test = split_dataset(X, y, seed=args.seed)
+    print(f"Training set shape: {X_train.shape}")
+    print(f"Test set shape: {X_test.shape}")
+
+    print("\nBuilding TensorFlow model...")
+    model = build_model(X_train.shape[1])
+    print("\nModel Architecture:")
+    model.summary()
+
+    print("\nTraining model...")
+    train_model(model, X_train, y_train, X_test, y_test,
+                epochs=args.epochs, batch_size=args.batch_size)
+
+    print("\nEvaluating model...")
+    test_loss, test_accuracy = model.evaluate(X_test, y_test, verbose=0)
+    print(f"Test Accuracy: {test_accuracy:.4f}")
+    print(f"Test Loss: {test_loss:.4f}")
+
+    y_pred_classes = np.argmax(model.predict(X_test, verbose=0), axis=1)
+    print("\nClassification Report:")
+    print(classification_report(y_test, y_pred_classes))
+    print("\nConfusion Matrix:")
+    print(confusion_matrix(y_test, y_pred_classes))
+
+    metadata = {
+        'version': version,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'data_path': os.path.abspath(args.data),
+        'features': FEATURE_COLUMNS,
+        'rows': int(len(X)),
+        'epochs': args.epochs,
+        'batch_size': args.batch_size,
+        'seed': args.seed,
+        'test_accuracy': float(test_accuracy),
+        'test_loss': float(test_loss),
+    }
+
+    print("\nSaving model and scaler...")
+    version_dir = save_artifacts(model, scaler, metadata, args.artifact_dir, version,
+                                 promote=not args.no_promote, data_path=args.data)
+
+    print("\n" + "="*50)
+    print("MODEL TRAINING COMPLETED SUCCESSFULLY!")
+    print("="*50)
+    print(f"Artifacts saved in: {version_dir}")
+    if not args.no_promote:
+        print(f"Model promoted to: {DEFAULT_MODEL_PATH}")
+        print(f"Scaler promoted to: {DEFAULT_SCALER_PATH}")
+        print(f"NumPy weights promoted to: {NPZ_WEIGHTS_PATH}, {FLAT_WEIGHTS_PATH}")
+        print(f"TFLite exports promoted to: {', '.join(default_tflite_path(q) for q in QUANTIZATIONS)}")
+    print(f"Final Accuracy: {test_accuracy:.2%}")
+    print("="*50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Typed, columnar copy of the processed training data.
+#
+# processed_real_data.csv carries several mostly empty demographic columns and
+# is parsed as float64 text on every read. Training only needs Age, IMC and
+# risk_level, so preprocessing also writes them as an uncompressed Feather
+# (Arrow IPC) file: float32 features and int8 labels. Feather files are
+# memory-mapped and only the requested columns are touched; Parquet and CSV
+# are still accepted wherever a dataset path is.
+#
+# The default dataset is chosen with SAFE_AI_TRAINING_DATA.
+import os
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_COLUMNS, TARGET_COLUMN
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV_PATH = os.path.join(BASE_DIR, 'processed_real_data.csv')
+DEFAULT_DATASET_PATH = os.path.join(BASE_DIR, 'processed_real_data.feather')
+COLUMNS = FEATURE_COLUMNS + [TARGET_COLUMN]
+
+
+def default_data_path():
+    path = os.environ.get('SAFE_AI_TRAINING_DATA')
+    if path:
+        return path
+    return DEFAULT_DATASET_PATH if os.path.exists(DEFAULT_DATASET_PATH) else DEFAULT_CSV_PATH
+
+
+def to_training_frame(df):
+    # Remove rows with missing values in key columns
+    df = df.dropna(subset=COLUMNS)
+    frame = pd.DataFrame({col: df[col].to_numpy(dtype=np.float32) for col in FEATURE_COLUMNS})
+    frame[TARGET_COLUMN] = df[TARGET_COLUMN].to_numpy().astype(np.int8)
+    return frame
+
+
+def write_dataset(df, path):
+    """
+    Write the typed training columns as Feather (.feather/.arrow) or Parquet
+    """
+    frame = to_training_frame(df)
+    tmp_path = path + '.tmp'
+    if path.endswith('.parquet'):
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        # Uncompressed so the file can be memory-mapped as-is
+        frame.to_feather(tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_dataset(path=None, columns=None):
+    """
+    Read only the given columns (default Age, IMC, risk_level)
+    """
+    path = path or default_data_path()
+    columns = list(columns or COLUMNS)
+
+    if path.endswith(('.feather', '.arrow')):
+        import pyarrow as pa
+
+        # Columns without nulls come back as views onto the mapped file
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all().select(columns)
+        return table.to_pandas(split_blocks=True)
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns, memory_map=True)
+    return pd.read_csv(path, usecols=columns)
+
+
+def load_training_data(path=None):
+    """
+    Features and labels ready for training or evaluation
+    """
+    data = read_dataset(path)
+    if data[COLUMNS].isna().any().any():
+        data = data.dropna(subset=COLUMNS)
+    # Typed files already hold float32/int8; only cast other sources, so
+    # feather columns stay views onto the mapped file
+    X = data[FEATURE_COLUMNS]
+    if (X.dtypes != np.float32).any():
+        X = X.astype(np.float32)
+    y = data[TARGET_COLUMN]
+    if y.dtype != np.int8:
+        y = y.astype(np.int8)
+    return X, y
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Convert processed training data to a typed columnar file')
+    parser.add_argument('source', nargs='?', default=DEFAULT_CSV_PATH, help='Processed CSV')
+    parser.add_argument('output', nargs='?', default=DEFAULT_DATASET_PATH, help='.feather or .parquet to write')
+    args = parser.parse_args()
+
+    write_dataset(pd.read_csv(args.source), args.output)
+    print(f"Wrote {args.output}")
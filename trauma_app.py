@@ -1,6 +1,19 @@
 from trauma_chatbot import TraumaInformedChatbot, generate_trauma_report
 import os
 
+def trauma_risk_level(stats):
+    """
+    Report risk level for a conversation's ConversationStats
+    """
+    if stats.crisis_count:
+        return "Critical - Immediate Support Needed"
+    elif stats.at_least('severe_distress') or stats.trauma_indicators > 2:
+        return "High - Trauma-Informed Care Recommended"
+    elif stats.at_least('distressed') or stats.trauma_indicators > 0:
+        return "Moderate - Ongoing Support Beneficial"
+    else:
+        return "Stable - Continue Self-Care"
+
 class TraumaInformedApp:
     def __init__(self):
         self.chatbot = TraumaInformedChatbot()
@@ -8,31 +21,27 @@ class TraumaInformedApp:
     def chat(self, message):
         return self.chatbot.get_response(message)
     
-    def generate_trauma_report(self):
+    def build_report_data(self):
+        """
+        Snapshot of the conversation's risk level, factors and recommendations,
+        ready for generate_trauma_report(); None when nothing has been said yet
+        """
         if not self.chatbot.conversation_history:
-            return "No conversation data available for report generation."
+            return None
         
-        # Analyze conversation for trauma-specific indicators
-        sentiments = [entry['sentiment'] for entry in self.chatbot.conversation_history]
-        trauma_indicators = sum(1 for entry in self.chatbot.conversation_history 
-                              if entry.get('trauma_indicator') is not None)
+        # Conversation totals are kept up to date by the chatbot
+        stats = self.chatbot.stats
+        trauma_indicators = stats.trauma_indicators
         
         # Determine risk level with trauma-informed approach
-        if any(s == 'crisis' for s in sentiments):
-            risk_level = "Critical - Immediate Support Needed"
-        elif any(s == 'severe_distress' for s in sentiments) or trauma_indicators > 2:
-            risk_level = "High - Trauma-Informed Care Recommended"
-        elif any(s == 'distressed' for s in sentiments) or trauma_indicators > 0:
-            risk_level = "Moderate - Ongoing Support Beneficial"
-        else:
-            risk_level = "Stable - Continue Self-Care"
+        risk_level = trauma_risk_level(stats)
         
         # Trauma-specific factors
         trauma_factors = {
-            "Total Messages": len(self.chatbot.conversation_history),
+            "Total Messages": stats.total_messages,
             "Trauma Disclosures": trauma_indicators,
-            "Crisis Indicators": sum(1 for s in sentiments if s == 'crisis'),
-            "Severe Distress Episodes": sum(1 for s in sentiments if s == 'severe_distress'),
+            "Crisis Indicators": stats.crisis_count,
+            "Severe Distress Episodes": stats.count('severe_distress'),
             "Safety Concerns": 'Yes' if self.chatbot.trauma_factors.get('safety_concerns') else 'Not assessed'
         }
         
@@ -67,15 +76,21 @@ class TraumaInformedApp:
                 "Remember healing is not linear"
             ]
         
-        # Generate report
-        report_data = {
+        return {
             'risk': risk_level,
             'trauma_indicators': trauma_indicators,
             'factors': trauma_factors,
             'recommendations': recommendations
         }
+    
+    def generate_trauma_report(self, output_path=None):
+        report_data = self.build_report_data()
+        if report_data is None:
+            return "No conversation data available for report generation."
         
-        output_path = os.path.join(os.path.dirname(__file__), "trauma_support_report.pdf")
+        # Generate report
+        if output_path is None:
+            output_path = os.path.join(os.path.dirname(__file__), "trauma_support_report.pdf")
         generate_trauma_report(report_data, output_path)
         
         return f"SAFE AI trauma support report generated at: {output_path}"